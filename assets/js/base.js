@@ -0,0 +1,96 @@
+// Page URLs are passed in as data attributes of <body> (see base.html)
+const chatPopupUrl = document.body.dataset.chatPopupUrl;
+const chatUrl = document.body.dataset.chatUrl;
+
+// Function to toggle dark mode with icon change
+function toggleDarkMode() {
+  const body = document.body;
+  const icon = document.getElementById('darkModeIcon');
+  body.classList.toggle('dark-mode');
+  if (body.classList.contains('dark-mode')) {
+    icon.textContent = "☀️";
+    localStorage.setItem('theme', 'dark');
+  } else {
+    icon.textContent = "🌙";
+    localStorage.setItem('theme', 'light');
+  }
+}
+
+// Apply the saved theme on page load and update icon
+document.addEventListener('DOMContentLoaded', () => {
+  const savedTheme = localStorage.getItem('theme');
+  const icon = document.getElementById('darkModeIcon');
+  if (savedTheme === 'dark') {
+    document.body.classList.add('dark-mode');
+    icon.textContent = "☀️";
+  } else {
+    icon.textContent = "🌙";
+  }
+});
+
+// Back-to-Top Button Logic
+const backToTopButton = document.getElementById('backToTop');
+window.addEventListener('scroll', () => {
+  if (window.scrollY > 300) {
+    backToTopButton.style.display = 'block';
+  } else {
+    backToTopButton.style.display = 'none';
+  }
+});
+backToTopButton.addEventListener('click', () => {
+  window.scrollTo({ top: 0, behavior: 'smooth' });
+});
+
+// When the chat modal is shown, load the chat popup content via AJAX
+const chatModal = document.getElementById('chatModal');
+chatModal.addEventListener('shown.bs.modal', async () => {
+  try {
+    const response = await fetch(chatPopupUrl);
+    if (response.ok) {
+      document.getElementById('chatModalContent').innerHTML = await response.text();
+      // Bind the chat form submit event after the modal content loads
+      bindChatFormPopup();
+      // Auto-scroll chat box to bottom after loading the modal content
+      const chatBox = document.querySelector('#chatModalContent .chat-box');
+      if(chatBox) { chatBox.scrollTop = chatBox.scrollHeight; }
+    } else {
+      document.getElementById('chatModalContent').innerHTML = "<p>Error loading chat. Please try again.</p>";
+    }
+  } catch (error) {
+    console.error('Error fetching chat:', error);
+    document.getElementById('chatModalContent').innerHTML = "<p>Error loading chat. Please try again.</p>";
+  }
+});
+
+// New function to bind the chat popup form submission
+function bindChatFormPopup() {
+  const chatForm = document.getElementById('chatFormPopup');
+  if (chatForm) {
+    chatForm.addEventListener('submit', async function(e) {
+      e.preventDefault();
+      const formData = new FormData(chatForm);
+      const csrfToken = document.querySelector('#chatFormPopup [name=csrfmiddlewaretoken]').value;
+      try {
+        const response = await fetch(chatUrl, {
+          method: 'POST',
+          body: formData,
+          headers: { 'X-CSRFToken': csrfToken }
+        });
+        if (response.ok) {
+          // Reload the popup content after sending the message
+          const res = await fetch(chatPopupUrl);
+          if(res.ok) {
+            document.getElementById('chatModalContent').innerHTML = await res.text();
+            // Rebind event after reloading content
+            bindChatFormPopup();
+            // Ensure the chat box scrolls to the bottom every time it reloads
+            const chatBox = document.querySelector('#chatModalContent .chat-box');
+            if(chatBox) { chatBox.scrollTop = chatBox.scrollHeight; }
+          }
+        }
+      } catch (error) {
+        console.error('Error:', error);
+      }
+    });
+  }
+}
@@ -0,0 +1,53 @@
+"""
+User lookup by email.
+
+Emails are compared lowercased, through the index on LOWER(email) that
+migration 0011 adds to auth_user. Filter with users_with_email(), not
+email__iexact: on SQLite iexact becomes a LIKE that scans the table.
+"""
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.models import User
+from django.db.models import Q
+from django.db.models.functions import Lower
+
+
+def normalize_email(email):
+    return (email or '').strip().lower()
+
+
+def users_with_email(email):
+    return User.objects.annotate(email_lower=Lower('email')).filter(email_lower=normalize_email(email))
+
+
+def email_taken(email, exclude_user=None):
+    users = users_with_email(email)
+    if exclude_user is not None:
+        users = users.exclude(pk=exclude_user.pk)
+    return users.exists()
+
+
+class EmailOrUsernameBackend(ModelBackend):
+    """
+    ModelBackend that also accepts the account's email in place of the
+    username. An exact username match wins; an email shared by several
+    accounts logs nobody in.
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if username is None or '@' not in username:
+            return super().authenticate(request, username=username, password=password, **kwargs)
+        # One query over both indexes
+        candidates = list(
+            User.objects.annotate(email_lower=Lower('email'))
+            .filter(Q(username=username) | Q(email_lower=normalize_email(username)))[:3]
+        )
+        user = next((candidate for candidate in candidates if candidate.username == username), None)
+        if user is None and len(candidates) == 1:
+            user = candidates[0]
+        if user is None:
+            # Hash anyway so unknown logins take as long as wrong passwords
+            User().set_password(password)
+            return None
+        if user.check_password(password) and self.user_can_authenticate(user):
+            return user
+        return None
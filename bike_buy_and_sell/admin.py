@@ -1,4 +1,4 @@
-from django.contrib import admin
+from django.contrib import admin, messages
 from django.urls import path, include, reverse  # <-- added import
 from django.shortcuts import render, redirect
 from django.db.models import Sum, Count, F, ExpressionWrapper, DecimalField
@@ -6,6 +6,10 @@ from django.db.models.functions import Coalesce
 from django.utils import timezone
 from datetime import timedelta
 from .models import *
+from .archive import archived_order_totals
+from .moderation import MODERATION_PAGE_SIZE, moderate, pending_listings, set_status
+from .pagination import keyset_page
+from .routers import use_replica
 from django.utils.safestring import mark_safe
 from django.utils.html import format_html  # <-- to render link safely
 from django.contrib.auth.models import User  # Import the User model
@@ -24,13 +28,18 @@ class BikeAdmin(admin.ModelAdmin):
     list_filter = ['status']
     list_editable = ['status']  # Allow editing the status directly in the list view
 
-    actions = ['approve_listings']
+    actions = ['approve_listings', 'reject_listings']
 
     def approve_listings(self, request, queryset):
-        queryset.update(status='Approved')
-        self.message_user(request, "Selected listings have been approved.")
+        changed = set_status(queryset, 'Approved')
+        self.message_user(request, f"{changed} listing(s) approved; reserved and sold bikes were left alone.")
     approve_listings.short_description = "Approve selected listings"
 
+    def reject_listings(self, request, queryset):
+        changed = set_status(queryset, 'Rejected')
+        self.message_user(request, f"{changed} listing(s) rejected; reserved and sold bikes were left alone.")
+    reject_listings.short_description = "Reject selected listings"
+
 
 class BikeBuyAndSellImageAdmin(admin.ModelAdmin):
     list_display = ('id', 'bike_buy_and_sell', 'image')
@@ -158,13 +167,14 @@ def admin_dashboard(request):
     today = timezone.now()
     last_month = today - timedelta(days=30)
     
-    # Calculate total sales and trend
-    total_sales = Orders.objects.aggregate(
-        total=Coalesce(Sum('total_price'), 0))['total']
+    # Calculate total sales and trend; archived orders come from a cached total
+    archived_orders, archived_sales = archived_order_totals()
+    total_sales = archived_sales + Orders.objects.aggregate(
+        total=Coalesce(Sum('total_price', output_field=DecimalField()), 0, output_field=DecimalField()))['total']
     
     last_month_sales = Orders.objects.filter(
         created_at__gte=last_month
-    ).aggregate(total=Coalesce(Sum('total_price'), 0))['total']
+    ).aggregate(total=Coalesce(Sum('total_price', output_field=DecimalField()), 0, output_field=DecimalField()))['total']
     
     sales_trend = (
         ((float(total_sales) - float(last_month_sales)) / float(last_month_sales) * 100) 
@@ -177,7 +187,7 @@ def admin_dashboard(request):
     active_users = User.objects.filter(is_active=True).count()
 
     # Order statistics
-    total_orders = Orders.objects.count()
+    total_orders = archived_orders + Orders.objects.count()
     pending_orders = Orders.objects.filter(status='Pending').count()
 
     # Bike statistics
@@ -211,12 +221,35 @@ def admin_dashboard(request):
     return render(request, 'admin/dashboard.html', context)
 
 
+def moderation_queue(request):
+    # Oldest pending listings first, a page at a time; decisions are applied per batch
+    if request.method == 'POST':
+        decision = {'approve': 'Approved', 'reject': 'Rejected'}.get(request.POST.get('action'))
+        ids = [pk for pk in request.POST.getlist('ids') if pk.isdigit()]
+        if decision and ids:
+            changed = moderate(ids, decision)
+            messages.success(request, f"{changed} listing(s) {decision.lower()}.")
+        else:
+            messages.warning(request, "Select listings and an action.")
+        return redirect(request.get_full_path())
+
+    page = keyset_page(request, pending_listings(), MODERATION_PAGE_SIZE, param='after', oldest_first=True)
+    context = {
+        'title': 'Moderation queue',
+        'listings': page,
+        'next_query': page.next_query(request) if page.has_next else None,
+        'pending_count': BikeBuyAndSell.objects.filter(status='Pending').count(),
+    }
+    return render(request, 'admin/moderation_queue.html', context)
+
+
 # Create an AdminSite subclass to add custom views
 class CustomAdminSite(admin.AdminSite):
     def get_urls(self):
         urls = super().get_urls()
         custom_urls = [
-            path('dashboard/', self.admin_view(admin_dashboard), name='admin_dashboard'),
+            path('dashboard/', self.admin_view(use_replica(admin_dashboard)), name='admin_dashboard'),
+            path('moderation/', self.admin_view(moderation_queue), name='moderation_queue'),
         ]
         return custom_urls + urls
 
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class BikeBuyAndSellConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'bike_buy_and_sell'
+
+    def ready(self):
+        from . import catalog, db, registry, saved_searches, sessions  # noqa: F401  (registers signal receivers)
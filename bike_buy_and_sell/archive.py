@@ -0,0 +1,123 @@
+"""
+Archive tiering.
+
+Delivered orders and resolved or closed chat threads never change again,
+but they stay in the tables every order history, chat and dashboard query
+reads. `manage.py archive_records` moves delivered orders older than
+ORDER_ARCHIVE_MONTHS and finished threads with no message in
+CHAT_ARCHIVE_DAYS into archive tables: each batch is copied and deleted in
+one transaction, so a row is always in exactly one tier.
+
+Ids are kept, so links to an archived order still work. Read paths go to
+the archive only when asked: "Archived orders" after the last page of the
+order history, "Show older conversations" in the chat, or an order id that
+is no longer in the hot table.
+"""
+from django.db import transaction
+from django.core.cache import cache
+from django.db.models import Count, DecimalField, F, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .cache import get_or_compute
+from .models import (
+    ArchivedChatMessage, ArchivedOrder, ArchivedOrderItem, ChatMessage, OrderItem, Orders,
+)
+
+ORDER_ARCHIVE_MONTHS = 6
+CHAT_ARCHIVE_DAYS = 90
+ARCHIVE_BATCH_SIZE = 1000
+FINISHED_CHAT_STATUSES = ('resolved', 'closed')
+ARCHIVED_TOTALS_KEY = 'archive:order_totals'
+
+
+def months_ago(months, now=None):
+    """The same day and time `months` calendar months back (clamped to the end of shorter months)"""
+    now = now or timezone.now()
+    year, month = divmod(now.year * 12 + now.month - 1 - months, 12)
+    month += 1
+    days = [31, 29 if year % 4 == 0 and (year % 100 or year % 400 == 0) else 28, 31, 30, 31, 30,
+            31, 31, 30, 31, 30, 31][month - 1]
+    return now.replace(year=year, month=month, day=min(now.day, days))
+
+
+def archive_orders(before, batch_size=ARCHIVE_BATCH_SIZE):
+    """Move delivered orders created before `before`, with their items; returns the number moved"""
+    moved = 0
+    candidates = Orders.objects.filter(status='Delivered', created_at__lt=before).order_by('pk')
+    while True:
+        with transaction.atomic():
+            ids = list(candidates.values_list('pk', flat=True)[:batch_size])
+            if not ids:
+                return moved
+            ArchivedOrder.objects.bulk_create(ArchivedOrder(**row) for row in Orders.objects.filter(pk__in=ids).values())
+            items = OrderItem.objects.filter(order_id__in=ids).values()
+            ArchivedOrderItem.objects.bulk_create(ArchivedOrderItem(**row) for row in items)
+            Orders.objects.filter(pk__in=ids).delete()  # and their items
+        moved += len(ids)
+        cache.delete(ARCHIVED_TOTALS_KEY)
+
+
+def finished_threads(before):
+    """Resolved or closed threads whose last message is older than `before`"""
+    return ChatMessage.objects.filter(
+        parent__isnull=True, status__in=FINISHED_CHAT_STATUSES, timestamp__lt=before,
+    ).exclude(replies__timestamp__gte=before).order_by('pk')
+
+
+def archive_chat_threads(before, batch_size=ARCHIVE_BATCH_SIZE):
+    """Move finished threads (the first message and every reply); returns the number of messages moved"""
+    moved = 0
+    candidates = finished_threads(before)
+    while True:
+        with transaction.atomic():
+            roots = list(candidates.values_list('pk', flat=True)[:batch_size])
+            if not roots:
+                return moved
+            # Parents before their replies, a level at a time
+            rows = list(ChatMessage.objects.filter(pk__in=roots).order_by().values())
+            level = roots
+            while level:
+                replies = list(ChatMessage.objects.filter(parent_id__in=level).order_by().values())
+                rows.extend(replies)
+                level = [row['id'] for row in replies]
+            ArchivedChatMessage.objects.bulk_create(ArchivedChatMessage(**row) for row in rows)
+            ChatMessage.objects.filter(pk__in=roots).delete()  # replies go with their thread
+        moved += len(rows)
+
+
+def order_history(user, archived=False):
+    """user's orders with item count and total, from the hot table or with archived=True the archive"""
+    if archived:
+        orders, items = ArchivedOrder.objects.filter(user=user), 'items'
+    else:
+        orders, items = Orders.objects.filter(user=user), 'orderitem'
+    return orders.annotate(
+        item_count=Coalesce(Sum(f'{items}__quantity'), 0),
+        items_total=Sum(F(f'{items}__price') * F(f'{items}__quantity')),
+    )
+
+
+def get_order(**lookup):
+    """The order matching lookup in the hot table or, failing that, the archive; None if in neither"""
+    order = Orders.objects.filter(**lookup).first()
+    return order if order is not None else ArchivedOrder.objects.filter(**lookup).first()
+
+
+def order_items(order):
+    return order.items.all() if isinstance(order, ArchivedOrder) else order.orderitem_set.all()
+
+
+def archived_chat_messages(user):
+    return ArchivedChatMessage.objects.filter(user=user).order_by('timestamp')
+
+
+def archived_order_totals():
+    """(orders, sales) over the archive: cached until archive_orders() next moves orders"""
+    def totals():
+        row = ArchivedOrder.objects.aggregate(
+            count=Count('id'),
+            sales=Coalesce(Sum('total_price', output_field=DecimalField()), 0, output_field=DecimalField()),
+        )
+        return row['count'], row['sales']
+    return get_or_compute(ARCHIVED_TOTALS_KEY, totals, 24 * 60 * 60)
@@ -0,0 +1,26 @@
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    SQLite backend that can open write transactions with BEGIN IMMEDIATE.
+
+    Set TRANSACTION_MODE to 'DEFERRED', 'IMMEDIATE' or 'EXCLUSIVE' in the
+    database settings. With IMMEDIATE the write lock is taken when the
+    transaction starts, so busy_timeout applies instead of failing with
+    "database is locked" when a read lock cannot be upgraded.
+    """
+    transaction_modes = ('DEFERRED', 'IMMEDIATE', 'EXCLUSIVE')
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        mode = (self.settings_dict.get('TRANSACTION_MODE') or 'DEFERRED').upper()
+        if mode not in self.transaction_modes:
+            raise ImproperlyConfigured(
+                "TRANSACTION_MODE must be one of %s." % ', '.join(self.transaction_modes)
+            )
+        self.transaction_mode = mode
+
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute(f"BEGIN {self.transaction_mode}")
@@ -0,0 +1,269 @@
+"""
+Two-tier cache backend.
+
+L1 is a small LRU inside each worker process, L2 is a cache shared by all
+workers (file based by default, Redis when REDIS_URL is set). Reads try L1
+first and fill it from L2; writes and deletes go to both. Other workers may
+keep a stale L1 entry for at most L1_TIMEOUT seconds after a change.
+
+get_or_compute() adds stampede protection on top: only one caller per key
+recomputes an expired value (a per-key lock inside the process plus a lock
+key in L2 across processes), and values are refreshed a little before they
+expire with probability growing towards the expiry time.
+"""
+import math
+import pickle
+import random
+import threading
+import time
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+
+from django.core.cache import cache as default_cache, caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+from .instrumentation import record_cache_event
+
+# Django creates cache backends per thread, so everything that has to be
+# shared by the threads of a worker lives here, keyed by the L2 alias.
+_l1_caches = {}
+_counters = {}
+_flights = {}
+_registry_lock = threading.Lock()
+
+
+class LRUCache:
+    """Bounded, thread-safe LRU of pickled values with a per-entry expiry time"""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            pickled, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+        return pickled
+
+    def set(self, key, pickled, ttl):
+        with self._lock:
+            self._data[key] = (pickled, time.monotonic() + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            return self._data.pop(key, None) is not None
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class TwoTierCache(BaseCache):
+    """
+    CACHES backend. LOCATION is the alias of the shared L2 cache.
+
+    OPTIONS:
+        L1_MAX_ENTRIES  entries kept per process (default 1000)
+        L1_TIMEOUT      seconds an entry may live in L1 (default 5)
+        LOCK_TIMEOUT    seconds a recomputation lock is held at most (default 10)
+    """
+    pickle_protocol = pickle.HIGHEST_PROTOCOL
+
+    def __init__(self, location, params):
+        options = params.get('OPTIONS', {})
+        super().__init__(params)
+        self._l2_alias = location
+        self.l1_timeout = options.get('L1_TIMEOUT', 5)
+        self.lock_timeout = options.get('LOCK_TIMEOUT', 10)
+        with _registry_lock:
+            max_entries = options.get('L1_MAX_ENTRIES', 1000)
+            self.l1 = _l1_caches.setdefault((location, max_entries), LRUCache(max_entries))
+            self._counters = _counters.setdefault(location, Counter())
+            self._flights = _flights.setdefault(location, {})
+
+    @property
+    def l2(self):
+        return caches[self._l2_alias]
+
+    def _count(self, name):
+        record_cache_event(name)
+        with _registry_lock:
+            self._counters[name] += 1
+
+    def stats(self):
+        """Hit/miss counters of this process since start or the last reset_stats()"""
+        with _registry_lock:
+            return dict(self._counters, l1_entries=len(self.l1))
+
+    def reset_stats(self):
+        with _registry_lock:
+            self._counters.clear()
+
+    def _l1_ttl(self, timeout):
+        timeout = self.get_backend_timeout(timeout)
+        if timeout is None:
+            return self.l1_timeout
+        return max(0, min(self.l1_timeout, timeout - time.time()))
+
+    def _fill_l1(self, key, value, timeout):
+        ttl = self._l1_ttl(timeout)
+        if ttl > 0:
+            self.l1.set(key, pickle.dumps(value, self.pickle_protocol), ttl)
+
+    def get(self, key, default=None, version=None):
+        l1_key = self.make_and_validate_key(key, version=version)
+        pickled = self.l1.get(l1_key)
+        if pickled is not None:
+            self._count('l1_hits')
+            return pickle.loads(pickled)
+        sentinel = object()
+        value = self.l2.get(key, sentinel, version=version)
+        if value is sentinel:
+            self._count('misses')
+            return default
+        self._count('l2_hits')
+        self._fill_l1(l1_key, value, self.default_timeout)
+        return value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        l1_key = self.make_and_validate_key(key, version=version)
+        self.l2.set(key, value, timeout, version=version)
+        self._fill_l1(l1_key, value, timeout)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        l1_key = self.make_and_validate_key(key, version=version)
+        added = self.l2.add(key, value, timeout, version=version)
+        if added:
+            self._fill_l1(l1_key, value, timeout)
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.l2.touch(key, timeout, version=version)
+
+    def delete(self, key, version=None):
+        self.l1.delete(self.make_and_validate_key(key, version=version))
+        return self.l2.delete(key, version=version)
+
+    def has_key(self, key, version=None):
+        if self.l1.get(self.make_and_validate_key(key, version=version)) is not None:
+            return True
+        return self.l2.has_key(key, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        # Counters live in L2 only so every process sees the same value
+        self.l1.delete(self.make_and_validate_key(key, version=version))
+        return self.l2.incr(key, delta, version=version)
+
+    def clear(self):
+        self.l1.clear()
+        self.l2.clear()
+
+    def close(self, **kwargs):
+        self.l2.close(**kwargs)
+
+    @contextmanager
+    def _flight_lock(self, key):
+        """The in-process lock for key, shared while callers hold it and dropped after the last one leaves"""
+        with _registry_lock:
+            flight = self._flights.get(key)
+            if flight is None:
+                flight = self._flights[key] = [threading.Lock(), 0]
+            flight[1] += 1
+        try:
+            yield flight[0]
+        finally:
+            with _registry_lock:
+                flight[1] -= 1
+                if not flight[1]:
+                    del self._flights[key]
+
+    def get_or_compute(self, key, compute, timeout=DEFAULT_TIMEOUT, beta=1.0, version=None):
+        """
+        Return the cached value for key, calling compute() to fill it when
+        needed. Values are stored as (value, compute_seconds, expires_at) so
+        that a refresh can start early, before every caller sees a miss.
+        """
+        timeout = self.default_timeout if timeout is DEFAULT_TIMEOUT else timeout
+        entry = self.get(key, version=version)
+        if entry is not None:
+            value, delta, expires_at = entry
+            if not self._refresh_early(delta, expires_at, beta):
+                return value
+            with self._flight_lock(key) as lock:
+                # Someone else is already refreshing: keep serving the current value
+                if not lock.acquire(blocking=False):
+                    self._count('stale_served')
+                    return value
+                try:
+                    if self._acquire_l2_lock(key, version):
+                        self._count('early_refreshes')
+                        return self._compute_and_set(key, compute, timeout, version)
+                    self._count('stale_served')
+                    return value
+                finally:
+                    lock.release()
+
+        with self._flight_lock(key) as lock, lock:
+            # Another thread of this process may have filled it while we waited
+            entry = self.get(key, version=version)
+            if entry is not None:
+                return entry[0]
+            if self._acquire_l2_lock(key, version):
+                return self._compute_and_set(key, compute, timeout, version)
+            # Another process is computing it: wait for its result
+            deadline = time.monotonic() + self.lock_timeout
+            while time.monotonic() < deadline:
+                time.sleep(0.05)
+                entry = self.l2.get(key, version=version)
+                if entry is not None:
+                    return entry[0]
+            return self._compute_and_set(key, compute, timeout, version)
+
+    def _refresh_early(self, delta, expires_at, beta):
+        if expires_at is None:
+            return False
+        return time.time() - delta * beta * math.log(1.0 - random.random()) >= expires_at
+
+    def _acquire_l2_lock(self, key, version):
+        # Atomic with Redis; with the file based L2 two processes can rarely both win
+        return self.l2.add(f'lock:{key}', 1, self.lock_timeout, version=version)
+
+    def _compute_and_set(self, key, compute, timeout, version):
+        self._count('recomputes')
+        try:
+            start = time.time()
+            value = compute()
+            delta = time.time() - start
+            expires_at = start + timeout if timeout is not None else None
+            self.set(key, (value, delta, expires_at), timeout, version=version)
+            return value
+        finally:
+            self.l2.delete(f'lock:{key}', version=version)
+
+
+def get_or_compute(key, compute, timeout=DEFAULT_TIMEOUT, cache=None):
+    """
+    Stampede-protected lookup on the default cache. Falls back to a plain
+    get/set when the configured backend is not a TwoTierCache.
+    """
+    cache = cache or default_cache
+    if hasattr(cache, 'get_or_compute'):
+        return cache.get_or_compute(key, compute, timeout)
+    value = cache.get(key)
+    if value is None:
+        value = compute()
+        cache.set(key, value, timeout)
+    return value
@@ -6,10 +6,9 @@ from .models import BikeBuyAndSell
 class Cart(object):
     def __init__(self, request):
         self.session = request.session
-        cart = self.session.get(settings.CART_SESSION_ID)
-        if not cart:
-            cart = self.session[settings.CART_SESSION_ID] = {}
-        self.cart = cart
+        # An empty cart is not stored until something is added, so rendering the
+        # cart badge does not create or rewrite a session for every visitor
+        self.cart = self.session.get(settings.CART_SESSION_ID) or {}
 
     def update(self, product, quantity=1, update_quantity=True):
         product_id = str(product.id)
@@ -39,12 +38,22 @@ class Cart(object):
             del self.cart[product_id]
             self.save()
 
+    def product_ids(self):
+        return [int(product_id) for product_id in self.cart]
+
+    def discard(self, product_ids):
+        for product_id in product_ids:
+            self.cart.pop(str(product_id), None)
+        self.save()
+
     def __iter__(self):
         product_ids = self.cart.keys()
         products = BikeBuyAndSell.objects.filter(id__in=product_ids)
+        # Work on copies: the session must only ever hold JSON-serializable values
+        cart = {product_id: dict(item) for product_id, item in self.cart.items()}
         for product in products:
-            self.cart[str(product.id)]['product'] = product
-        for item in self.cart.values():
+            cart[str(product.id)]['product'] = product
+        for item in cart.values():
             item['price'] = Decimal(item['price'])
             item['total_price'] = item['price'] * item['quantity']
             yield item
@@ -56,5 +65,5 @@ class Cart(object):
         return sum(Decimal(item['price']) * item['quantity'] for item in self.cart.values())
 
     def clear(self):
-        del self.session[settings.CART_SESSION_ID]
-        self.session.modified = True
+        self.session.pop(settings.CART_SESSION_ID, None)
+        self.cart = {}
@@ -0,0 +1,56 @@
+"""
+Catalog version.
+
+A counter in the cache that moves whenever something shown on the public
+catalog pages changes: bikes, their images, categories, banners and the
+seller details printed on a listing. Cached pages and querysets put it in
+their keys, so one bump retires all of them at once.
+
+QuerySet.update() sends no signals; code that updates catalog rows in bulk
+calls bump_catalog_version() itself.
+"""
+import time
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Banner, BikeBuyAndSell, BikeBuyAndSellImage, Category
+
+CATALOG_VERSION_KEY = 'catalog:version'
+CATALOG_MODELS = (BikeBuyAndSell, BikeBuyAndSellImage, Category, Banner)
+# What a listing prints about its seller
+SELLER_FIELDS = {'username', 'first_name', 'last_name', 'email'}
+
+
+def catalog_version():
+    version = cache.get(CATALOG_VERSION_KEY)
+    if version is None:
+        # Start from the clock so a lost counter never reuses an old version
+        cache.add(CATALOG_VERSION_KEY, int(time.time() * 1000), None)
+        version = cache.get(CATALOG_VERSION_KEY)
+    return version
+
+
+def bump_catalog_version():
+    try:
+        return cache.incr(CATALOG_VERSION_KEY)
+    except ValueError:
+        return catalog_version()
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def catalog_changed(sender, **kwargs):
+    if sender in CATALOG_MODELS:
+        bump_catalog_version()
+
+
+@receiver(post_save, sender=User)
+def seller_changed(sender, instance, created, update_fields=None, **kwargs):
+    # Logins, password changes and the like save fields no listing shows
+    if created or (update_fields is not None and not SELLER_FIELDS & set(update_fields)):
+        return
+    if BikeBuyAndSell.objects.filter(user=instance).exists():
+        bump_catalog_version()
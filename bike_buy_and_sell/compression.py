@@ -0,0 +1,118 @@
+"""
+Response compression.
+
+CompressionMiddleware encodes text responses with brotli (when the brotli
+package is installed and the client accepts it) or gzip. Streaming
+responses are compressed chunk by chunk and flushed after every chunk, so
+a streamed page head still reaches the browser before the body is done.
+
+BREACH: a response that rendered a CSRF token is sent uncompressed. An
+attacker who can reflect input into such a page could otherwise recover
+the token from the compressed size. Rendering a token makes
+CsrfViewMiddleware (re)send the CSRF cookie, so that cookie on the
+response is the signal; it also covers the tokens the anonymous page cache
+swaps in.
+"""
+import re
+import zlib
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_string
+
+try:
+    import brotli
+except ImportError:  # optional; gzip only
+    brotli = None
+
+MIN_COMPRESS_LENGTH = 200
+COMPRESSIBLE_TYPES = ('text/', 'application/json', 'application/javascript', 'application/xml', 'image/svg+xml')
+# Heal-the-BREACH padding in the gzip header, as in django.middleware.gzip
+MAX_RANDOM_BYTES = 100
+
+accept_encoding_re = re.compile(r'([\w*-]+)\s*(?:;\s*q\s*=\s*([\d.]+))?')
+
+
+def accepted_encodings(request):
+    accepted = set()
+    for coding, quality in accept_encoding_re.findall(request.META.get('HTTP_ACCEPT_ENCODING', '')):
+        try:
+            if not quality or float(quality) > 0:
+                accepted.add(coding.lower())
+        except ValueError:
+            continue
+    return accepted
+
+
+def choose_encoding(request):
+    accepted = accepted_encodings(request)
+    if brotli and 'br' in accepted:
+        return 'br'
+    if 'gzip' in accepted:
+        return 'gzip'
+    return None
+
+
+def gzip_stream(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def brotli_stream(chunks):
+    compressor = brotli.Compressor(quality=5)
+    for chunk in chunks:
+        data = compressor.process(chunk) + compressor.flush()
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+class CompressionMiddleware:
+    """
+    Place near the top of MIDDLEWARE, above everything that changes the
+    response body.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if not self.is_compressible(response):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = choose_encoding(request)
+        if encoding is None or settings.CSRF_COOKIE_NAME in response.cookies:
+            return response
+
+        if response.streaming:
+            stream = brotli_stream if encoding == 'br' else gzip_stream
+            response.streaming_content = stream(response.streaming_content)
+            del response.headers['Content-Length']
+        else:
+            if encoding == 'br':
+                compressed = brotli.compress(response.content, quality=5)
+            else:
+                compressed = compress_string(response.content, max_random_bytes=MAX_RANDOM_BYTES)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+
+        # The representation changed, so a strong validator must become weak (RFC 9110 8.8.1)
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+    def is_compressible(self, response):
+        if response.has_header('Content-Encoding') or getattr(response, 'is_async', False):
+            return False
+        if not response.get('Content-Type', '').startswith(COMPRESSIBLE_TYPES):
+            return False
+        return response.streaming or len(response.content) >= MIN_COMPRESS_LENGTH
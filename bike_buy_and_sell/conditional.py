@@ -0,0 +1,70 @@
+"""
+Conditional GET helpers.
+
+Every page also shows the visitor's name and cart badge and may carry a
+CSRF token, so page ETags mix the version of the content with the user,
+the cart and the CSRF cookie. A page with flash messages waiting is always
+rendered in full; a 304 would swallow them.
+
+condition_on() wraps views whose content is described by a cheap validator
+(the catalog version, a max id), so a 304 is sent before the view queries
+or renders anything.
+"""
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+
+def page_etag(request, *parts):
+    digest = hashlib.md5(usedforsecurity=False)
+    cart = request.session.get(settings.CART_SESSION_ID) or {}
+    # The secret CsrfViewMiddleware read from the cookie, or the one a page that just used
+    # {% csrf_token %} will set
+    csrf_cookie = request.META.get('CSRF_COOKIE', request.COOKIES.get(settings.CSRF_COOKIE_NAME))
+    for part in (request.user.pk, csrf_cookie, sorted((key, item['quantity']) for key, item in cart.items()), *parts):
+        digest.update(repr(part).encode())
+        digest.update(b'\0')
+    return quote_etag(digest.hexdigest())
+
+
+def not_modified(request, etag, last_modified=None):
+    """A 304 response when the client's copy is still current, otherwise None"""
+    if request.method not in ('GET', 'HEAD') or len(get_messages(request)):
+        return None
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    return set_validators(response, etag, last_modified) if response is not None else None
+
+
+def set_validators(response, etag, last_modified=None):
+    response.headers['ETag'] = etag
+    if last_modified:
+        response.headers['Last-Modified'] = http_date(last_modified.timestamp())
+    # Browsers may keep the page but must revalidate it: it carries the cart badge
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def condition_on(validator):
+    """
+    Decorator for views that only depend on validator(request, *args,
+    **kwargs) (a tuple), the user and the cart.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            parts = validator(request, *args, **kwargs)
+            response = not_modified(request, page_etag(request, *parts))
+            if response is not None:
+                return response
+            response = view(request, *args, **kwargs)
+            if response.status_code == 200:
+                # Again: rendering may have issued a CSRF cookie
+                set_validators(response, page_etag(request, *parts))
+            return response
+        return wrapper
+    return decorator
@@ -1,5 +1,20 @@
+from django.utils.functional import SimpleLazyObject
+
 from .cart import Cart
+from .pagecache import CSRF_PLACEHOLDER
+from .registry import categories
 
 
 def cart(request):
     return {'cart': Cart(request)}
+
+
+def page_cache(request):
+    # Pages rendered for the anonymous page cache get a placeholder token (see pagecache.py)
+    if getattr(request, 'page_cache_csrf', False):
+        return {'csrf_token': CSRF_PLACEHOLDER}
+    return {}
+
+
+def reference_data(request):
+    return {'categories': SimpleLazyObject(categories)}
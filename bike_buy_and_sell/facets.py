@@ -0,0 +1,158 @@
+"""
+Faceted browse.
+
+buy_list shows how many approved listings each category and each price
+bucket would give with the other filters kept. The counts come from a grid
+of approved listings per (category, price bucket). On SQLite the grid is
+the bike_buy_and_sell_facetcount table, kept current by triggers on the
+bike table (migration 0014) so it also follows QuerySet.update(); reading
+it costs a few dozen rows however large the catalog is. Elsewhere the grid
+is one grouped query. Either way it is cached by catalog version.
+
+Category counts for a price range that does not fall on bucket edges are
+not in the grid; they take one grouped query over the (status, price,
+category) index, cached the same way.
+"""
+from bisect import bisect_right
+from collections import Counter, namedtuple
+
+from django.db import connection
+from django.db.models import Case, Count, IntegerField, Value, When
+from django.http import QueryDict
+
+from .cache import get_or_compute
+from .catalog import catalog_version
+from .models import BikeBuyAndSell, FacetCount
+from .registry import categories
+
+# Lower edge of each price bucket. Migration 0014 repeats them in the
+# trigger SQL: changing them needs a migration that rebuilds the table.
+PRICE_BUCKETS = (0, 50000, 100000, 200000, 400000)
+FACET_TIMEOUT = 300
+
+FacetOption = namedtuple('FacetOption', 'value label count query selected')
+
+
+def price_bucket(price):
+    return max(bisect_right(PRICE_BUCKETS, price) - 1, 0)
+
+
+def bucket_range(bucket):
+    """(min_price, max_price) of a bucket; max_price is None for the last one"""
+    upper = PRICE_BUCKETS[bucket + 1] - 1 if bucket + 1 < len(PRICE_BUCKETS) else None
+    return PRICE_BUCKETS[bucket], upper
+
+
+def bucket_label(bucket):
+    low, high = bucket_range(bucket)
+    if not bucket:
+        return f'Under {high + 1:,}'
+    return f'{low:,}+' if high is None else f'{low:,} - {high:,}'
+
+
+def bucket_expression():
+    whens = [When(price__gte=edge, then=Value(i)) for i, edge in reversed(list(enumerate(PRICE_BUCKETS))) if i]
+    return Case(*whens, default=Value(0), output_field=IntegerField())
+
+
+def count_grid():
+    """The facet grid counted with one grouped query over the bike table"""
+    rows = (BikeBuyAndSell.objects.filter(status='Approved').order_by().annotate(bucket=bucket_expression())
+            .values_list('category_id', 'bucket').annotate(Count('id')))
+    return {(category_id, bucket): listings for category_id, bucket, listings in rows}
+
+
+def facet_grid():
+    """{(category_id, bucket): approved listings}, cached by catalog version"""
+    def compute():
+        if connection.vendor != 'sqlite':
+            return count_grid()
+        rows = FacetCount.objects.filter(listings__gt=0).values_list('category_id', 'bucket', 'listings')
+        return {(category_id, bucket): listings for category_id, bucket, listings in rows}
+
+    return get_or_compute(f'facets:grid:{catalog_version()}', compute, FACET_TIMEOUT)
+
+
+def covered_buckets(min_price, max_price):
+    """The buckets a price range is made of, or None when it does not fall on bucket edges"""
+    if min_price is not None and min_price not in PRICE_BUCKETS:
+        return None
+    if max_price is not None and max_price + 1 not in PRICE_BUCKETS[1:]:
+        return None
+    buckets = []
+    for bucket in range(len(PRICE_BUCKETS)):
+        low, high = bucket_range(bucket)
+        if (min_price is None or low >= min_price) and (max_price is None or high is not None and high <= max_price):
+            buckets.append(bucket)
+    return buckets
+
+
+def category_counts(min_price, max_price):
+    """{category_id: approved listings in the price range}"""
+    buckets = covered_buckets(min_price, max_price)
+    if buckets is not None:
+        counts = Counter()
+        for (category_id, bucket), listings in facet_grid().items():
+            if bucket in buckets:
+                counts[category_id] += listings
+        return counts
+
+    def compute():
+        bikes = BikeBuyAndSell.objects.filter(status='Approved').order_by()
+        if min_price is not None:
+            bikes = bikes.filter(price__gte=min_price)
+        if max_price is not None:
+            bikes = bikes.filter(price__lte=max_price)
+        return Counter(dict(bikes.values_list('category_id').annotate(Count('id'))))
+
+    return get_or_compute(f'facets:range:{catalog_version()}:{min_price}:{max_price}', compute, FACET_TIMEOUT)
+
+
+def bucket_counts(category_id):
+    """{bucket: approved listings}, in one category or in all of them"""
+    counts = Counter()
+    for (grid_category, bucket), listings in facet_grid().items():
+        if category_id is None or grid_category == category_id:
+            counts[bucket] += listings
+    return counts
+
+
+def parse_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def browse_facets(request):
+    """Category and price bucket options for buy_list, each with its count and link"""
+    category_id = parse_int(request.GET.get('category'))
+    min_price = parse_int(request.GET.get('min_price'))
+    max_price = parse_int(request.GET.get('max_price'))
+
+    def query(**params):
+        result = QueryDict(mutable=True)
+        result.update(request.GET)
+        result.pop('page', None)
+        for key, value in params.items():
+            if value is None:
+                result.pop(key, None)
+            else:
+                result[key] = value
+        return result.urlencode()
+
+    per_category = category_counts(min_price, max_price)
+    category_options = [
+        FacetOption(category.id, category.name, per_category.get(category.id, 0),
+                    query(category=None if category.id == category_id else category.id), category.id == category_id)
+        for category in categories()
+        if per_category.get(category.id) or category.id == category_id
+    ]
+    per_bucket = bucket_counts(category_id)
+    price_options = []
+    for bucket in range(len(PRICE_BUCKETS)):
+        low, high = bucket_range(bucket)
+        selected = (min_price or 0, max_price) == (low, high)
+        link = query(min_price=None, max_price=None) if selected else query(min_price=low or None, max_price=high)
+        price_options.append(FacetOption(bucket, bucket_label(bucket), per_bucket.get(bucket, 0), link, selected))
+    return {'categories': category_options, 'prices': price_options}
@@ -4,9 +4,11 @@ from django.contrib.auth.models import User
 from django import forms
 from django.forms import DateInput
 
+from .accounts import email_taken
+
 
 class LoginForm(forms.Form):
-    username = forms.CharField(widget=forms.TextInput(attrs={'placeholder': 'Username'}))
+    username = forms.CharField(label='Username or email', widget=forms.TextInput(attrs={'placeholder': 'Username or email'}))
     password = forms.CharField(widget=forms.PasswordInput(attrs={'placeholder': 'Password'}))
 
 
@@ -16,6 +18,16 @@ class ProfileUpdateForm(forms.Form):
     email = forms.EmailField(widget=forms.TextInput(attrs={'placeholder': 'Email'}))
     profile_picture = forms.ImageField(required=False)
 
+    def __init__(self, *args, user=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.user = user
+
+    def clean_email(self):
+        email = self.cleaned_data.get('email')
+        if email_taken(email, exclude_user=self.user):
+            raise ValidationError("This email is already registered. Please use a different email.")
+        return email
+
 
 PRODUCT_QUANTITY_CHOICES = [(i, str(i)) for i in range(1, 26)]
 
@@ -42,6 +54,6 @@ class CustomUserCreationForm(UserCreationForm):
 
     def clean_email(self):
         email = self.cleaned_data.get('email')
-        if User.objects.filter(email=email).exists():
+        if email_taken(email):
             raise ValidationError("This email is already registered. Please use a different email.")
         return email
@@ -0,0 +1,143 @@
+"""
+Per-request performance metrics.
+
+PerformanceMiddleware (in middleware.py) starts a RequestMetrics for a
+sample of requests. SQL time is collected with connection.execute_wrapper,
+template time by InstrumentedDjangoTemplates and cache hits/misses by
+TwoTierCache; each of them reports into the metrics of the current thread.
+"""
+import bisect
+import threading
+import time
+from collections import Counter
+
+from django.template.backends.django import DjangoTemplates, Template
+
+_local = threading.local()
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is open ended
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = Counter()
+        self.query_count = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.cache = Counter()
+
+    def record_query(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - start
+            self.query_count += 1
+            self.queries[sql] += 1
+
+    @property
+    def cache_hits(self):
+        return self.cache['l1_hits'] + self.cache['l2_hits']
+
+    @property
+    def cache_misses(self):
+        return self.cache['misses']
+
+    def duplicate_queries(self, limit=5):
+        return [(sql, count) for sql, count in self.queries.most_common(limit) if count > 1]
+
+    def server_timing(self, total):
+        return ', '.join([
+            f'db;dur={self.db_time * 1000:.1f};desc="{self.query_count} queries"',
+            f'tpl;dur={self.template_time * 1000:.1f}',
+            f'cache;desc="{self.cache_hits} hits, {self.cache_misses} misses"',
+            f'total;dur={total * 1000:.1f}',
+        ])
+
+
+def current_metrics():
+    return getattr(_local, 'metrics', None)
+
+
+def start_request():
+    _local.metrics = RequestMetrics()
+    return _local.metrics
+
+
+def finish_request():
+    _local.metrics = None
+
+
+def record_cache_event(name):
+    metrics = getattr(_local, 'metrics', None)
+    if metrics is not None:
+        metrics.cache[name] += 1
+
+
+class PerformanceStats:
+    """In-memory latency histograms and query totals per URL name, for this process"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views = {}
+
+    def add(self, url_name, total, metrics):
+        total_ms = total * 1000
+        with self._lock:
+            view = self._views.setdefault(url_name, {
+                'count': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'db_ms': 0.0, 'queries': 0,
+                'histogram': [0] * (len(LATENCY_BUCKETS_MS) + 1),
+            })
+            view['count'] += 1
+            view['total_ms'] += total_ms
+            view['max_ms'] = max(view['max_ms'], total_ms)
+            view['db_ms'] += metrics.db_time * 1000
+            view['queries'] += metrics.query_count
+            view['histogram'][bisect.bisect_left(LATENCY_BUCKETS_MS, total_ms)] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                url_name: {
+                    'count': view['count'],
+                    'mean_ms': round(view['total_ms'] / view['count'], 2),
+                    'max_ms': round(view['max_ms'], 2),
+                    'mean_db_ms': round(view['db_ms'] / view['count'], 2),
+                    'mean_queries': round(view['queries'] / view['count'], 2),
+                    'histogram': dict(zip([f'<={b}ms' for b in LATENCY_BUCKETS_MS] + ['>2500ms'],
+                                          view['histogram'])),
+                }
+                for url_name, view in sorted(self._views.items())
+            }
+
+    def reset(self):
+        with self._lock:
+            self._views.clear()
+
+
+stats = PerformanceStats()
+
+
+class InstrumentedTemplate(Template):
+    def render(self, context=None, request=None):
+        metrics = getattr(_local, 'metrics', None)
+        if metrics is None:
+            return super().render(context, request)
+        start = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            metrics.template_time += time.perf_counter() - start
+
+
+class InstrumentedDjangoTemplates(DjangoTemplates):
+    """DjangoTemplates backend that reports top-level render time to the current request"""
+
+    def from_string(self, template_code):
+        return InstrumentedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        template = super().get_template(template_name)
+        return InstrumentedTemplate(template.template, self)
@@ -0,0 +1,43 @@
+"""
+Creating listings.
+
+create_listing() is the single path from the sell forms to a new bike: it
+validates the submitted fields, checks the category against the registry
+and writes the bike and its images in one transaction.
+"""
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from .models import BikeBuyAndSell, BikeBuyAndSellImage
+from .registry import categories
+
+
+def create_listing(user, data, images):
+    """
+    Create a Pending listing from POST-like data (name, price, description,
+    category) and a list of uploaded images. Raises ValidationError with a
+    message for the user.
+    """
+    name = data.get('name')
+    price = data.get('price')
+    description = data.get('description')
+    category_id = data.get('category')
+    if not (name and price and description and category_id):
+        raise ValidationError("All fields are required.")
+    category = categories().get(category_id)
+    if category is None:
+        raise ValidationError("Invalid category selected.")
+    try:
+        price = int(price)
+    except (TypeError, ValueError):
+        raise ValidationError("Enter the price as a whole number.")
+    if not images:
+        raise ValidationError("At least one image is required.")
+
+    with transaction.atomic():
+        bike = BikeBuyAndSell.objects.create(
+            name=name, price=price, description=description, category=category, user=user,
+        )
+        for image in images:
+            BikeBuyAndSellImage.objects.create(bike_buy_and_sell=bike, image=image)
+    return bike
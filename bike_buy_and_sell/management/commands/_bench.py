@@ -0,0 +1,55 @@
+"""Helpers shared by the bench_* management commands."""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from django.conf import settings
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(latencies, elapsed):
+    """Throughput and latency percentiles (in ms) for a list of seconds"""
+    return {
+        'requests': len(latencies),
+        'throughput': round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+    }
+
+
+def body(response):
+    """The full response body, reading streamed responses to the end"""
+    if response.streaming:
+        return b''.join(response.streaming_content)
+    return response.content
+
+
+def run_in_scratch_db(command, args=(), env=None):
+    """
+    Run a management command in a child process against a throwaway SQLite file.
+
+    Settings are read once per process, so comparing database profiles needs a
+    fresh interpreter for each one. The child must print one JSON object as the
+    last line of its output.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        child_env = dict(os.environ)
+        child_env.update(env or {})
+        child_env['DJANGO_DB_NAME'] = os.path.join(tmp, 'bench.sqlite3')
+        result = subprocess.run(
+            [sys.executable, '-m', 'django', command, *args],
+            cwd=settings.BASE_DIR, env=child_env, capture_output=True, text=True,
+        )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip() or result.stdout.strip())
+    return json.loads(result.stdout.strip().splitlines()[-1])
@@ -0,0 +1,23 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from bike_buy_and_sell.archive import (
+    ARCHIVE_BATCH_SIZE, CHAT_ARCHIVE_DAYS, ORDER_ARCHIVE_MONTHS, archive_chat_threads, archive_orders, months_ago,
+)
+
+
+class Command(BaseCommand):
+    help = ("Move delivered orders and resolved or closed chat threads past their age limit into the "
+            "archive tables, one transaction per batch. Run it nightly (cron).")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--order-months', type=int, default=ORDER_ARCHIVE_MONTHS)
+        parser.add_argument('--chat-days', type=int, default=CHAT_ARCHIVE_DAYS)
+        parser.add_argument('--batch-size', type=int, default=ARCHIVE_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        orders = archive_orders(months_ago(options['order_months']), options['batch_size'])
+        messages = archive_chat_threads(timezone.now() - timedelta(days=options['chat_days']), options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Archived {orders} orders and {messages} chat messages"))
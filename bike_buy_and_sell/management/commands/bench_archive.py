@@ -0,0 +1,98 @@
+import json
+import statistics
+import time
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import setup_test_environment
+from django.urls import reverse
+from django.utils import timezone
+
+from bike_buy_and_sell.archive import archive_chat_threads, archive_orders, months_ago
+from bike_buy_and_sell.models import ChatMessage, OrderItem, Orders
+from bike_buy_and_sell.seed import seed
+from ._bench import run_in_scratch_db
+
+HOT_TABLES = {'orders': Orders, 'order_items': OrderItem, 'chat_messages': ChatMessage}
+
+
+class Command(BaseCommand):
+    help = ("Hot table size and page latency of the order history, chat and admin dashboard on a seeded "
+            "data set with two years of orders and a year of chat, before and after archive_records.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, default=300000)
+        parser.add_argument('--chat-threads', type=int, default=100000)
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--requests', type=int, default=10, help='Requests per page')
+        parser.add_argument('--worker', action='store_true', help='Internal: run the workload in this process')
+
+    def handle(self, *args, **options):
+        args = ['--orders', str(options['orders']), '--chat-threads', str(options['chat_threads']),
+                '--users', str(options['users']), '--requests', str(options['requests'])]
+        if options['worker']:
+            self.stdout.write(json.dumps(self.run_workload(
+                options['orders'], options['chat_threads'], options['users'], options['requests'])))
+            return
+        self.stdout.write(json.dumps(run_in_scratch_db('bench_archive', ['--worker', *args]), indent=2))
+
+    def run_workload(self, orders, chat_threads, users, requests):
+        call_command('migrate', verbosity=0, interactive=False)
+        setup_test_environment()
+        seed(users=users, listings=5000, orders=orders, chat_threads=chat_threads)
+        with connection.cursor() as cursor:
+            # Oldest ids first: orders over the last two years, chat threads over the last year
+            cursor.execute(
+                "UPDATE bike_buy_and_sell_orders SET created_at = datetime('now', '-' || "
+                "(((SELECT MAX(id) FROM bike_buy_and_sell_orders) - id) * 730 / %s) || ' days')", [orders])
+            cursor.execute(
+                "UPDATE bike_buy_and_sell_chatmessage SET timestamp = datetime('now', '-' || "
+                "(((SELECT MAX(id) FROM bike_buy_and_sell_chatmessage) - COALESCE(parent_id, id)) * 365 / %s) "
+                "|| ' days')", [chat_threads * 3])
+            cursor.execute('ANALYZE')
+
+        buyer_id = Orders.objects.values('user').annotate(n=Count('id')).order_by('-n')[0]['user']
+        buyer, staff = Client(), Client()
+        buyer.force_login(User.objects.get(pk=buyer_id))
+        staff.force_login(User.objects.create_superuser('bench-staff', 'staff@example.com', 'pass12345'))
+        pages = {
+            'order_history': (buyer, reverse('bike_buy_and_sell:booking_list')),
+            'chat': (buyer, reverse('bike_buy_and_sell:chat_support')),
+            'admin_dashboard': (staff, reverse('admin:admin_dashboard')),
+        }
+
+        def measure():
+            with connection.cursor() as cursor:
+                # Pages the table holds, and the bytes still used in them: deleted rows leave free
+                # space inside pages until VACUUM
+                cursor.execute('SELECT name, SUM(pgsize), SUM(pgsize - unused) FROM dbstat GROUP BY name')
+                sizes = {name: (allocated, used) for name, allocated, used in cursor.fetchall()}
+            tables = {}
+            for name, model in HOT_TABLES.items():
+                allocated, used = sizes[model._meta.db_table]
+                tables[name] = {'rows': model.objects.count(), 'mb': round(allocated / 2 ** 20, 1),
+                                'used_mb': round(used / 2 ** 20, 1)}
+            latency = {}
+            for name, (client, url) in pages.items():
+                times = []
+                for _ in range(requests):
+                    start = time.perf_counter()
+                    assert client.get(url).status_code == 200
+                    times.append(time.perf_counter() - start)
+                latency[name] = {'median_ms': round(statistics.median(times) * 1000, 1)}
+            return {'hot_tables': tables, 'pages': latency}
+
+        results = {'orders': orders, 'chat_threads': chat_threads, 'before': measure()}
+        start = time.perf_counter()
+        moved_orders = archive_orders(months_ago(6))
+        moved_messages = archive_chat_threads(timezone.now() - timedelta(days=90))
+        results['archive'] = {'orders': moved_orders, 'chat_messages': moved_messages,
+                              'seconds': round(time.perf_counter() - start, 1)}
+        connection.cursor().execute('ANALYZE')
+        results['after'] = measure()
+        return results
@@ -0,0 +1,104 @@
+import json
+import os
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+from django.test import Client, override_settings
+from django.test.utils import setup_test_environment
+
+from bike_buy_and_sell.models import BikeBuyAndSell, Category
+from ._bench import run_in_scratch_db, summarize
+
+
+class Command(BaseCommand):
+    help = ("Thundering-herd benchmark: many concurrent requests to index right after "
+            "'index_bikes' expires, with a plain per-process cache and with the two-tier cache.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=200)
+        parser.add_argument('--bikes', type=int, default=2000)
+        parser.add_argument('--worker', action='store_true', help='Internal: run the workload in this process')
+
+    def handle(self, *args, **options):
+        if options['worker']:
+            self.stdout.write(json.dumps(self.run_workload(options['concurrency'], options['bikes'])))
+            return
+        result = run_in_scratch_db(
+            'bench_cache_stampede',
+            ['--worker', '--concurrency', str(options['concurrency']), '--bikes', str(options['bikes'])],
+            env={'DJANGO_DB_PROFILE': 'production'},
+        )
+        self.stdout.write(json.dumps(result, indent=2))
+
+    def run_workload(self, concurrency, bikes):
+        call_command('migrate', verbosity=0, interactive=False)
+        setup_test_environment()
+        user = User.objects.create(username='bench-seller')
+        category = Category.objects.create(name='Benchmark')
+        BikeBuyAndSell.objects.bulk_create(
+            BikeBuyAndSell(name=f'Bike {i}', price=1000 + i, description='Benchmark bike',
+                           category=category, user=user, status='Approved')
+            for i in range(bikes)
+        )
+        connection.close()
+
+        with tempfile.TemporaryDirectory() as tmp:
+            two_tier = dict(settings.CACHES)
+            two_tier['shared'] = {
+                'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+                'LOCATION': os.path.join(tmp, 'cache'),
+            }
+            configurations = {
+                'locmem': {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+                'two_tier': two_tier,
+            }
+            results = {}
+            for name, caches in configurations.items():
+                with override_settings(CACHES=caches):
+                    results[name] = self.herd(concurrency)
+        return results
+
+    def herd(self, concurrency):
+        Client().get('/')  # warm the cache, then expire the key everyone is about to read
+        cache.delete('index_bikes')
+
+        latencies = []
+        recomputes = []
+        barrier = threading.Barrier(concurrency)
+        lock = threading.Lock()
+
+        def count_index_queries(execute, sql, params, many, context):
+            if 'bike_buy_and_sell_bikebuyandsell' in sql and 'LIMIT 12' in sql:
+                with lock:
+                    recomputes.append(1)
+            return execute(sql, params, many, context)
+
+        def visitor():
+            client = Client()
+            barrier.wait()
+            with connection.execute_wrapper(count_index_queries):
+                start = time.perf_counter()
+                client.get('/')
+                elapsed = time.perf_counter() - start
+            connections.close_all()
+            with lock:
+                latencies.append(elapsed)
+
+        pool = [threading.Thread(target=visitor) for _ in range(concurrency)]
+        started = time.perf_counter()
+        for thread in pool:
+            thread.start()
+        for thread in pool:
+            thread.join()
+        result = summarize(latencies, time.perf_counter() - started)
+        result['recomputations'] = len(recomputes)
+        if hasattr(cache, 'stats'):
+            result['cache_stats'] = cache.stats()
+        return result
@@ -0,0 +1,78 @@
+import json
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.test import Client, override_settings
+from django.test.utils import setup_test_environment
+from django.urls import reverse
+
+from bike_buy_and_sell import compression
+from bike_buy_and_sell.models import BikeBuyAndSell, BikeBuyAndSellImage, Category
+from ._bench import run_in_scratch_db
+
+
+class Command(BaseCommand):
+    help = ("Time to first byte, total time and transfer size of a category page with --bikes cards, "
+            "buffered versus streamed, with and without compression, as a logged-in user.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bikes', type=int, default=500)
+        parser.add_argument('--requests', type=int, default=10, help='Requests per mode')
+        parser.add_argument('--worker', action='store_true', help='Internal: run the workload in this process')
+
+    def handle(self, *args, **options):
+        if options['worker']:
+            self.stdout.write(json.dumps(self.run_workload(options['bikes'], options['requests'])))
+            return
+        result = run_in_scratch_db(
+            'bench_compression', ['--worker', '--bikes', str(options['bikes']), '--requests', str(options['requests'])],
+        )
+        self.stdout.write(json.dumps(result, indent=2))
+
+    def run_workload(self, bikes, requests):
+        call_command('migrate', verbosity=0, interactive=False)
+        setup_test_environment()
+        user = User.objects.create(username='bench-user')
+        category = Category.objects.create(name='Benchmark')
+        created = BikeBuyAndSell.objects.bulk_create(
+            BikeBuyAndSell(name=f'Bike {i}', price=1000 + i, description='Benchmark bike',
+                           category=category, user=user, status='Approved')
+            for i in range(bikes)
+        )
+        BikeBuyAndSellImage.objects.bulk_create(
+            BikeBuyAndSellImage(bike_buy_and_sell=bike, image=f'bike_buy_and_sell_images/bench/{bike.id}.jpg')
+            for bike in created
+        )
+        url = reverse('bike_buy_and_sell:category_based_bike', args=[category.id])
+        client = Client()
+        client.force_login(user)
+        encodings = ['identity', 'gzip'] + (['br'] if compression.brotli else [])
+
+        results = {}
+        for streaming in (False, True):
+            for encoding in encodings:
+                ttfb, total, size = [], [], 0
+                with override_settings(STREAMING_RENDER=streaming):
+                    for _ in range(requests):
+                        start = time.perf_counter()
+                        response = client.get(url, HTTP_ACCEPT_ENCODING=encoding)
+                        if response.streaming:
+                            size = 0
+                            for chunk in response.streaming_content:
+                                if chunk and not size:
+                                    ttfb.append(time.perf_counter() - start)
+                                size += len(chunk)
+                        else:
+                            ttfb.append(time.perf_counter() - start)
+                            size = len(response.content)
+                        total.append(time.perf_counter() - start)
+                        assert response.get('Content-Encoding', 'identity') == encoding, response.get('Content-Encoding')
+                results[f"{'streamed' if streaming else 'buffered'}_{encoding}"] = {
+                    'ttfb_ms': round(statistics.median(ttfb) * 1000, 2),
+                    'total_ms': round(statistics.median(total) * 1000, 2),
+                    'bytes': size,
+                }
+        return results
@@ -0,0 +1,86 @@
+import json
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import setup_test_environment
+from django.urls import reverse
+
+from bike_buy_and_sell.models import BikeBuyAndSell, BikeBuyAndSellImage, Category, ChatMessage
+from ._bench import body, run_in_scratch_db
+
+
+class Command(BaseCommand):
+    help = ("Time and queries of a full render versus a 304 revalidation for the pages "
+            "with conditional GET support, as a logged-in user.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bikes', type=int, default=100)
+        parser.add_argument('--requests', type=int, default=50, help='Requests per page and mode')
+        parser.add_argument('--worker', action='store_true', help='Internal: run the workload in this process')
+
+    def handle(self, *args, **options):
+        if options['worker']:
+            self.stdout.write(json.dumps(self.run_workload(options['bikes'], options['requests'])))
+            return
+        result = run_in_scratch_db(
+            'bench_conditional_get',
+            ['--worker', '--bikes', str(options['bikes']), '--requests', str(options['requests'])],
+        )
+        self.stdout.write(json.dumps(result, indent=2))
+
+    def run_workload(self, bikes, requests):
+        call_command('migrate', verbosity=0, interactive=False)
+        setup_test_environment()
+        user = User.objects.create(username='bench-user')
+        category = Category.objects.create(name='Benchmark')
+        created = BikeBuyAndSell.objects.bulk_create(
+            BikeBuyAndSell(name=f'Bike {i}', price=1000 + i, description='Benchmark bike',
+                           category=category, user=user, status='Approved')
+            for i in range(bikes)
+        )
+        BikeBuyAndSellImage.objects.bulk_create(
+            BikeBuyAndSellImage(bike_buy_and_sell=bike, image=f'bike_buy_and_sell_images/bench/{bike.id}.jpg')
+            for bike in created
+        )
+        ChatMessage.objects.bulk_create(ChatMessage(user=user, message=f'Message {i}') for i in range(50))
+        pages = {
+            'index': reverse('bike_buy_and_sell:bike_index'),
+            'buy_list': reverse('bike_buy_and_sell:buy_list') + '?page=2',
+            'category_based_bike': reverse('bike_buy_and_sell:category_based_bike', args=[category.id]),
+            'product_detail': reverse('bike_buy_and_sell:product_detail', args=[created[0].id]),
+            'chat_support_popup': reverse('bike_buy_and_sell:chat_support_popup'),
+        }
+        client = Client()
+        client.force_login(user)
+        queries = []
+
+        def counter(execute, sql, params, many, context):
+            queries.append(1)
+            return execute(sql, params, many, context)
+
+        results = {}
+        with connection.execute_wrapper(counter):
+            for name, url in pages.items():
+                client.get(url)  # sets the CSRF cookie, which is part of the ETag
+                etag = client.get(url)['ETag']
+                row = {}
+                for mode, headers in (('full', {}), ('revalidated', {'HTTP_IF_NONE_MATCH': etag})):
+                    times = []
+                    queries.clear()
+                    for _ in range(requests):
+                        start = time.perf_counter()
+                        response = client.get(url, **headers)
+                        content = body(response)
+                        times.append(time.perf_counter() - start)
+                    assert response.status_code == (304 if headers else 200), (name, response.status_code)
+                    row[f'{mode}_ms'] = round(statistics.mean(times) * 1000, 3)
+                    row[f'{mode}_queries'] = round(len(queries) / requests, 2)
+                    row[f'{mode}_bytes'] = len(content)
+                row['saved_ms'] = round(row['full_ms'] - row['revalidated_ms'], 3)
+                results[name] = row
+        return results
@@ -0,0 +1,69 @@
+import json
+import random
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from bike_buy_and_sell.accounts import users_with_email
+from ._bench import run_in_scratch_db
+
+
+class Command(BaseCommand):
+    help = ("Latency of the registration email check with --users accounts: the old case-sensitive "
+            "email= filter, email__iexact and the LOWER(email) index lookup.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=5000000)
+        parser.add_argument('--lookups', type=int, default=20, help='Lookups per query shape')
+        parser.add_argument('--batch-size', type=int, default=50000)
+        parser.add_argument('--worker', action='store_true', help='Internal: run the workload in this process')
+
+    def handle(self, *args, **options):
+        args = ['--users', str(options['users']), '--lookups', str(options['lookups']),
+                '--batch-size', str(options['batch_size'])]
+        if options['worker']:
+            self.stdout.write(json.dumps(self.run_workload(options['users'], options['lookups'], options['batch_size'])))
+            return
+        self.stdout.write(json.dumps(run_in_scratch_db('bench_email_lookup', ['--worker', *args]), indent=2))
+
+    def run_workload(self, users, lookups, batch_size):
+        call_command('migrate', verbosity=0, interactive=False)
+        started = time.perf_counter()
+        joined = timezone.now()
+        sql = ('INSERT INTO auth_user (password, is_superuser, username, first_name, last_name, email, '
+               'is_staff, is_active, date_joined) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)')
+        for start in range(0, users, batch_size):
+            rows = [('!', False, f'user{i}', '', '', f'User{i}@Example.com', False, True, joined)
+                    for i in range(start, min(users, start + batch_size))]
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.executemany(sql, rows)
+        seeded = time.perf_counter() - started
+
+        rng = random.Random(1)
+        # Half existing addresses typed in another case, half new ones
+        emails = [f'user{rng.randrange(users)}@example.com' if n % 2 else f'new{n}@example.com'
+                  for n in range(lookups)]
+        shapes = {
+            'email_exact': lambda email: User.objects.filter(email=email),
+            'email_iexact': lambda email: User.objects.filter(email__iexact=email),
+            'lower_index': users_with_email,
+        }
+        results = {'users': users, 'seed_seconds': round(seeded, 1)}
+        for name, queryset in shapes.items():
+            times, found = [], 0
+            for email in emails:
+                start = time.perf_counter()
+                found += queryset(email).exists()
+                times.append(time.perf_counter() - start)
+            results[name] = {
+                'median_ms': round(statistics.median(times) * 1000, 3),
+                'max_ms': round(max(times) * 1000, 3),
+                'found': found,
+                'plan': queryset(emails[0]).explain(),
+            }
+        return results
@@ -0,0 +1,83 @@
+import json
+import random
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import setup_test_environment
+
+from bike_buy_and_sell import facets
+from bike_buy_and_sell.models import BikeBuyAndSell, Category
+from ._bench import run_in_scratch_db
+
+
+class Command(BaseCommand):
+    help = ("Time and queries of the buy_list facets (category and price bucket counts) over "
+            "--listings approved bikes: from the facet table, from a grouped query, cold and cached.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--listings', type=int, default=1000000)
+        parser.add_argument('--requests', type=int, default=5, help='Runs per case')
+        parser.add_argument('--worker', action='store_true', help='Internal: run the workload in this process')
+
+    def handle(self, *args, **options):
+        args = ['--listings', str(options['listings']), '--requests', str(options['requests'])]
+        if options['worker']:
+            self.stdout.write(json.dumps(self.run_workload(options['listings'], options['requests'])))
+            return
+        self.stdout.write(json.dumps(run_in_scratch_db('bench_facets', ['--worker', *args]), indent=2))
+
+    def run_workload(self, listings, requests):
+        call_command('migrate', verbosity=0, interactive=False)
+        setup_test_environment()
+        rng = random.Random(46)
+        seller = User.objects.create(username='bench-seller')
+        categories = Category.objects.bulk_create(Category(name=f'Brand {i}') for i in range(20))
+        BikeBuyAndSell.objects.bulk_create(
+            (BikeBuyAndSell(name=f'Bike {i}', price=rng.randrange(20000, 800000, 500), description='Benchmark bike',
+                            category=rng.choice(categories), user=seller, status='Approved')
+             for i in range(listings)),
+            batch_size=5000,
+        )
+        connection.cursor().execute('ANALYZE')
+        factory = RequestFactory()
+        category = categories[0].pk
+        filters = {
+            'none': {},
+            'category': {'category': category},
+            'bucket': {'category': category, 'min_price': 100000, 'max_price': 199999},
+            'off_bucket_range': {'min_price': 123000, 'max_price': 345000},
+        }
+        queries = []
+
+        def counter(execute, sql, params, many, context):
+            queries.append(1)
+            return execute(sql, params, many, context)
+
+        def timed(function, clear):
+            times = []
+            queries.clear()
+            for _ in range(requests):
+                if clear:
+                    cache.clear()
+                start = time.perf_counter()
+                function()
+                times.append(time.perf_counter() - start)
+            return {'median_ms': round(statistics.median(times) * 1000, 2), 'queries': len(queries) // requests}
+
+        results = {'listings': listings}
+        with connection.execute_wrapper(counter):
+            for name, params in filters.items():
+                request = factory.get('/buy_list/', params)
+                results[name] = {
+                    'cold': timed(lambda: facets.browse_facets(request), clear=True),
+                    'cached': timed(lambda: facets.browse_facets(request), clear=False),
+                }
+            # The same grid with one grouped query over the bike table (the non-SQLite path)
+            results['grid_by_grouped_query'] = timed(facets.count_grid, clear=False)
+        return results
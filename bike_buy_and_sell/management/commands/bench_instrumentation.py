@@ -0,0 +1,65 @@
+import json
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.test import Client, override_settings
+from django.test.utils import setup_test_environment
+from django.urls import reverse
+
+from bike_buy_and_sell.models import BikeBuyAndSell, Category
+from ._bench import run_in_scratch_db, summarize
+
+MIDDLEWARE_PATH = 'bike_buy_and_sell.middleware.PerformanceMiddleware'
+
+
+class Command(BaseCommand):
+    help = "Overhead of PerformanceMiddleware: removed, sampling off and sampling every request."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument('--worker', action='store_true', help='Internal: run the workload in this process')
+
+    def handle(self, *args, **options):
+        if options['worker']:
+            self.stdout.write(json.dumps(self.run_workload(options['requests'])))
+            return
+        result = run_in_scratch_db('bench_instrumentation', ['--worker', '--requests', str(options['requests'])])
+        self.stdout.write(json.dumps(result, indent=2))
+
+    def run_workload(self, requests):
+        call_command('migrate', verbosity=0, interactive=False)
+        setup_test_environment()
+        user = User.objects.create(username='bench-seller')
+        category = Category.objects.create(name='Benchmark')
+        BikeBuyAndSell.objects.bulk_create(
+            BikeBuyAndSell(name=f'Bike {i}', price=1000 + i, description='Benchmark bike',
+                           category=category, user=user, status='Approved')
+            for i in range(100)
+        )
+        without = [m for m in settings.MIDDLEWARE if m != MIDDLEWARE_PATH]
+        configurations = {
+            'no_middleware': {'MIDDLEWARE': without},
+            'sampling_off': {'PERFORMANCE_SAMPLE_RATE': 0.0},
+            'sampling_all': {'PERFORMANCE_SAMPLE_RATE': 1.0},
+        }
+        url = reverse('bike_buy_and_sell:buy_list')
+        results = {}
+        # Two rounds so the first configuration does not pay for warming up
+        for _ in range(2):
+            for name, overrides in configurations.items():
+                with override_settings(**overrides):
+                    client = Client()
+                    latencies = []
+                    started = time.perf_counter()
+                    for _ in range(requests):
+                        start = time.perf_counter()
+                        client.get(url)
+                        latencies.append(time.perf_counter() - start)
+                    results[name] = summarize(latencies, time.perf_counter() - started)
+        baseline = results['no_middleware']['p50_ms']
+        for result in results.values():
+            result['p50_overhead_pct'] = round((result['p50_ms'] - baseline) / baseline * 100, 2)
+        return results
@@ -0,0 +1,110 @@
+import json
+import statistics
+import time
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import setup_test_environment
+from django.urls import reverse
+
+from bike_buy_and_sell import catalog
+from bike_buy_and_sell.models import BikeBuyAndSell, BikeBuyAndSellImage, Category
+from ._bench import body, run_in_scratch_db
+
+
+class Command(BaseCommand):
+    help = ("Time and queries of the admin moderation queue with --pending listings waiting, "
+            "and of approving a page of them as one batch versus row by row.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pending', type=int, default=100000)
+        parser.add_argument('--requests', type=int, default=5, help='Requests per page')
+        parser.add_argument('--worker', action='store_true', help='Internal: run the workload in this process')
+
+    def handle(self, *args, **options):
+        args = ['--pending', str(options['pending']), '--requests', str(options['requests'])]
+        if options['worker']:
+            self.stdout.write(json.dumps(self.run_workload(options['pending'], options['requests'])))
+            return
+        self.stdout.write(json.dumps(run_in_scratch_db('bench_moderation_queue', ['--worker', *args]), indent=2))
+
+    def run_workload(self, pending, requests):
+        call_command('migrate', verbosity=0, interactive=False)
+        setup_test_environment()
+        staff = User.objects.create(username='bench-staff', is_staff=True, is_superuser=True)
+        sellers = User.objects.bulk_create(User(username=f'bench-seller-{i}') for i in range(100))
+        category = Category.objects.create(name='Benchmark')
+        # As many approved listings as pending ones, interleaved
+        created = BikeBuyAndSell.objects.bulk_create(
+            (BikeBuyAndSell(name=f'Bike {i}', price=1000 + i, description='Benchmark bike', category=category,
+                            user=sellers[i % len(sellers)], status='Pending' if i % 2 else 'Approved')
+             for i in range(pending * 2)),
+            batch_size=5000,
+        )
+        BikeBuyAndSellImage.objects.bulk_create(
+            (BikeBuyAndSellImage(bike_buy_and_sell=bike, image=f'bike_buy_and_sell_images/bench/{bike.id}.jpg')
+             for bike in created),
+            batch_size=5000,
+        )
+        middle = created[pending].id
+        client = Client()
+        client.force_login(staff)
+        url = reverse('admin:moderation_queue')
+        pages = {
+            'queue_first': url,
+            'queue_deep': f'{url}?after={middle}',
+            'changelist_pending': reverse('admin:bike_buy_and_sell_bikebuyandsell_changelist') + '?status__exact=Pending',
+        }
+        queries = []
+
+        def counter(execute, sql, params, many, context):
+            queries.append(1)
+            return execute(sql, params, many, context)
+
+        results = {'pending': pending}
+        with connection.execute_wrapper(counter):
+            for name, page in pages.items():
+                times = []
+                queries.clear()
+                for _ in range(requests):
+                    start = time.perf_counter()
+                    content = body(client.get(page))
+                    times.append(time.perf_counter() - start)
+                results[name] = {
+                    'median_ms': round(statistics.median(times) * 1000, 1),
+                    'queries': len(queries) // requests,
+                    'bytes': len(content),
+                }
+
+            with mock.patch.object(catalog, 'bump_catalog_version', wraps=catalog.bump_catalog_version) as bumps, \
+                    mock.patch('bike_buy_and_sell.moderation.bump_catalog_version', bumps):
+                batch = [bike.pk for bike in client.get(url).context['listings']]
+                queries.clear()
+                start = time.perf_counter()
+                client.post(url, {'action': 'approve', 'ids': batch})
+                results['approve_batch'] = {
+                    'rows': len(batch),
+                    'ms': round((time.perf_counter() - start) * 1000, 1),
+                    'queries': len(queries),
+                    'version_bumps': bumps.call_count,
+                }
+
+                # What list_editable or a loop of save() calls does with the same page
+                bikes = list(client.get(url).context['listings'])
+                bumps.reset_mock()
+                queries.clear()
+                start = time.perf_counter()
+                for bike in bikes:
+                    bike.status = 'Approved'
+                    bike.save()
+                results['approve_per_row'] = {
+                    'rows': len(bikes),
+                    'ms': round((time.perf_counter() - start) * 1000, 1),
+                    'queries': len(queries),
+                    'version_bumps': bumps.call_count,
+                }
+        return results
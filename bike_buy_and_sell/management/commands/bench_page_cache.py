@@ -0,0 +1,79 @@
+import json
+import random
+import time
+
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import setup_test_environment
+from django.urls import reverse
+
+from bike_buy_and_sell.models import BikeBuyAndSell, BikeBuyAndSellImage, Category
+from ._bench import body, run_in_scratch_db, summarize
+
+
+class Command(BaseCommand):
+    help = ("Anonymous requests per second over index, buy_list, category, product detail, "
+            "about and contact pages with the anonymous page cache off and on.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bikes', type=int, default=500)
+        parser.add_argument('--requests', type=int, default=2000, help='Requests per mode')
+        parser.add_argument('--worker', action='store_true', help='Internal: run the workload in this process')
+
+    def handle(self, *args, **options):
+        if options['worker']:
+            self.stdout.write(json.dumps(self.run_workload(options['bikes'], options['requests'])))
+            return
+        result = run_in_scratch_db(
+            'bench_page_cache', ['--worker', '--bikes', str(options['bikes']), '--requests', str(options['requests'])],
+        )
+        self.stdout.write(json.dumps(result, indent=2))
+
+    def run_workload(self, bikes, requests):
+        call_command('migrate', verbosity=0, interactive=False)
+        setup_test_environment()
+        user = User.objects.create(username='bench-seller')
+        categories = [Category.objects.create(name=f'Category {n}') for n in range(5)]
+        created = BikeBuyAndSell.objects.bulk_create(
+            BikeBuyAndSell(name=f'Bike {i}', price=1000 + i, description='Benchmark bike',
+                           category=categories[i % len(categories)], user=user, status='Approved')
+            for i in range(bikes)
+        )
+        BikeBuyAndSellImage.objects.bulk_create(
+            BikeBuyAndSellImage(bike_buy_and_sell=bike, image=f'bike_buy_and_sell_images/bench/{bike.id}.jpg')
+            for bike in created
+        )
+        # A browsing mix: a few hot pages plus a long tail of listings
+        urls = [reverse('bike_buy_and_sell:bike_index'), reverse('bike_buy_and_sell:about'),
+                reverse('bike_buy_and_sell:contact')]
+        urls += [reverse('bike_buy_and_sell:buy_list') + f'?page={page}' for page in range(1, 6)]
+        urls += [reverse('bike_buy_and_sell:category_based_bike', args=[c.id]) for c in categories]
+        urls += [reverse('bike_buy_and_sell:product_detail', args=[bike.id]) for bike in created[:100]]
+
+        results = {}
+        for mode, timeout in (('off', 0), ('on', 60)):
+            caches['default'].clear()
+            rng = random.Random(1)
+            queries = []
+
+            def counter(execute, sql, params, many, context):
+                queries.append(1)
+                return execute(sql, params, many, context)
+
+            with override_settings(ANONYMOUS_PAGE_CACHE_TIMEOUT=timeout), connection.execute_wrapper(counter):
+                client = Client()
+                latencies = []
+                started = time.perf_counter()
+                for _ in range(requests):
+                    start = time.perf_counter()
+                    response = client.get(rng.choice(urls))
+                    body(response)
+                    latencies.append(time.perf_counter() - start)
+                    assert response.status_code == 200, response.status_code
+                elapsed = time.perf_counter() - started
+            results[mode] = dict(summarize(latencies, elapsed), queries_per_request=round(len(queries) / requests, 2))
+        return results
@@ -0,0 +1,60 @@
+import gzip
+import json
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.test import Client
+from django.test.utils import setup_test_environment
+from django.urls import reverse
+
+from bike_buy_and_sell.models import BikeBuyAndSell, BikeBuyAndSellImage, Category
+from ._bench import body, run_in_scratch_db
+
+
+class Command(BaseCommand):
+    help = "HTML bytes (raw and gzipped) of the main pages, as a logged-in user."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bikes', type=int, default=12)
+        parser.add_argument('--worker', action='store_true', help='Internal: run the workload in this process')
+
+    def handle(self, *args, **options):
+        if options['worker']:
+            self.stdout.write(json.dumps(self.run_workload(options['bikes'])))
+            return
+        result = run_in_scratch_db('bench_page_weight', ['--worker', '--bikes', str(options['bikes'])])
+        self.stdout.write(json.dumps(result, indent=2))
+
+    def run_workload(self, bikes):
+        call_command('migrate', verbosity=0, interactive=False)
+        setup_test_environment()
+        user = User.objects.create(username='bench-user')
+        category = Category.objects.create(name='Benchmark')
+        created = BikeBuyAndSell.objects.bulk_create(
+            BikeBuyAndSell(name=f'Bike {i}', price=1000 + i, description='Benchmark bike',
+                           category=category, user=user, status='Approved')
+            for i in range(bikes)
+        )
+        BikeBuyAndSellImage.objects.bulk_create(
+            BikeBuyAndSellImage(bike_buy_and_sell=bike, image=f'bike_buy_and_sell_images/bench/{bike.id}.jpg')
+            for bike in created
+        )
+        pages = {
+            'index': reverse('bike_buy_and_sell:bike_index'),
+            'buy_list': reverse('bike_buy_and_sell:buy_list'),
+            'product_detail': reverse('bike_buy_and_sell:product_detail', args=[created[0].id]),
+            'about': reverse('bike_buy_and_sell:about'),
+            'contact': reverse('bike_buy_and_sell:contact'),
+            'cart_detail': reverse('bike_buy_and_sell:cart_detail'),
+        }
+        client = Client()
+        client.force_login(user)
+        results = {}
+        for name, url in pages.items():
+            response = client.get(url)
+            assert response.status_code == 200, (name, response.status_code)
+            content = body(response)
+            results[name] = {'bytes': len(content), 'gzip_bytes': len(gzip.compress(content))}
+        results['total'] = {key: sum(row[key] for row in results.values()) for key in ('bytes', 'gzip_bytes')}
+        return results
@@ -0,0 +1,89 @@
+import json
+import random
+import time
+
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import setup_test_environment
+from django.urls import reverse
+
+from bike_buy_and_sell.models import BikeBuyAndSell, BikeBuyAndSellImage, Category
+from ._bench import run_in_scratch_db, summarize
+
+MODES = {
+    'cold': "fragment cache cleared before every request",
+    'warm': "gallery and spec fragments cached",
+    'revalidated': "repeat visitor sending If-None-Match (304)",
+}
+
+
+class Command(BaseCommand):
+    help = ("Requests per second of the product detail page with a cold fragment cache, "
+            "a warm one, and for repeat visitors revalidating with their ETag.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bikes', type=int, default=500)
+        parser.add_argument('--requests', type=int, default=2000, help='Requests per mode')
+        parser.add_argument('--worker', action='store_true', help='Internal: run the workload in this process')
+
+    def handle(self, *args, **options):
+        if options['worker']:
+            self.stdout.write(json.dumps(self.run_workload(options['bikes'], options['requests'])))
+            return
+        result = run_in_scratch_db(
+            'bench_product_detail',
+            ['--worker', '--bikes', str(options['bikes']), '--requests', str(options['requests'])],
+        )
+        self.stdout.write(json.dumps(result, indent=2))
+
+    def run_workload(self, bikes, requests):
+        call_command('migrate', verbosity=0, interactive=False)
+        setup_test_environment()
+        user = User.objects.create(username='bench-seller', first_name='Bench', last_name='Seller')
+        category = Category.objects.create(name='Benchmark')
+        created = BikeBuyAndSell.objects.bulk_create(
+            BikeBuyAndSell(name=f'Bike {i}', price=1000 + i, description='Benchmark bike',
+                           category=category, user=user, status='Approved')
+            for i in range(bikes)
+        )
+        BikeBuyAndSellImage.objects.bulk_create(
+            BikeBuyAndSellImage(bike_buy_and_sell=bike, image=f'bike_buy_and_sell_images/bench/{bike.id}_{k}.jpg')
+            for bike in created for k in range(3)
+        )
+        urls = [reverse('bike_buy_and_sell:product_detail', args=[bike.id]) for bike in created]
+
+        results = {}
+        for mode, description in MODES.items():
+            caches['default'].clear()
+            client = Client()
+            etags = {}
+            if mode != 'cold':
+                for url in urls:
+                    etags[url] = client.get(url)['ETag']
+            rng = random.Random(1)
+            queries = []
+
+            def counter(execute, sql, params, many, context):
+                queries.append(1)
+                return execute(sql, params, many, context)
+
+            latencies = []
+            with connection.execute_wrapper(counter):
+                started = time.perf_counter()
+                for _ in range(requests):
+                    url = rng.choice(urls)
+                    if mode == 'cold':
+                        caches['default'].clear()
+                    headers = {'HTTP_IF_NONE_MATCH': etags[url]} if mode == 'revalidated' else {}
+                    start = time.perf_counter()
+                    response = client.get(url, **headers)
+                    latencies.append(time.perf_counter() - start)
+                    assert response.status_code == (304 if mode == 'revalidated' else 200), response.status_code
+                elapsed = time.perf_counter() - started
+            results[mode] = dict(summarize(latencies, elapsed), description=description,
+                                 queries_per_request=round(len(queries) / requests, 2))
+        return results
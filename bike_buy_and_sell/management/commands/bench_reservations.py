@@ -0,0 +1,96 @@
+import json
+import threading
+import time
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from bike_buy_and_sell.models import BikeBuyAndSell, Category
+from bike_buy_and_sell.reservations import reserve, sell
+from ._bench import percentile, run_in_scratch_db
+
+
+class Command(BaseCommand):
+    help = ("--threads buyers race to check out the same bike, --rounds times, with the conditional UPDATEs "
+            "of reservations.py and with a read-then-save check. Runs on a scratch database in the production "
+            "SQLite profile.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=50)
+        parser.add_argument('--rounds', type=int, default=20)
+        parser.add_argument('--worker', action='store_true', help='Internal: run the workload in this process')
+
+    def handle(self, *args, **options):
+        args = ['--threads', str(options['threads']), '--rounds', str(options['rounds'])]
+        if options['worker']:
+            self.stdout.write(json.dumps(self.run_workload(options['threads'], options['rounds'])))
+            return
+        results = run_in_scratch_db('bench_reservations', ['--worker', *args], env={'DJANGO_DB_PROFILE': 'production'})
+        self.stdout.write(json.dumps(results, indent=2))
+
+    def run_workload(self, threads, rounds):
+        call_command('migrate', verbosity=0, interactive=False)
+        seller = User.objects.create(username='bench-seller')
+        buyers = User.objects.bulk_create(User(username=f'buyer{n}') for n in range(threads))
+        category = Category.objects.create(name='Bench')
+        connection.close()
+
+        def race(checkout):
+            """Winners per round, errors, and how long each attempt took"""
+            winners, errors, latencies = [], [], []
+            for _ in range(rounds):
+                bike = BikeBuyAndSell.objects.create(name='Contested', price=100000, description='-',
+                                                     category=category, user=seller, status='Approved')
+                connection.close()
+                barrier = threading.Barrier(threads)
+                won = []
+
+                def buyer(user):
+                    try:
+                        barrier.wait()
+                        start = time.perf_counter()
+                        if checkout(user, bike.pk):
+                            won.append(user.pk)
+                        latencies.append(time.perf_counter() - start)
+                    except Exception as error:  # a lost race must never surface as an error
+                        errors.append(repr(error))
+                    finally:
+                        connection.close()
+
+                workers = [threading.Thread(target=buyer, args=(user,)) for user in buyers]
+                for worker in workers:
+                    worker.start()
+                for worker in workers:
+                    worker.join()
+                winners.append(len(won))
+                if won and BikeBuyAndSell.objects.get(pk=bike.pk).reserved_by_id not in won:
+                    errors.append(f'bike {bike.pk} recorded a buyer that lost')
+            return {'winners_per_round': winners, 'errors': errors,
+                    'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+                    'p95_ms': round(percentile(latencies, 95) * 1000, 2)}
+
+        return {
+            'threads': threads,
+            'rounds': rounds,
+            'conditional_update': race(self.conditional_checkout),
+            'read_then_save': race(self.naive_checkout),
+        }
+
+    def conditional_checkout(self, user, pk):
+        # What checkout does: hold the bike with the Checkout button, then sell it with the order
+        if not reserve(user, [pk]):
+            return False
+        with transaction.atomic():
+            return sell(user, [pk]) == 1
+
+    def naive_checkout(self, user, pk):
+        # Read the status, then write: every buyer that reads before the first write wins
+        bike = BikeBuyAndSell.objects.get(pk=pk)
+        if bike.status != 'Approved':
+            return False
+        time.sleep(0.001)  # rendering the checkout page, validating the form
+        bike.status, bike.reserved_by = 'Sold', user
+        bike.save()
+        return True
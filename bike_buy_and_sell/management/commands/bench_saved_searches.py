@@ -0,0 +1,114 @@
+import json
+import random
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Q
+
+from bike_buy_and_sell.models import BikeBuyAndSell, Category, ListingApproval, SavedSearch
+from bike_buy_and_sell.saved_searches import SearchIndex, match_approvals, name_prefixes, search_terms
+from ._bench import run_in_scratch_db
+
+MAKERS = ['Yamaha', 'Suzuki', 'Honda', 'Bajaj', 'TVS', 'Hero', 'Royal Enfield', 'KTM', 'Lifan', 'Runner']
+MODELS = ['R15', 'Gixxer', 'CBR', 'Pulsar', 'Apache', 'Splendor', 'Classic', 'Duke', 'KPR', 'Knight Rider',
+          'FZ', 'Hornet', 'Discover', 'Glamour', 'Bullet', 'RC', 'Xpulse', 'Shine', 'Platina', 'Raider']
+
+
+class Command(BaseCommand):
+    help = ("Match newly approved bikes against --searches saved searches: the SearchIndex, a Python scan of "
+            "every search, and a reverse SQL query per bike.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--searches', type=int, default=1000000)
+        parser.add_argument('--listings', type=int, default=200)
+        parser.add_argument('--worker', action='store_true', help='Internal: run the workload in this process')
+
+    def handle(self, *args, **options):
+        args = ['--searches', str(options['searches']), '--listings', str(options['listings'])]
+        if options['worker']:
+            self.stdout.write(json.dumps(self.run_workload(options['searches'], options['listings'])))
+            return
+        self.stdout.write(json.dumps(run_in_scratch_db('bench_saved_searches', ['--worker', *args]), indent=2))
+
+    def run_workload(self, searches, listings):
+        call_command('migrate', verbosity=0, interactive=False)
+        rng = random.Random(48)
+        categories = Category.objects.bulk_create(Category(name=maker) for maker in MAKERS)
+        users = User.objects.bulk_create(User(username=f'buyer{n}') for n in range(1000))
+
+        def saved_search(n):
+            low = rng.randrange(0, 700000, 5000)
+            price = {'min_price': low, 'max_price': low + rng.randrange(10000, 100000, 5000)}
+            kind = rng.random()
+            if kind < 0.6:  # a buy_list filter: brand and price range
+                return SavedSearch(user=users[n % 1000], category=rng.choice(categories), **price)
+            if kind < 0.7:  # price range only
+                return SavedSearch(user=users[n % 1000], **price)
+            query = f'{rng.choice(MAKERS)} {rng.choice(MODELS)}' if kind < 0.9 else rng.choice(MODELS)
+            return SavedSearch(user=users[n % 1000], query=query, **(price if kind < 0.8 else {}))
+
+        SavedSearch.objects.bulk_create((saved_search(n) for n in range(searches)), batch_size=5000)
+        seller = users[0]
+        bikes = BikeBuyAndSell.objects.bulk_create(
+            (BikeBuyAndSell(name=f'{categories[i % 10].name} {rng.choice(MODELS)} {rng.randrange(100, 400)}',
+                            description='-', price=rng.randrange(20000, 800000, 500), category=categories[i % 10],
+                            user=seller, status='Pending')
+             for i in range(listings)),
+            batch_size=5000,
+        )
+        connection.cursor().execute('ANALYZE')
+
+        results = {'searches': searches, 'listings': listings}
+        start = time.perf_counter()
+        index = SearchIndex.build()
+        results['index_build_s'] = round(time.perf_counter() - start, 1)
+
+        def timed(function, sample):
+            times = []
+            for bike in sample:
+                start = time.perf_counter()
+                function(bike)
+                times.append(time.perf_counter() - start)
+            times.sort()
+            return {'median_ms': round(statistics.median(times) * 1000, 3),
+                    'p95_ms': round(times[int(len(times) * 0.95) - 1] * 1000, 3)}
+
+        match = lambda bike: index.match(bike.category_id, bike.name, bike.price)  # noqa: E731
+        results['match_one_index'] = timed(match, bikes)
+        rows = list(SavedSearch.objects.values_list('id', 'category_id', 'query', 'min_price', 'max_price'))
+        results['match_one_python_scan'] = timed(lambda bike: self.scan(rows, bike), bikes[:20])
+        results['match_one_sql'] = timed(self.reverse_query, bikes[:20])
+        agree = all(sorted(match(bike)) == sorted(self.scan(rows, bike)) for bike in bikes[:20])
+        results['index_agrees_with_scan'] = agree
+        results['alerts_per_listing'] = round(statistics.mean(len(match(bike)) for bike in bikes), 1)
+
+        BikeBuyAndSell.objects.filter(pk__in=[bike.pk for bike in bikes]).update(status='Approved')
+        ListingApproval.objects.bulk_create(ListingApproval(bike_buy_and_sell=bike) for bike in bikes)
+        start = time.perf_counter()
+        matched, alerts = match_approvals(index)
+        elapsed = time.perf_counter() - start
+        results['match_approvals'] = {'bikes': matched, 'alerts': alerts, 'seconds': round(elapsed, 2),
+                                      'bikes_per_s': round(matched / elapsed)}
+        return results
+
+    def scan(self, rows, bike):
+        # Every saved search checked in turn: what matching costs without the index
+        prefixes = name_prefixes(bike.name)
+        return [pk for pk, category_id, query, low, high in rows
+                if category_id in (None, bike.category_id)
+                and (low is None or low <= bike.price) and (high is None or bike.price <= high)
+                and all(term in prefixes for term in search_terms(query))]
+
+    def reverse_query(self, bike):
+        # The category and price part in SQL, the words checked on the rows it returns
+        prefixes = name_prefixes(bike.name)
+        rows = SavedSearch.objects.filter(
+            Q(category_id=bike.category_id) | Q(category__isnull=True),
+            Q(min_price__isnull=True) | Q(min_price__lte=bike.price),
+            Q(max_price__isnull=True) | Q(max_price__gte=bike.price),
+        ).values_list('id', 'query')
+        return [pk for pk, query in rows if all(term in prefixes for term in search_terms(query))]
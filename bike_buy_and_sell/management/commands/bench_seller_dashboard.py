@@ -0,0 +1,71 @@
+import json
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import setup_test_environment
+from django.urls import reverse
+
+from bike_buy_and_sell.models import BikeBuyAndSell, BikeBuyAndSellImage, Category
+from ._bench import body, run_in_scratch_db
+
+
+class Command(BaseCommand):
+    help = "Time, queries and bytes of the seller's sell_list page, plain and searched, for a dealer with --listings bikes."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--listings', type=int, default=10000)
+        parser.add_argument('--requests', type=int, default=5, help='Requests per page')
+        parser.add_argument('--worker', action='store_true', help='Internal: run the workload in this process')
+
+    def handle(self, *args, **options):
+        args = ['--listings', str(options['listings']), '--requests', str(options['requests'])]
+        if options['worker']:
+            self.stdout.write(json.dumps(self.run_workload(options['listings'], options['requests'])))
+            return
+        self.stdout.write(json.dumps(run_in_scratch_db('bench_seller_dashboard', ['--worker', *args]), indent=2))
+
+    def run_workload(self, listings, requests):
+        call_command('migrate', verbosity=0, interactive=False)
+        setup_test_environment()
+        dealer = User.objects.create(username='bench-dealer')
+        category = Category.objects.create(name='Benchmark')
+        models = ['Yamaha R15', 'Suzuki Gixxer', 'Honda CBR', 'Bajaj Pulsar', 'TVS Apache']
+        created = BikeBuyAndSell.objects.bulk_create(
+            BikeBuyAndSell(name=f'{models[i % len(models)]} {i}', price=1000 + i, description='Benchmark bike',
+                           category=category, user=dealer, status='Approved' if i % 3 else 'Pending')
+            for i in range(listings)
+        )
+        BikeBuyAndSellImage.objects.bulk_create(
+            BikeBuyAndSellImage(bike_buy_and_sell=bike, image=f'bike_buy_and_sell_images/bench/{bike.id}_{k}.jpg')
+            for bike in created for k in range(2)
+        )
+        client = Client()
+        client.force_login(dealer)
+        url = reverse('bike_buy_and_sell:sell_list')
+        pages = {'all': url, 'search': f'{url}?search=gixxer'}
+        queries = []
+
+        def counter(execute, sql, params, many, context):
+            queries.append(1)
+            return execute(sql, params, many, context)
+
+        results = {'listings': listings}
+        with connection.execute_wrapper(counter):
+            for name, page in pages.items():
+                times = []
+                queries.clear()
+                for _ in range(requests):
+                    start = time.perf_counter()
+                    content = body(client.get(page))
+                    times.append(time.perf_counter() - start)
+                results[name] = {
+                    'median_ms': round(statistics.median(times) * 1000, 1),
+                    'queries': len(queries) // requests,
+                    'bytes': len(content),
+                }
+        return results
@@ -0,0 +1,98 @@
+import json
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import setup_test_environment
+from django.urls import reverse
+
+from bike_buy_and_sell.models import BikeBuyAndSell, Category
+from ._bench import run_in_scratch_db
+
+STRATEGIES = {
+    'db': {'SESSION_ENGINE': 'django.contrib.sessions.backends.db', 'ANONYMOUS_SESSION_ENGINE': None},
+    'cached_db': {'SESSION_ENGINE': 'django.contrib.sessions.backends.cached_db', 'ANONYMOUS_SESSION_ENGINE': None},
+    'hybrid': {
+        'SESSION_ENGINE': 'django.contrib.sessions.backends.cached_db',
+        'ANONYMOUS_SESSION_ENGINE': 'django.contrib.sessions.backends.signed_cookies',
+    },
+}
+
+
+class Command(BaseCommand):
+    help = ("Session overhead per request for the cart flow (add to cart, cart detail, "
+            "login, checkout) under each session strategy.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--journeys', type=int, default=50)
+        parser.add_argument('--worker', action='store_true', help='Internal: run the workload in this process')
+
+    def handle(self, *args, **options):
+        if options['worker']:
+            self.stdout.write(json.dumps(self.run_workload(options['journeys'])))
+            return
+        result = run_in_scratch_db('bench_sessions', ['--worker', '--journeys', str(options['journeys'])])
+        self.stdout.write(json.dumps(result, indent=2))
+
+    def run_workload(self, journeys):
+        call_command('migrate', verbosity=0, interactive=False)
+        setup_test_environment()
+        with override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher']):
+            seller = User.objects.create_user('bench-seller', password='bench-pass')
+            User.objects.create_user('bench-buyer', password='bench-pass')
+        category = Category.objects.create(name='Benchmark')
+        bikes = BikeBuyAndSell.objects.bulk_create(
+            BikeBuyAndSell(name=f'Bike {i}', price=1000 + i, description='Benchmark bike',
+                           category=category, user=seller, status='Approved')
+            for i in range(journeys)
+        )
+
+        results = {}
+        for name, strategy in STRATEGIES.items():
+            caches['shared'].clear()
+            with override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'], **strategy):
+                results[name] = self.cart_flow(bikes)
+        return results
+
+    def cart_flow(self, bikes):
+        steps = {}
+        session_queries = []
+
+        def count_session_queries(execute, sql, params, many, context):
+            if 'django_session' in sql:
+                session_queries.append(sql)
+            return execute(sql, params, many, context)
+
+        def timed(step, method, url, data=None):
+            before = len(session_queries)
+            start = time.perf_counter()
+            response = getattr(client, method)(url, data or {})
+            elapsed = time.perf_counter() - start
+            assert response.status_code < 400, (step, response.status_code)
+            record = steps.setdefault(step, {'times': [], 'session_queries': 0})
+            record['times'].append(elapsed)
+            record['session_queries'] += len(session_queries) - before
+
+        with connection.execute_wrapper(count_session_queries):
+            for bike in bikes:
+                client = Client()
+                timed('add_to_cart_view', 'post', reverse('bike_buy_and_sell:cart_add', args=[bike.id]))
+                timed('cart_detail', 'get', reverse('bike_buy_and_sell:cart_detail'))
+                timed('user_login', 'post', reverse('bike_buy_and_sell:login'),
+                      {'username': 'bench-buyer', 'password': 'bench-pass'})
+                timed('cart_detail (logged in)', 'get', reverse('bike_buy_and_sell:cart_detail'))
+                timed('order_create', 'post', reverse('bike_buy_and_sell:order_create'),
+                      {'email': 'bench@example.com', 'mobile': '0123456789', 'address': 'Dhaka'})
+
+        return {
+            step: {
+                'mean_ms': round(statistics.mean(record['times']) * 1000, 3),
+                'session_queries_per_request': round(record['session_queries'] / len(record['times']), 2),
+            }
+            for step, record in steps.items()
+        }
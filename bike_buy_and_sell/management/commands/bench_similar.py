@@ -0,0 +1,141 @@
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import setup_test_environment
+
+from bike_buy_and_sell import similar
+from bike_buy_and_sell.similar import np
+from bike_buy_and_sell.models import BikeBuyAndSell, Category
+from ._bench import run_in_scratch_db
+
+MAKERS = ['Yamaha', 'Suzuki', 'Honda', 'Bajaj', 'TVS', 'Hero', 'Royal Enfield', 'KTM', 'Lifan', 'Runner']
+MODELS = ['R15', 'Gixxer', 'CBR', 'Pulsar', 'Apache', 'Splendor', 'Classic', 'Duke', 'KPR', 'Knight Rider',
+          'FZ', 'Hornet', 'Discover', 'Glamour', 'Bullet', 'RC', 'Xpulse', 'Shine', 'Platina', 'Raider']
+WORDS = ['racing', 'sport', 'commuter', 'touring', 'fuel', 'injected', 'abs', 'disc', 'brake', 'single', 'owner',
+         'well', 'kept', 'new', 'tyres', 'papers', 'updated', 'mileage', 'cruiser', 'fairing', 'digital', 'meter',
+         'scratch', 'service', 'history', 'original', 'paint', 'low', 'km', 'garage']
+
+
+class Command(BaseCommand):
+    help = ("Top-10 similar bikes latency at --listings approved bikes: the vector index (NumPy), "
+            "the same-category nearest-price fallback, and after --edits bikes changed since the build.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--listings', type=int, default=500000)
+        parser.add_argument('--queries', type=int, default=200)
+        parser.add_argument('--edits', type=int, default=1000)
+        parser.add_argument('--exact-rows', type=int, default=50000,
+                            help='Bikes scored with exact (unhashed) TF-IDF to measure the hashing recall')
+        parser.add_argument('--worker', action='store_true', help='Internal: run the workload in this process')
+
+    def handle(self, *args, **options):
+        if similar.np is None:
+            raise CommandError('NumPy is not installed')
+        args = ['--listings', str(options['listings']), '--queries', str(options['queries']),
+                '--edits', str(options['edits']), '--exact-rows', str(options['exact_rows'])]
+        if options['worker']:
+            self.stdout.write(json.dumps(self.run_workload(options['listings'], options['queries'], options['edits'],
+                                                           options['exact_rows'])))
+            return
+        self.stdout.write(json.dumps(run_in_scratch_db('bench_similar', ['--worker', *args]), indent=2))
+
+    def run_workload(self, listings, queries, edits, exact_rows):
+        call_command('migrate', verbosity=0, interactive=False)
+        setup_test_environment()
+        rng = random.Random(47)
+        seller = User.objects.create(username='bench-seller')
+        categories = Category.objects.bulk_create(Category(name=maker) for maker in MAKERS)
+        BikeBuyAndSell.objects.bulk_create(
+            (BikeBuyAndSell(name=f'{categories[i % 10].name} {rng.choice(MODELS)} {rng.randrange(100, 400)}',
+                            description=' '.join(rng.choices(WORDS, k=12)), price=rng.randrange(20000, 800000, 500),
+                            category=categories[i % 10], user=seller, status='Approved')
+             for i in range(listings)),
+            batch_size=5000,
+        )
+        connection.cursor().execute('ANALYZE')
+        sample = list(BikeBuyAndSell.objects.order_by('?')[:queries])
+
+        def timed(function):
+            times = []
+            for bike in sample:
+                start = time.perf_counter()
+                function(bike)
+                times.append(time.perf_counter() - start)
+            times.sort()
+            return {'median_ms': round(statistics.median(times) * 1000, 2),
+                    'p95_ms': round(times[int(len(times) * 0.95) - 1] * 1000, 2)}
+
+        results = {'listings': listings}
+        with tempfile.TemporaryDirectory() as directory, override_settings(SIMILAR_INDEX_DIR=directory):
+            start = time.perf_counter()
+            similar.build_index()
+            results['build_s'] = round(time.perf_counter() - start, 1)
+            results['index_bytes'] = sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory))
+            index = similar.load_index()
+            index.nearest(sample[0], 10)  # map the matrix in
+            results['top10_vector'] = timed(lambda bike: index.nearest(bike, 10))
+            results['top10_exhaustive'] = timed(lambda bike: self.exhaustive(index, bike, 10))
+            found = sum(len(set(index.nearest(bike, 10)) & set(self.exhaustive(index, bike, 10))) for bike in sample)
+            results['recall_at_10'] = round(found / (10 * len(sample)), 3)
+            results['hashing_recall_at_10'] = self.hashing_recall(index, sample, exact_rows, 10)
+            results['top10_nearest_price'] = timed(lambda bike: similar.nearest_price(bike, 10))
+
+            edited = BikeBuyAndSell.objects.order_by('?')[:edits]
+            for bike in edited:
+                bike.description += ' price negotiable'
+                bike.save()
+            index.nearest(sample[0], 10)  # reads the changes once for this catalog version
+            results[f'top10_vector_after_{edits}_edits'] = timed(lambda bike: index.nearest(bike, 10))
+
+            cache.clear()
+            results['similar_bikes_cold'] = timed(similar.similar_bikes)
+            results['similar_bikes_cached'] = timed(similar.similar_bikes)
+        return results
+
+    def exhaustive(self, index, bike, count):
+        # Every row scored: the exact answer the clustered search approximates
+        own = index.positions([bike.pk])
+        scores = index.vectors @ np.array(index.vectors[own[0]])
+        scores[own] = -np.inf
+        top = np.argpartition(scores, -count)[-count:]
+        return [int(index.ids[i]) for i in top]
+
+    def hashing_recall(self, index, sample, rows, count):
+        """
+        Share of the hashed top count that are in the exact TF-IDF top count
+        (ties included), searching the sample and rows - len(sample) other
+        bikes: what hashing the terms into TEXT_DIMENSIONS costs.
+        """
+        queries = [bike.pk for bike in sample]
+        others = BikeBuyAndSell.objects.exclude(pk__in=queries).order_by('?').values_list('pk', flat=True)
+        ids = queries + list(others[:max(rows - len(queries), 0)])
+        encoder = index.encoder
+        terms = {term: column for column, term in enumerate(encoder.idf)}
+        exact = np.zeros((len(ids), len(terms) + 2), dtype=np.float32)
+        hashed = np.zeros((len(ids), similar.DIMENSIONS), dtype=np.float32)
+        bikes = BikeBuyAndSell.objects.in_bulk(ids)
+        for row, pk in enumerate(ids):
+            fields = [getattr(bikes[pk], field) for field in similar.FIELDS]
+            hashed[row] = encoder.vector(*fields)
+            for term, weight in encoder.weights(*fields[:3]).items():
+                exact[row, terms[term]] = weight
+            exact[row, :-2] *= np.sqrt(1 - similar.PRICE_SHARE) / np.linalg.norm(exact[row, :-2])
+            exact[row, -2:] = encoder.price_components(fields[3])
+        found = 0
+        for row in range(len(queries)):
+            exact_scores, hashed_scores = exact @ exact[row], hashed @ hashed[row]
+            exact_scores[row] = hashed_scores[row] = -np.inf
+            threshold = np.partition(exact_scores, -count)[-count]
+            top = np.argpartition(hashed_scores, -count)[-count:]
+            found += int(np.sum(exact_scores[top] >= threshold - 1e-5))
+        return round(found / (count * len(queries)), 3)
@@ -0,0 +1,108 @@
+import json
+import threading
+import time
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection, connections
+from django.test import Client
+from django.test.utils import setup_test_environment
+from django.urls import reverse
+
+from bike_buy_and_sell.models import BikeBuyAndSell, Category
+from ._bench import run_in_scratch_db, summarize
+
+
+class Command(BaseCommand):
+    help = ("Concurrent write benchmark: many threads checking out orders and posting chat "
+            "messages, run once per database profile against a scratch SQLite file.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=16)
+        parser.add_argument('--iterations', type=int, default=25, help='Checkouts per thread')
+        parser.add_argument('--profiles', nargs='+', default=['development', 'production'])
+        parser.add_argument('--worker', action='store_true', help='Internal: run the workload in this process')
+
+    def handle(self, *args, **options):
+        if options['worker']:
+            self.stdout.write(json.dumps(self.run_workload(options['threads'], options['iterations'])))
+            return
+
+        results = {}
+        for profile in options['profiles']:
+            results[profile] = run_in_scratch_db(
+                'bench_sqlite_writes',
+                ['--worker', '--threads', str(options['threads']), '--iterations', str(options['iterations'])],
+                env={'DJANGO_DB_PROFILE': profile},
+            )
+        self.stdout.write(json.dumps(results, indent=2))
+
+    def run_workload(self, threads, iterations):
+        call_command('migrate', verbosity=0, interactive=False)
+        setup_test_environment()
+
+        category = Category.objects.create(name='Benchmark')
+        workers = []
+        for n in range(threads):
+            user = User.objects.create(username=f'bench-writer-{n}')
+            bikes = BikeBuyAndSell.objects.bulk_create(
+                BikeBuyAndSell(name=f'Bike {n}-{i}', price=1000 + i, description='Benchmark bike',
+                               category=category, user=user, status='Approved')
+                for i in range(iterations)
+            )
+            client = Client()
+            client.force_login(user)
+            workers.append((client, [bike.id for bike in bikes]))
+        connection.close()
+
+        latencies = []
+        lock_errors = []
+        barrier = threading.Barrier(threads)
+        lock = threading.Lock()
+
+        def writer(client, bike_ids):
+            local_latencies, local_errors = [], 0
+            barrier.wait()
+            for bike_id in bike_ids:
+                for method, url, data in (
+                    ('post', reverse('bike_buy_and_sell:cart_add', args=[bike_id]), {}),
+                    ('post', reverse('bike_buy_and_sell:order_create'),
+                     {'email': 'bench@example.com', 'mobile': '0123456789', 'address': 'Dhaka'}),
+                    ('post', reverse('bike_buy_and_sell:chat_support'), {'message': 'Is this still available?'}),
+                ):
+                    start = time.perf_counter()
+                    try:
+                        getattr(client, method)(url, data)
+                    except OperationalError as exc:
+                        if 'locked' not in str(exc):
+                            raise
+                        local_errors += 1
+                    else:
+                        local_latencies.append(time.perf_counter() - start)
+            connections.close_all()
+            with lock:
+                latencies.extend(local_latencies)
+                lock_errors.append(local_errors)
+
+        pool = [threading.Thread(target=writer, args=worker) for worker in workers]
+        started = time.perf_counter()
+        for thread in pool:
+            thread.start()
+        for thread in pool:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        result = summarize(latencies, elapsed)
+        result.update({
+            'threads': threads,
+            'lock_errors': sum(lock_errors),
+            'journal_mode': self.journal_mode(),
+            'elapsed_s': round(elapsed, 3),
+        })
+        return result
+
+    def journal_mode(self):
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            return cursor.fetchone()[0]
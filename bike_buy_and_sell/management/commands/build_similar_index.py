@@ -0,0 +1,25 @@
+import time
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+
+from bike_buy_and_sell import similar
+
+
+class Command(BaseCommand):
+    help = ("Rebuild the similar bikes vector index (similar.py) from every approved bike. "
+            "Run it periodically; bikes changed in between are picked up without it.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--directory', default=None, help='Defaults to settings.SIMILAR_INDEX_DIR')
+
+    def handle(self, *args, **options):
+        directory = options['directory'] or settings.SIMILAR_INDEX_DIR
+        start = time.perf_counter()
+        try:
+            count = similar.build_index(directory)
+        except ImproperlyConfigured as exc:
+            raise CommandError(exc)
+        self.stdout.write(self.style.SUCCESS(
+            f'{count} bikes indexed in {directory} ({time.perf_counter() - start:.1f} s)'))
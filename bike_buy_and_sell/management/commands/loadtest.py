@@ -0,0 +1,132 @@
+import json
+import random
+import threading
+import time
+from collections import defaultdict
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.db.models import Max, Min
+from django.test import Client
+from django.test.utils import setup_test_environment
+from django.urls import reverse
+
+from bike_buy_and_sell.models import BikeBuyAndSell, Category
+from bike_buy_and_sell.seed import USERNAME_PREFIX
+from ._bench import summarize
+
+
+class Command(BaseCommand):
+    help = ("Replay scripted user journeys in-process against the seeded database "
+            "(see seed_benchmark_data) and report throughput, latency percentiles "
+            "and queries per request as JSON.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument('--duration', type=float, default=30.0, help='Seconds to run')
+        parser.add_argument('--chat-ratio', type=float, default=0.2, help='Share of chat journeys')
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--output', help='Also write the report to this file')
+        parser.add_argument('--baseline', help='Previous report to compare against')
+
+    def handle(self, *args, **options):
+        users = list(User.objects.filter(username__startswith=USERNAME_PREFIX)
+                     .order_by('id').values_list('id', flat=True)[:options['concurrency']])
+        if len(users) < options['concurrency']:
+            raise CommandError("Not enough benchmark users; run seed_benchmark_data first.")
+        bounds = BikeBuyAndSell.objects.aggregate(low=Min('id'), high=Max('id'))
+        self.bike_range = (bounds['low'], bounds['high'])
+        self.category_ids = list(Category.objects.values_list('id', flat=True))
+        connection.close()
+        setup_test_environment()
+
+        self.samples = defaultdict(list)  # step -> [(seconds, queries, ok)]
+        self.lock = threading.Lock()
+        deadline = time.perf_counter() + options['duration']
+        threads = [
+            threading.Thread(target=self.virtual_user, args=(user_id, random.Random(options['seed'] + n),
+                                                            options['chat_ratio'], deadline))
+            for n, user_id in enumerate(users)
+        ]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        report = {
+            'config': {key: options[key] for key in ('concurrency', 'duration', 'chat_ratio', 'seed')},
+            'overall': self.step_report([s for samples in self.samples.values() for s in samples], elapsed),
+            'steps': {step: self.step_report(samples, elapsed) for step, samples in sorted(self.samples.items())},
+        }
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output)
+        self.stdout.write(output)
+        if options['baseline']:
+            with open(options['baseline']) as f:
+                self.compare(json.load(f), report)
+
+    def step_report(self, samples, elapsed):
+        report = summarize([seconds for seconds, _, _ in samples], elapsed)
+        report['queries_per_request'] = round(sum(q for _, q, _ in samples) / len(samples), 2) if samples else 0
+        report['errors'] = sum(1 for _, _, ok in samples if not ok)
+        return report
+
+    def compare(self, before, after):
+        self.stdout.write("\nstep: throughput, p95 ms, queries/request (before -> after)")
+        for step in sorted(set(before['steps']) | set(after['steps'])):
+            old, new = before['steps'].get(step, {}), after['steps'].get(step, {})
+            self.stdout.write(
+                f"{step}: " + ', '.join(f"{old.get(k, '-')} -> {new.get(k, '-')}"
+                                         for k in ('throughput', 'p95_ms', 'queries_per_request'))
+            )
+
+    def virtual_user(self, user_id, rng, chat_ratio, deadline):
+        client = Client()
+        client.force_login(User.objects.get(id=user_id))
+        queries = []
+
+        def counter(execute, sql, params, many, context):
+            queries.append(1)
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(counter):
+            while time.perf_counter() < deadline:
+                journey = self.chat_journey if rng.random() < chat_ratio else self.buyer_journey
+                for step, method, url, data, extra in journey(rng):
+                    queries.clear()
+                    start = time.perf_counter()
+                    try:
+                        response = getattr(client, method)(url, data, **extra)
+                        ok = response.status_code < 400
+                    except Exception:
+                        ok = False
+                    sample = (time.perf_counter() - start, len(queries), ok)
+                    with self.lock:
+                        self.samples[step].append(sample)
+        connections.close_all()
+
+    def buyer_journey(self, rng):
+        bike_id = rng.randint(*self.bike_range)
+        low = rng.randrange(20000, 400000, 10000)
+        filters = {'category': rng.choice(self.category_ids), 'min_price': low, 'max_price': low + 200000}
+        return [
+            ('index', 'get', reverse('bike_buy_and_sell:bike_index'), {}, {}),
+            ('buy_list', 'get', reverse('bike_buy_and_sell:buy_list'), filters, {}),
+            ('buy_list_page', 'get', reverse('bike_buy_and_sell:buy_list'), dict(filters, page=2), {}),
+            ('product_detail', 'get', reverse('bike_buy_and_sell:product_detail', args=[bike_id]), {}, {}),
+            ('add_to_cart_view', 'post', reverse('bike_buy_and_sell:cart_add', args=[bike_id]), {}, {}),
+            ('order_create', 'post', reverse('bike_buy_and_sell:order_create'),
+             {'email': 'buyer@example.com', 'mobile': '01700000000', 'address': 'Dhaka'}, {}),
+        ]
+
+    def chat_journey(self, rng):
+        return [
+            ('chat_send', 'post', reverse('bike_buy_and_sell:chat_support'),
+             {'message': 'Is this still available?'}, {'HTTP_X_REQUESTED_WITH': 'XMLHttpRequest'}),
+            ('chat_poll', 'get', reverse('bike_buy_and_sell:chat_support_popup'), {}, {}),
+        ]
@@ -0,0 +1,23 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from bike_buy_and_sell.models import ListingApproval
+from bike_buy_and_sell.saved_searches import SearchIndex, match_approvals
+
+
+class Command(BaseCommand):
+    help = ("Match bikes approved since the last run against every saved search and queue the alerts. "
+            "Run it periodically (cron); the saved searches are indexed once per run.")
+
+    def handle(self, *args, **options):
+        if not ListingApproval.objects.exists():
+            self.stdout.write('No new approvals')
+            return
+        start = time.perf_counter()
+        index = SearchIndex.build()
+        built = time.perf_counter()
+        bikes, alerts = match_approvals(index)
+        self.stdout.write(self.style.SUCCESS(
+            f'{bikes} bikes matched against {len(index)} saved searches: {alerts} alerts '
+            f'(index {built - start:.1f} s, matching {time.perf_counter() - built:.1f} s)'))
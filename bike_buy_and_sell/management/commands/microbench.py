@@ -0,0 +1,236 @@
+import json
+import os
+import timeit
+from types import SimpleNamespace
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.sessions.backends.signed_cookies import SessionStore
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from bike_buy_and_sell import admin as bike_admin, views
+from bike_buy_and_sell.cart import Cart
+from bike_buy_and_sell.models import BikeBuyAndSell, BikeBuyAndSellImage, Category, ChatMessage, Orders
+from ._bench import run_in_scratch_db
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'microbench_baseline.json')
+CART_SIZES = (1, 50, 500)
+NO_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+CALIBRATION = '_calibration'
+
+
+def calibration_loop():
+    """Fixed pure-Python workload used to normalize timings between runs and machines"""
+    data = {}
+    for i in range(2000):
+        data[str(i)] = {'quantity': i, 'price': str(i * 3)}
+    return sum(int(item['price']) * item['quantity'] for item in data.values())
+
+
+class Command(BaseCommand):
+    help = ("Micro-benchmarks of hot in-process code paths (cart, get_first_image, buy_list, "
+            "chat history, admin dashboard), compared against microbench_baseline.json. "
+            "Fails when a benchmark runs more queries than the baseline. Timings are reported "
+            "against the baseline and its noise band; with --gate-timings a slowdown beyond "
+            "--tolerance plus the noise band fails too.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tolerance', type=float, default=0.5, help='Allowed slowdown, 0.5 = 50%%')
+        parser.add_argument('--gate-timings', action='store_true',
+                            help='Also fail on slowdowns beyond --tolerance plus the noise band')
+        parser.add_argument('--runs', type=int,
+                            help='Worker processes to measure in (default 1, 5 with --update-baseline)')
+        parser.add_argument('--update-baseline', action='store_true', help='Write the results as the new baseline')
+        parser.add_argument('--baseline', default=BASELINE_FILE)
+        parser.add_argument('--only', help='Only run benchmarks whose name contains this string')
+        parser.add_argument('--names', help='Internal: comma separated benchmark names to run')
+        parser.add_argument('--worker', action='store_true', help='Internal: run the benchmarks in this process')
+
+    def handle(self, *args, **options):
+        if options['worker']:
+            names = options['names'].split(',') if options['names'] else None
+            self.stdout.write(json.dumps(self.run_benchmarks(options['only'], names)))
+            return
+
+        runs = options['runs'] or (5 if options['update_baseline'] else 1)
+        worker_args = ['--only', options['only']] if options['only'] else []
+        results = self.combine([self.run_worker(worker_args) for _ in range(runs)])
+        if options['update_baseline']:
+            with open(options['baseline'], 'w') as f:
+                json.dump(results, f, indent=2, sort_keys=True)
+                f.write('\n')
+            self.stdout.write(self.style.SUCCESS(f"Baseline written to {options['baseline']}"))
+            return
+
+        baseline = {}
+        if os.path.exists(options['baseline']):
+            with open(options['baseline']) as f:
+                baseline = json.load(f)
+
+        def band(name):
+            return options['tolerance'] + baseline[name].get('noise', 0.0)
+
+        changes = self.compare(results, baseline)
+        suspects = [name for name, change in changes.items() if change > band(name)]
+        if suspects and options['gate_timings']:
+            # Timings are noisy: measure suspects once more and keep the better run
+            retry = self.compare(self.run_worker(['--names', ','.join(suspects)]), baseline)
+            for name in suspects:
+                changes[name] = min(changes[name], retry[name])
+
+        regressions = []
+        for name, result in sorted(results.items()):
+            if name == CALIBRATION:
+                continue
+            before = baseline.get(name)
+            line = f"{name:<32} {result['us_per_op']:>12.1f} us  {result['queries']:>4} queries"
+            if before:
+                line += f"  ({changes[name]:+.0%} vs baseline, noise {before.get('noise', 0.0):.0%})"
+                if result['queries'] > before['queries']:
+                    regressions.append(name)
+                    line = self.style.ERROR(line + '  MORE QUERIES')
+                elif changes[name] > band(name):
+                    if options['gate_timings']:
+                        regressions.append(name)
+                        line = self.style.ERROR(line + '  SLOWER')
+                    else:
+                        line = self.style.WARNING(line + '  slower?')
+            self.stdout.write(line)
+
+        if regressions:
+            raise CommandError(f"{len(regressions)} benchmark(s) regressed: {', '.join(regressions)}")
+
+    def run_worker(self, args):
+        return run_in_scratch_db('microbench', ['--worker', *args])
+
+    def combine(self, runs):
+        """
+        One result from several worker runs: timings scaled to the fastest
+        calibration loop, the best of them kept, and their spread as the noise band
+        """
+        reference = min(run[CALIBRATION]['us_per_op'] for run in runs)
+        combined = {}
+        for name in runs[0]:
+            timings = [run[name]['us_per_op'] * reference / run[CALIBRATION]['us_per_op'] for run in runs]
+            combined[name] = {
+                'queries': max(run[name]['queries'] for run in runs),
+                'us_per_op': round(min(timings), 2),
+                'noise': round(max(timings) / min(timings) - 1, 2),
+            }
+        combined[CALIBRATION]['us_per_op'] = reference
+        return combined
+
+    def compare(self, results, baseline):
+        """Relative change per benchmark, with timings scaled by the calibration loop of each run"""
+        if CALIBRATION not in baseline:
+            return {name: 0.0 for name in results}
+        scale = results[CALIBRATION]['us_per_op'] / baseline[CALIBRATION]['us_per_op']
+        return {
+            name: result['us_per_op'] / (baseline[name]['us_per_op'] * scale) - 1
+            for name, result in results.items() if name in baseline
+        }
+
+    def measure(self, func):
+        with CaptureQueriesContext(connection) as captured:
+            func()
+        timer = timeit.Timer(func)
+        number, _ = timer.autorange()
+        best = min(timer.repeat(repeat=9, number=number)) / number
+        return {'us_per_op': round(best * 1e6, 2), 'queries': len(captured.captured_queries)}
+
+    def run_benchmarks(self, only=None, names=None):
+        call_command('migrate', verbosity=0, interactive=False)
+        data = self.create_data()
+        results = {}
+        with override_settings(DEBUG=False, CACHES=NO_CACHE):
+            for name, func in self.benchmarks(data):
+                if (only and only not in name) or (names and name not in names):
+                    continue
+                results[name] = self.measure(func)
+        results[CALIBRATION] = self.measure(calibration_loop)
+        return results
+
+    def create_data(self):
+        staff = User.objects.create(username='bench-staff', is_staff=True, is_superuser=True)
+        seller = User.objects.create(username='bench-seller')
+        category = Category.objects.create(name='Benchmark')
+        bikes = BikeBuyAndSell.objects.bulk_create(
+            BikeBuyAndSell(name=f'Bike {i}', price=1000 + i, description='Benchmark bike',
+                           category=category, user=seller, status='Approved')
+            for i in range(max(CART_SIZES))
+        )
+        BikeBuyAndSellImage.objects.bulk_create(
+            BikeBuyAndSellImage(bike_buy_and_sell=bike, image=f'bike_buy_and_sell_images/bench_{bike.id}_{k}.jpg')
+            for bike in bikes for k in range(3)
+        )
+        root = ChatMessage.objects.create(user=seller, message='Is this still available?')
+        ChatMessage.objects.bulk_create(
+            ChatMessage(user=seller, message=f'Message {i}', is_admin=bool(i % 2), parent=root)
+            for i in range(200)
+        )
+        Orders.objects.bulk_create(
+            Orders(user=seller, email='bench@example.com', total_price=str(1000 + i)) for i in range(200)
+        )
+        return SimpleNamespace(staff=staff, category=category, bikes=bikes, chat=root)
+
+    def benchmarks(self, data):
+        factory = RequestFactory()
+
+        def cart_with(size):
+            request = SimpleNamespace(session=SessionStore())
+            request.session[settings.CART_SESSION_ID] = {
+                str(bike.id): {'quantity': 1, 'price': str(bike.price)} for bike in data.bikes[:size]
+            }
+            return Cart(request)
+
+        for size in CART_SIZES:
+            products = data.bikes[:size]
+
+            def add(products=products):
+                cart = Cart(SimpleNamespace(session=SessionStore()))
+                for product in products:
+                    cart.add(product)
+
+            def update(size=size, products=products):
+                cart = cart_with(size)
+                for product in products:
+                    cart.update(product, quantity=2)
+
+            def remove(size=size, products=products):
+                cart = cart_with(size)
+                for product in products:
+                    cart.remove(product)
+
+            def iterate(cart=cart_with(size)):
+                for _ in cart:
+                    pass
+
+            yield f'cart.add[{size}]', add
+            yield f'cart.update[{size}]', update
+            yield f'cart.remove[{size}]', remove
+            yield f'cart.__iter__[{size}]', iterate
+            yield f'cart.get_total_price[{size}]', cart_with(size).get_total_price
+
+        bike = data.bikes[0]
+        yield 'bike.get_first_image', bike.get_first_image
+
+        def buy_list():
+            request = factory.get('/buy-list/', {'category': data.category.id, 'min_price': 1000, 'page': 2})
+            request.user = data.staff
+            request.session = SessionStore()
+            views.buy_list(request)
+        yield 'views.buy_list', buy_list
+
+        chat_admin = bike_admin.ChatMessageAdmin(ChatMessage, bike_admin.admin.site)
+        yield 'admin.get_chat_history[201]', lambda: chat_admin.get_chat_history(data.chat)
+
+        def dashboard():
+            request = factory.get('/admin/dashboard/')
+            request.user = data.staff
+            request.session = SessionStore()
+            bike_admin.admin_dashboard(request)
+        yield 'admin.admin_dashboard', dashboard
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+
+from bike_buy_and_sell.reservations import release_expired
+
+
+class Command(BaseCommand):
+    help = "Put bikes whose checkout reservation has expired back on sale. Run it every few minutes (cron)."
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS(f'{release_expired()} expired reservations released'))
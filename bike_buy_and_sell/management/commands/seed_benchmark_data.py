@@ -0,0 +1,33 @@
+import json
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from bike_buy_and_sell.seed import USERNAME_PREFIX, seed
+
+
+class Command(BaseCommand):
+    help = ("Fill the database with a deterministic benchmark data set (users, categories, "
+            "listings with image rows, orders and chat threads). Use a scratch database, "
+            "e.g. DJANGO_DB_NAME=/tmp/load.sqlite3.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10000)
+        parser.add_argument('--listings', type=int, default=1000000)
+        parser.add_argument('--orders', type=int, default=100000)
+        parser.add_argument('--chat-threads', type=int, default=20000)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        if User.objects.filter(username__startswith=USERNAME_PREFIX).exists():
+            raise CommandError("Benchmark data is already present in this database.")
+        started = time.perf_counter()
+        counts = seed(
+            users=options['users'], listings=options['listings'], orders=options['orders'],
+            chat_threads=options['chat_threads'], seed=options['seed'], batch_size=options['batch_size'],
+            log=lambda message: self.stderr.write(message) if options['verbosity'] > 1 else None,
+        )
+        counts['seconds'] = round(time.perf_counter() - started, 1)
+        self.stdout.write(json.dumps(counts, indent=2))
@@ -0,0 +1,43 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from bike_buy_and_sell.profiling import collect, reset_all
+
+
+class Command(BaseCommand):
+    help = "Show the SQL fingerprints collected by SQLProfilerMiddleware across all processes, or reset them."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Discard all collected profiles')
+        parser.add_argument('--suspects', action='store_true', help='Only show N+1 suspects')
+        parser.add_argument('--view', help='Only show queries of this URL name, e.g. bike_buy_and_sell:buy_list')
+        parser.add_argument('--limit', type=int, default=20)
+        parser.add_argument('--json', action='store_true')
+
+    def handle(self, *args, **options):
+        if options['reset']:
+            reset_all()
+            self.stdout.write(self.style.SUCCESS("SQL profiles reset."))
+            return
+
+        rows = collect()
+        if options['view']:
+            rows = [row for row in rows if row['view'] == options['view']]
+        if options['suspects']:
+            rows = [row for row in rows if row['n_plus_one']]
+        rows = rows[:options['limit']]
+
+        if options['json']:
+            self.stdout.write(json.dumps(rows, indent=2))
+            return
+        if not rows:
+            self.stdout.write("No SQL profiles collected yet.")
+            return
+        for row in rows:
+            flag = f"  N+1 in {row['n_plus_one']}/{row['requests']} requests" if row['n_plus_one'] else ''
+            self.stdout.write(
+                f"{row['view']}: {row['count']} queries, {row['total_ms']} ms total, "
+                f"p95 {row['p95_ms']} ms, up to {row['max_per_request']} per request{flag}"
+            )
+            self.stdout.write(f"    {row['fingerprint'][:300]}")
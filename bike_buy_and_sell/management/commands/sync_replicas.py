@@ -0,0 +1,31 @@
+import sqlite3
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+
+class Command(BaseCommand):
+    help = ("Copy the primary SQLite database into every configured read replica. "
+            "Stand-in for real replication when running replicas locally.")
+
+    def handle(self, *args, **options):
+        if not settings.DATABASE_REPLICAS:
+            raise CommandError("No read replicas configured (set DJANGO_DB_REPLICAS).")
+        primary = connections['default'].settings_dict
+        if primary['ENGINE'].rsplit('.', 1)[-1] != 'sqlite3':
+            raise CommandError("sync_replicas only supports SQLite databases.")
+
+        source = sqlite3.connect(primary['NAME'])
+        try:
+            for alias in settings.DATABASE_REPLICAS:
+                connections[alias].close()
+                target = sqlite3.connect(connections[alias].settings_dict['NAME'])
+                try:
+                    # The backup API gives a consistent snapshot even while the primary is being written
+                    source.backup(target)
+                finally:
+                    target.close()
+                self.stdout.write(self.style.SUCCESS(f"Synced {alias}"))
+        finally:
+            source.close()
@@ -0,0 +1,37 @@
+import os
+import re
+from urllib.request import urlopen
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from bike_buy_and_sell.vendor import VENDOR_ASSETS, VENDOR_FILES
+
+SOURCE_MAP_COMMENT = re.compile(rb'\n?/[*/]# sourceMappingURL=[^\n]*?(\*/)?\s*$')
+
+
+class Command(BaseCommand):
+    help = "Download the Bootstrap and Font Awesome files listed in vendor.py into assets/vendor."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Download files that already exist')
+
+    def handle(self, *args, **options):
+        root = settings.STATICFILES_DIRS[0]
+        for path, url in [*VENDOR_ASSETS.values(), *VENDOR_FILES]:
+            target = os.path.join(root, path)
+            if os.path.exists(target) and not options['force']:
+                self.stdout.write(f'{path}: present')
+                continue
+            try:
+                with urlopen(url, timeout=30) as response:
+                    content = response.read()
+            except OSError as exc:
+                raise CommandError(f'{url}: {exc}')
+            if path.endswith(('.css', '.js')):
+                # The .map files are not vendored; ManifestStaticFilesStorage would fail on them
+                content = SOURCE_MAP_COMMENT.sub(b'', content)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with open(target, 'wb') as f:
+                f.write(content)
+            self.stdout.write(self.style.SUCCESS(f'{path}: {len(content)} bytes'))
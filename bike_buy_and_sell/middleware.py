@@ -0,0 +1,109 @@
+import logging
+import random
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from .instrumentation import finish_request, start_request, stats
+from .profiling import RequestProfile, profile
+from .routers import has_written, pin_to_primary, reset_routing
+
+logger = logging.getLogger(__name__)
+
+
+class PrimaryPinningMiddleware:
+    """
+    Keep a client on the primary database for REPLICA_PIN_SECONDS after it
+    writes, so pages like sell_list or order history show its own changes
+    even while the replicas catch up.
+    """
+    cookie_name = 'pin_primary'
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        reset_routing()
+        if request.COOKIES.get(self.cookie_name):
+            pin_to_primary()
+        try:
+            response = self.get_response(request)
+            if has_written() and getattr(settings, 'DATABASE_REPLICAS', []):
+                response.set_cookie(
+                    self.cookie_name, '1', max_age=settings.REPLICA_PIN_SECONDS,
+                    httponly=True, samesite='Lax',
+                )
+            return response
+        finally:
+            reset_routing()
+
+
+class PerformanceMiddleware:
+    """
+    Measure a sample of requests (PERFORMANCE_SAMPLE_RATE): SQL count and
+    time, template render time, cache hits/misses and total latency. Adds a
+    Server-Timing header, logs requests slower than
+    PERFORMANCE_SLOW_REQUEST_MS with their most repeated queries, and feeds
+    the per-URL histograms served by the performance_stats view.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = settings.PERFORMANCE_SAMPLE_RATE
+        self.slow_request_ms = settings.PERFORMANCE_SLOW_REQUEST_MS
+
+    def __call__(self, request):
+        if not self.sample_rate or random.random() >= self.sample_rate:
+            return self.get_response(request)
+
+        metrics = start_request()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(metrics.record_query))
+                response = self.get_response(request)
+            total = time.perf_counter() - metrics.started
+        finally:
+            finish_request()
+
+        response['Server-Timing'] = metrics.server_timing(total)
+        match = getattr(request, 'resolver_match', None)
+        url_name = match.view_name if match else 'unresolved'
+        stats.add(url_name, total, metrics)
+        if total * 1000 >= self.slow_request_ms:
+            logger.warning(
+                'Slow request %s %s (%s): %.0f ms, %d queries in %.0f ms, template %.0f ms. Repeated queries: %s',
+                request.method, request.path, url_name, total * 1000, metrics.query_count,
+                metrics.db_time * 1000, metrics.template_time * 1000,
+                metrics.duplicate_queries() or 'none',
+            )
+        return response
+
+
+class SQLProfilerMiddleware:
+    """
+    Fingerprint the SQL of a sample of requests (SQL_PROFILER_SAMPLE_RATE)
+    and aggregate it per view, see bike_buy_and_sell.profiling.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = settings.SQL_PROFILER_SAMPLE_RATE
+        self.threshold = settings.SQL_PROFILER_N_PLUS_ONE_THRESHOLD
+
+    def __call__(self, request):
+        if not self.sample_rate or random.random() >= self.sample_rate:
+            return self.get_response(request)
+
+        request_profile = RequestProfile()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(request_profile))
+            response = self.get_response(request)
+
+        match = getattr(request, 'resolver_match', None)
+        profile.add_request(match.view_name if match else 'unresolved', request_profile, self.threshold)
+        profile.maybe_publish()
+        return response
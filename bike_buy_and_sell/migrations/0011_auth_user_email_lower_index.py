@@ -0,0 +1,21 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    Index on lower(email) for accounts.users_with_email(). auth_user belongs
+    to django.contrib.auth, so the index is created with SQL. It is not
+    unique: users created in the admin may share an empty email.
+    """
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('bike_buy_and_sell', '0010_remove_bikebuyandsell_quantity'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            'CREATE INDEX IF NOT EXISTS auth_user_email_lower_idx ON auth_user (LOWER(email))',
+            'DROP INDEX IF EXISTS auth_user_email_lower_idx',
+        ),
+    ]
@@ -0,0 +1,51 @@
+from django.db import migrations, models
+
+FTS_TABLE = 'bike_buy_and_sell_bike_fts'
+BIKE_TABLE = 'bike_buy_and_sell_bikebuyandsell'
+
+CREATE_SQLITE = [
+    f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(name, content='{BIKE_TABLE}', content_rowid='id', prefix='2 3')",
+    f"""CREATE TRIGGER {FTS_TABLE}_ai AFTER INSERT ON {BIKE_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, name) VALUES (new.id, new.name);
+    END""",
+    f"""CREATE TRIGGER {FTS_TABLE}_ad AFTER DELETE ON {BIKE_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name) VALUES ('delete', old.id, old.name);
+    END""",
+    f"""CREATE TRIGGER {FTS_TABLE}_au AFTER UPDATE OF name ON {BIKE_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name) VALUES ('delete', old.id, old.name);
+        INSERT INTO {FTS_TABLE}(rowid, name) VALUES (new.id, new.name);
+    END""",
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+
+DROP_SQLITE = [
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_au',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_ad',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_ai',
+    f'DROP TABLE IF EXISTS {FTS_TABLE}',
+]
+
+
+def run_on_sqlite(statements):
+    # Other databases keep the icontains fallback in search.py
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor == 'sqlite':
+            for statement in statements:
+                schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+    """Full-text index over bike names (search.py) and the seller inventory index"""
+
+    dependencies = [
+        ('bike_buy_and_sell', '0011_auth_user_email_lower_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(run_on_sqlite(CREATE_SQLITE), run_on_sqlite(DROP_SQLITE)),
+        migrations.AddIndex(
+            model_name='bikebuyandsell',
+            index=models.Index(fields=['user', 'status'], name='bike_buy_an_user_id_status_idx'),
+        ),
+    ]
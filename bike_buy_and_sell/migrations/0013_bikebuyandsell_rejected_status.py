@@ -0,0 +1,26 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """
+    Rejected listings, and the status index the moderation queue walks
+    (declared on the model earlier but never migrated). SQLite keeps the
+    rowid in every index entry, so "status = 'Pending' AND id > ? ORDER BY
+    id" is a range scan of it.
+    """
+
+    dependencies = [
+        ('bike_buy_and_sell', '0012_bike_name_search_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='bikebuyandsell',
+            name='status',
+            field=models.CharField(choices=[('Pending', 'Pending'), ('Approved', 'Approved'), ('Rejected', 'Rejected')], default='Pending', max_length=50, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='bikebuyandsell',
+            index=models.Index(fields=['status'], name='bike_buy_an_status_36be18_idx'),
+        ),
+    ]
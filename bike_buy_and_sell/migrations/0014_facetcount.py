@@ -0,0 +1,89 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+FACET_TABLE = 'bike_buy_and_sell_facetcount'
+BIKE_TABLE = 'bike_buy_and_sell_bikebuyandsell'
+
+# facets.PRICE_BUCKETS, frozen here
+PRICE_BUCKETS = (0, 50000, 100000, 200000, 400000)
+
+
+def bucket_sql(price):
+    whens = ' '.join(f'WHEN {price} >= {edge} THEN {i}' for i, edge in reversed(list(enumerate(PRICE_BUCKETS))) if i)
+    return f'(CASE {whens} ELSE 0 END)'
+
+
+def add_sql(row):
+    return f"""INSERT INTO {FACET_TABLE}(category_id, bucket, listings)
+        VALUES ({row}.category_id, {bucket_sql(f'{row}.price')}, 1)
+        ON CONFLICT(category_id, bucket) DO UPDATE SET listings = listings + 1;"""
+
+
+def remove_sql(row):
+    return f"""UPDATE {FACET_TABLE} SET listings = listings - 1
+        WHERE category_id = {row}.category_id AND bucket = {bucket_sql(f'{row}.price')};"""
+
+
+CREATE_SQLITE = [
+    f"""CREATE TRIGGER {FACET_TABLE}_ai AFTER INSERT ON {BIKE_TABLE} WHEN new.status = 'Approved' BEGIN
+        {add_sql('new')}
+    END""",
+    f"""CREATE TRIGGER {FACET_TABLE}_ad AFTER DELETE ON {BIKE_TABLE} WHEN old.status = 'Approved' BEGIN
+        {remove_sql('old')}
+    END""",
+    f"""CREATE TRIGGER {FACET_TABLE}_au_old AFTER UPDATE OF status, price, category_id ON {BIKE_TABLE}
+        WHEN old.status = 'Approved' BEGIN
+        {remove_sql('old')}
+    END""",
+    f"""CREATE TRIGGER {FACET_TABLE}_au_new AFTER UPDATE OF status, price, category_id ON {BIKE_TABLE}
+        WHEN new.status = 'Approved' BEGIN
+        {add_sql('new')}
+    END""",
+    f"""INSERT INTO {FACET_TABLE}(category_id, bucket, listings)
+        SELECT category_id, {bucket_sql('price')}, COUNT(*) FROM {BIKE_TABLE}
+        WHERE status = 'Approved' GROUP BY 1, 2""",
+]
+
+DROP_SQLITE = [
+    f'DROP TRIGGER IF EXISTS {FACET_TABLE}_au_new',
+    f'DROP TRIGGER IF EXISTS {FACET_TABLE}_au_old',
+    f'DROP TRIGGER IF EXISTS {FACET_TABLE}_ad',
+    f'DROP TRIGGER IF EXISTS {FACET_TABLE}_ai',
+]
+
+
+def run_on_sqlite(statements):
+    # Other databases compute the facet grid with a grouped query (facets.py)
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor == 'sqlite':
+            for statement in statements:
+                schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+    """Facet counts for buy_list (facets.py) and the index behind off-bucket price ranges"""
+
+    dependencies = [
+        ('bike_buy_and_sell', '0013_bikebuyandsell_rejected_status'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FacetCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.PositiveSmallIntegerField()),
+                ('listings', models.IntegerField(default=0)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='bike_buy_and_sell.category')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('category', 'bucket'), name='bike_buy_an_facet_category_bucket_uniq')],
+            },
+        ),
+        migrations.RunPython(run_on_sqlite(CREATE_SQLITE), run_on_sqlite(DROP_SQLITE)),
+        migrations.AddIndex(
+            model_name='bikebuyandsell',
+            index=models.Index(fields=['status', 'price', 'category'], name='bike_buy_an_status_price_idx'),
+        ),
+    ]
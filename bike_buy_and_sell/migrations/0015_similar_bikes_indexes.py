@@ -0,0 +1,20 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """Indexes for similar.py: bikes changed since the vector index was built, and nearest prices in a category"""
+
+    dependencies = [
+        ('bike_buy_and_sell', '0014_facetcount'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bikebuyandsell',
+            index=models.Index(fields=['updated_at'], name='bike_buy_an_updated_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bikebuyandsell',
+            index=models.Index(fields=['category', 'status', 'price'], name='bike_buy_an_category_price_idx'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """Saved searches, their alerts, and the queue of approvals still to match (saved_searches.py)"""
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('bike_buy_and_sell', '0015_similar_bikes_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SavedSearch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('query', models.CharField(blank=True, max_length=200)),
+                ('min_price', models.IntegerField(blank=True, null=True)),
+                ('max_price', models.IntegerField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='bike_buy_and_sell.category')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='saved_searches', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SearchAlert',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('seen', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('bike_buy_and_sell', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='bike_buy_and_sell.bikebuyandsell')),
+                ('saved_search', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='alerts', to='bike_buy_and_sell.savedsearch')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('saved_search', 'bike_buy_and_sell'), name='bike_buy_an_alert_search_bike_uniq')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ListingApproval',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('bike_buy_and_sell', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='bike_buy_and_sell.bikebuyandsell')),
+            ],
+        ),
+    ]
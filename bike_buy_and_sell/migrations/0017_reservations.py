@@ -0,0 +1,34 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """Reserved and Sold listings, who holds them and until when (reservations.py)"""
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('bike_buy_and_sell', '0016_saved_searches'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='bikebuyandsell',
+            name='status',
+            field=models.CharField(choices=[('Pending', 'Pending'), ('Approved', 'Approved'), ('Rejected', 'Rejected'), ('Reserved', 'Reserved'), ('Sold', 'Sold')], default='Pending', max_length=50, null=True),
+        ),
+        migrations.AddField(
+            model_name='bikebuyandsell',
+            name='reserved_by',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='reservations', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='bikebuyandsell',
+            name='reserved_until',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='bikebuyandsell',
+            index=models.Index(fields=['status', 'reserved_until'], name='bike_buy_an_reserved_until_idx'),
+        ),
+    ]
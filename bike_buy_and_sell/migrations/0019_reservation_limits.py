@@ -0,0 +1,17 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """When a hold was claimed, so renewals stop MAX_HOLD_MINUTES after it (reservations.py)"""
+
+    dependencies = [
+        ('bike_buy_and_sell', '0018_archive'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bikebuyandsell',
+            name='reserved_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -17,6 +17,9 @@ class BikeBuyAndSell(models.Model):
     STATUS = (
         ('Pending', 'Pending'),
         ('Approved', 'Approved'),
+        ('Rejected', 'Rejected'),
+        ('Reserved', 'Reserved'),
+        ('Sold', 'Sold'),
     )
     name = models.CharField(max_length=300)
     price = models.IntegerField()
@@ -24,6 +27,10 @@ class BikeBuyAndSell(models.Model):
     category = models.ForeignKey(Category, on_delete=models.CASCADE)
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     status = models.CharField(max_length=50, null=True, choices=STATUS, default='Pending')
+    # The buyer holding or having bought the bike, and when a Reserved hold was claimed and runs out (reservations.py)
+    reserved_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='reservations')
+    reserved_at = models.DateTimeField(null=True, blank=True)
+    reserved_until = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -43,6 +50,11 @@ class BikeBuyAndSell(models.Model):
             models.Index(fields=['user']),
             models.Index(fields=['price']),
             models.Index(fields=['created_at']),
+            models.Index(fields=['user', 'status'], name='bike_buy_an_user_id_status_idx'),
+            models.Index(fields=['status', 'price', 'category'], name='bike_buy_an_status_price_idx'),
+            models.Index(fields=['updated_at'], name='bike_buy_an_updated_at_idx'),
+            models.Index(fields=['category', 'status', 'price'], name='bike_buy_an_category_price_idx'),
+            models.Index(fields=['status', 'reserved_until'], name='bike_buy_an_reserved_until_idx'),
         ]
 
 
@@ -53,6 +65,18 @@ class BikeBuyAndSellImage(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
 
 
+class FacetCount(models.Model):
+    # Approved listings per category and price bucket, maintained by database triggers (see facets.py)
+    category = models.ForeignKey(Category, on_delete=models.CASCADE)
+    bucket = models.PositiveSmallIntegerField()
+    listings = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['category', 'bucket'], name='bike_buy_an_facet_category_bucket_uniq'),
+        ]
+
+
 class Orders(models.Model):
     STATUS = (
         ('Pending', 'Pending'),
@@ -78,6 +102,7 @@ class Orders(models.Model):
             models.Index(fields=['user']),
             models.Index(fields=['status']),
             models.Index(fields=['created_at']),
+            models.Index(fields=['status', 'created_at'], name='bike_buy_an_status_created_idx'),
         ]
 
 
@@ -133,6 +158,10 @@ class ChatMessage(models.Model):
 
     class Meta:
         ordering = ['-timestamp']
+        indexes = [
+            models.Index(fields=['user', 'timestamp'], name='bike_buy_an_chat_user_ts_idx'),
+            models.Index(fields=['status', 'timestamp'], name='bike_buy_an_chat_status_ts_idx'),
+        ]
 
     def __str__(self):
         return f"{'Admin' if self.is_admin else self.user.username}: {self.message[:30]}"
@@ -146,6 +175,89 @@ class ChatMessage(models.Model):
         return not self.is_admin and self.status == 'open'
 
 
+# Archive tier: delivered orders and finished chat threads moved out of the hot tables with their
+# ids unchanged (archive.py). Timestamps are copied, not set, so none of them are auto_now.
+
+class ArchivedOrder(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_orders')
+    email = models.CharField(max_length=50, null=True)
+    address = models.CharField(max_length=500, null=True)
+    mobile = models.CharField(max_length=20, null=True)
+    total_price = models.CharField('Total Price', max_length=10, null=True)
+    order_date = models.DateField(null=True)
+    status = models.CharField(max_length=50, null=True, choices=Orders.STATUS)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return str(self.id)
+
+
+class ArchivedOrderItem(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    order = models.ForeignKey(ArchivedOrder, on_delete=models.CASCADE, related_name='items')
+    bike_buy_and_sell = models.ForeignKey(BikeBuyAndSell, on_delete=models.CASCADE, related_name='archived_order_items')
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    price = models.DecimalField(max_digits=10, decimal_places=2)
+    quantity = models.PositiveIntegerField(default=1)
+
+    def get_cost(self):
+        return self.price * self.quantity
+
+
+class ArchivedChatMessage(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_chat_messages')
+    message = models.TextField()
+    is_admin = models.BooleanField(default=False)
+    timestamp = models.DateTimeField()
+    parent = models.ForeignKey('self', on_delete=models.CASCADE, null=True, blank=True, related_name='replies')
+    subject = models.CharField(max_length=200, null=True, blank=True)
+    category = models.CharField(max_length=50, null=True, blank=True)
+    status = models.CharField(max_length=20, choices=ChatMessage.STATUS_CHOICES)
+    priority = models.CharField(max_length=20, choices=ChatMessage.PRIORITY_CHOICES, default='medium')
+    assigned_to = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    resolved_at = models.DateTimeField(null=True, blank=True)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+
+class SavedSearch(models.Model):
+    # A buy_list filter or search box query a buyer wants alerts for (saved_searches.py)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='saved_searches')
+    query = models.CharField(max_length=200, blank=True)
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, null=True, blank=True)
+    min_price = models.IntegerField(null=True, blank=True)
+    max_price = models.IntegerField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        parts = [f'"{self.query}"' if self.query else None, self.category.name if self.category_id else None]
+        if self.min_price is not None or self.max_price is not None:
+            parts.append(f'BDT {self.min_price or 0} - {self.max_price if self.max_price is not None else "any"}')
+        return ', '.join(filter(None, parts)) or 'All bikes'
+
+
+class SearchAlert(models.Model):
+    saved_search = models.ForeignKey(SavedSearch, on_delete=models.CASCADE, related_name='alerts')
+    bike_buy_and_sell = models.ForeignKey(BikeBuyAndSell, on_delete=models.CASCADE)
+    seen = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['saved_search', 'bike_buy_and_sell'], name='bike_buy_an_alert_search_bike_uniq'),
+        ]
+
+
+class ListingApproval(models.Model):
+    # Bikes approved since saved searches were last matched against new listings
+    bike_buy_and_sell = models.ForeignKey(BikeBuyAndSell, on_delete=models.CASCADE)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+
 class Profile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     profile_picture = models.ImageField(upload_to='profile_pictures/', null=True, blank=True)
@@ -156,11 +268,7 @@ class Profile(models.Model):
 
 @receiver(post_save, sender=User)
 def create_user_profile(sender, instance, created, **kwargs):
+    # Only on signup: later saves (every login updates last_login) leave the profile alone.
+    # Users from before profiles existed get one from update_profile when they first need it.
     if created:
-        Profile.objects.create(user=instance)
-
-@receiver(post_save, sender=User)
-def save_user_profile(sender, instance, **kwargs):
-    if not hasattr(instance, 'profile'):
-        Profile.objects.create(user=instance)
-    instance.profile.save()
\ No newline at end of file
+        Profile.objects.create(user=instance)
\ No newline at end of file
@@ -0,0 +1,50 @@
+"""
+Listing moderation.
+
+New listings wait as Pending until staff approve or reject them, in the
+admin's moderation queue or with the changelist actions. A decision on a
+batch is one UPDATE and one catalog version bump however many rows it
+covers: QuerySet.update() sends no signals, so nothing fires per row.
+"""
+from django.db import transaction
+from django.db.models import Prefetch
+from django.utils import timezone
+
+from .catalog import bump_catalog_version
+from .models import BikeBuyAndSell, BikeBuyAndSellImage
+from .saved_searches import queue_approvals
+
+MODERATION_PAGE_SIZE = 50
+DECISIONS = ('Approved', 'Rejected')
+# Reserved and Sold belong to checkout (reservations.py): moderation never touches them
+MODERATED_STATUSES = ('Pending', 'Rejected', 'Approved')
+
+
+def pending_listings():
+    """Pending listings with their seller, category and images, for keyset_page(oldest_first=True)"""
+    return BikeBuyAndSell.objects.filter(status='Pending').select_related('user', 'category').prefetch_related(
+        Prefetch('images', queryset=BikeBuyAndSellImage.objects.order_by('id'), to_attr='image_list'),
+    )
+
+
+def set_status(queryset, status):
+    """Set the status of every listing in queryset that is not reserved or sold; returns the number changed"""
+    queryset = queryset.filter(status__in=MODERATED_STATUSES)
+    with transaction.atomic():
+        if status == 'Approved':
+            # Saved searches are matched against newly approved bikes only
+            queue_approvals(queryset.exclude(status='Approved').values_list('pk', flat=True))
+        changed = queryset.update(status=status, updated_at=timezone.now())
+    if changed:
+        bump_catalog_version()
+    return changed
+
+
+def moderate(ids, status):
+    """
+    Approve or reject the listings in ids that are still Pending. Listings
+    another moderator decided on in the meantime are left alone.
+    """
+    if status not in DECISIONS:
+        raise ValueError(f'Unknown moderation decision {status!r}')
+    return set_status(BikeBuyAndSell.objects.filter(pk__in=ids, status='Pending'), status)
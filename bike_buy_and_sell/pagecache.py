@@ -0,0 +1,101 @@
+"""
+Full-page cache for anonymous visitors.
+
+Views decorated with @cache_anonymous_page are served from the cache to
+visitors without a login session, a cart, pending flash messages or a
+primary pin, before the session and auth middleware run. Keys combine the
+catalog version, the path and the sorted query string, so a catalog change
+retires every cached page at once.
+
+Pages are rendered with a placeholder where {% csrf_token %} goes (see
+context_processors.page_cache); every response leaving the cache gets the
+visitor's own token and, if needed, a CSRF cookie.
+"""
+import hashlib
+from urllib.parse import parse_qsl
+
+from django.conf import settings
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.middleware.csrf import CsrfViewMiddleware, get_token
+from django.urls import Resolver404, resolve
+from django.utils.cache import get_conditional_response
+from django.utils.http import urlencode
+
+from .catalog import catalog_version
+from .middleware import PrimaryPinningMiddleware
+from .sessions import anonymous_session_store
+
+# Same length as a real masked token so cached Content-Length stays right
+CSRF_PLACEHOLDER = 'pagecache'.ljust(64, '0')
+
+
+def cache_anonymous_page(view):
+    view.cache_anonymous_page = True
+    return view
+
+
+def page_key(request):
+    query = urlencode(sorted(parse_qsl(request.META.get('QUERY_STRING', ''))))
+    digest = hashlib.md5(f'{request.path}?{query}'.encode(), usedforsecurity=False).hexdigest()
+    return f'page:{catalog_version()}:{digest}'
+
+
+class AnonymousPageCacheMiddleware:
+    """
+    Place before the session middleware. ANONYMOUS_PAGE_CACHE_TIMEOUT of 0
+    turns the cache off.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.csrf = CsrfViewMiddleware(get_response)
+        self.cache = caches[settings.ANONYMOUS_PAGE_CACHE_ALIAS]
+        self.timeout = settings.ANONYMOUS_PAGE_CACHE_TIMEOUT
+        self.AnonymousSessionStore = anonymous_session_store()
+
+    def __call__(self, request):
+        if not self.timeout or not self.is_cacheable(request):
+            return self.get_response(request)
+
+        key = page_key(request)
+        page = self.cache.get(key)
+        if page is None:
+            request.page_cache_csrf = True
+            response = self.get_response(request)
+            if request.method == 'GET' and response.status_code == 200 and not response.streaming \
+                    and not response.cookies:
+                self.cache.set(key, (response.status_code, list(response.items()), response.content), self.timeout)
+        else:
+            status, headers, content = page
+            response = HttpResponse(content, status=status)
+            for header, value in headers:
+                response[header] = value
+            if response.has_header('ETag'):
+                response = get_conditional_response(request, etag=response['ETag'], response=response)
+        return self.add_csrf_token(request, response)
+
+    def is_cacheable(self, request):
+        if request.method not in ('GET', 'HEAD'):
+            return False
+        cookies = request.COOKIES
+        if settings.SESSION_COOKIE_NAME in cookies or CookieStorage.cookie_name in cookies \
+                or PrimaryPinningMiddleware.cookie_name in cookies:
+            return False
+        anonymous_key = cookies.get(settings.ANONYMOUS_SESSION_COOKIE_NAME)
+        if anonymous_key and self.AnonymousSessionStore(anonymous_key).get(settings.CART_SESSION_ID):
+            return False
+        try:
+            match = resolve(request.path_info)
+        except Resolver404:
+            return False
+        request.resolver_match = match  # for the metrics middleware when the view never runs
+        return getattr(match.func, 'cache_anonymous_page', False)
+
+    def add_csrf_token(self, request, response):
+        if response.streaming or CSRF_PLACEHOLDER.encode() not in response.content:
+            return response
+        self.csrf.process_request(request)
+        response.content = response.content.replace(CSRF_PLACEHOLDER.encode(), get_token(request).encode())
+        return self.csrf.process_response(request, response)
@@ -0,0 +1,51 @@
+"""
+Keyset pagination.
+
+Paginator counts the rows and pages with OFFSET, so page N reads N pages of
+rows. A keyset page instead starts past the last id the client has seen
+("?before=<id>" newest first, "?after=<id>" oldest first): one indexed
+range scan per page, however deep the list. The price is that pages have
+no numbers, only "first" and "next" links.
+"""
+from django.http import QueryDict
+
+
+class KeysetPage:
+    def __init__(self, items, has_next, start, size, param):
+        self.items = items
+        self.has_next = has_next
+        self.start = start
+        self.size = size
+        self.param = param
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    @property
+    def next_start(self):
+        """The ?<param>= value of the next page"""
+        return self.items[-1].pk if self.has_next else None
+
+    def next_query(self, request):
+        query = QueryDict(mutable=True)
+        query.update(request.GET)
+        query[self.param] = self.next_start
+        return query.urlencode()
+
+
+def keyset_page(request, queryset, size=25, param='before', oldest_first=False):
+    """
+    The page of queryset past ?<param>=<id>: newest id first below it, or
+    with oldest_first, oldest id first above it.
+    """
+    try:
+        start = int(request.GET.get(param, ''))
+    except ValueError:
+        start = None
+    if start is not None:
+        queryset = queryset.filter(pk__gt=start) if oldest_first else queryset.filter(pk__lt=start)
+    rows = list(queryset.order_by('pk' if oldest_first else '-pk')[:size + 1])
+    return KeysetPage(rows[:size], len(rows) > size, start, size, param)
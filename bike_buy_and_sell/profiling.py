@@ -0,0 +1,178 @@
+"""
+SQL fingerprint profiler.
+
+SQLProfilerMiddleware (in middleware.py) records every query of a sampled
+request through connection.execute_wrapper. Queries are reduced to
+fingerprints (literals and parameter lists replaced by ?) and aggregated
+per view: count, total time and p95. A fingerprint repeated
+SQL_PROFILER_N_PLUS_ONE_THRESHOLD times or more in one request is counted
+as an N+1 suspect for that view.
+
+Each process aggregates in memory and periodically publishes a snapshot to
+the shared cache, where `manage.py sqlprofile` merges, prints and resets
+them.
+"""
+import os
+import random
+import re
+import socket
+import threading
+import time
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import caches
+
+SAMPLES_PER_FINGERPRINT = 200
+PUBLISH_INTERVAL = 10  # seconds
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDER = re.compile(r'%s|\?')
+_IN_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+_WHITESPACE = re.compile(r'\s+')
+
+
+@lru_cache(maxsize=4096)
+def fingerprint(sql):
+    """Normalize SQL so that queries differing only in literal values compare equal"""
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _PLACEHOLDER.sub('?', sql)
+    sql = _IN_LIST.sub('(...)', sql)
+    return _WHITESPACE.sub(' ', sql).strip()
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+class RequestProfile:
+    """Queries of one request, attributed to its view when the request ends"""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((sql, time.perf_counter() - start))
+
+
+class SQLProfile:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._published = 0.0
+        self._generation = None
+
+    def add_request(self, view, request_profile, threshold):
+        per_request = {}
+        for sql, duration in request_profile.queries:
+            per_request.setdefault(fingerprint(sql), []).append(duration)
+        with self._lock:
+            for fp, durations in per_request.items():
+                entry = self._entries.setdefault((view, fp), {
+                    'count': 0, 'total': 0.0, 'samples': [], 'requests': 0, 'n_plus_one': 0, 'max_per_request': 0,
+                })
+                entry['total'] += sum(durations)
+                entry['requests'] += 1
+                entry['max_per_request'] = max(entry['max_per_request'], len(durations))
+                if len(durations) >= threshold:
+                    entry['n_plus_one'] += 1
+                samples = entry['samples']
+                for duration in durations:
+                    # Reservoir sampling (Algorithm R) keeps p95 cheap for hot fingerprints: the nth
+                    # duration replaces a sample with probability SAMPLES_PER_FINGERPRINT / n
+                    entry['count'] += 1
+                    if len(samples) < SAMPLES_PER_FINGERPRINT:
+                        samples.append(duration)
+                    else:
+                        slot = random.randrange(entry['count'])
+                        if slot < SAMPLES_PER_FINGERPRINT:
+                            samples[slot] = duration
+
+    def snapshot(self):
+        with self._lock:
+            return [
+                {'view': view, 'fingerprint': fp, **{k: (list(v) if k == 'samples' else v) for k, v in entry.items()}}
+                for (view, fp), entry in self._entries.items()
+            ]
+
+    def reset(self, generation=None):
+        with self._lock:
+            self._entries.clear()
+            if generation is not None:
+                self._generation = generation
+
+    def maybe_publish(self, force=False):
+        """Publish this process's snapshot to the shared cache at most every PUBLISH_INTERVAL seconds"""
+        now = time.monotonic()
+        if not force and now - self._published < PUBLISH_INTERVAL:
+            return
+        self._published = now
+        store = shared_store()
+        generation = store.get(GENERATION_KEY, 0)
+        if self._generation is not None and generation != self._generation:
+            self.reset()  # `sqlprofile --reset` ran since the last publish
+        self._generation = generation
+        store.set(worker_key(), self.snapshot(), None)
+        workers = store.get(WORKERS_KEY) or []
+        if worker_key() not in workers:
+            store.set(WORKERS_KEY, workers + [worker_key()], None)
+
+
+GENERATION_KEY = 'sqlprofile:generation'
+WORKERS_KEY = 'sqlprofile:workers'
+
+
+def worker_key():
+    return f'sqlprofile:{socket.gethostname()}:{os.getpid()}'
+
+
+def shared_store():
+    return caches[getattr(settings, 'SQL_PROFILER_CACHE_ALIAS', 'shared')]
+
+
+def collect():
+    """Merge the snapshots published by all processes into one row per (view, fingerprint)"""
+    store = shared_store()
+    merged = {}
+    for key in store.get(WORKERS_KEY) or []:
+        for row in store.get(key) or []:
+            entry = merged.setdefault((row['view'], row['fingerprint']), {
+                'view': row['view'], 'fingerprint': row['fingerprint'], 'count': 0, 'total': 0.0,
+                'samples': [], 'requests': 0, 'n_plus_one': 0, 'max_per_request': 0,
+            })
+            for field in ('count', 'total', 'requests', 'n_plus_one'):
+                entry[field] += row[field]
+            entry['max_per_request'] = max(entry['max_per_request'], row['max_per_request'])
+            entry['samples'].extend(row['samples'])
+    rows = []
+    for entry in merged.values():
+        samples = entry.pop('samples')
+        entry['total_ms'] = round(entry.pop('total') * 1000, 3)
+        entry['p95_ms'] = round(percentile(samples, 95) * 1000, 3)
+        rows.append(entry)
+    return sorted(rows, key=lambda row: row['total_ms'], reverse=True)
+
+
+def reset_all():
+    store = shared_store()
+    for key in store.get(WORKERS_KEY) or []:
+        store.delete(key)
+    store.delete(WORKERS_KEY)
+    try:
+        generation = store.incr(GENERATION_KEY)
+    except ValueError:
+        generation = 1
+        store.set(GENERATION_KEY, generation, None)
+    profile.reset(generation)
+
+
+profile = SQLProfile()
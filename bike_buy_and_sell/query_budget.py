@@ -0,0 +1,161 @@
+"""
+Per-view query budgets.
+
+QueryBudgetTestCase generates one test per named route of the app and per
+admin changelist. Each test requests the page as an anonymous, a regular
+and a staff user, first with SMALL rows of every kind and again after the
+data set has grown to LARGE rows. A page passes when it runs the same
+number of queries at both sizes and no more than its declared budget.
+
+Subclasses declare:
+    budgets        {route: max queries}, checked for every role
+    known_growth   {route: reason}, routes whose query count still grows
+                   with the data; only their SMALL run is checked against
+                   the budget, and the test fails once the count stops
+                   growing so the fixed route is taken off the list
+    skip           {route: reason}, routes that cannot be requested with a
+                   plain GET (destructive, one-off links, broken)
+    query_strings  {route: {param: value}}
+"""
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.db import connection
+from django.test import Client, TestCase
+from django.urls import URLPattern, reverse
+from django.utils.http import urlencode
+
+from .models import BikeBuyAndSell, BikeBuyAndSellImage, Category, ChatMessage, OrderItem, Orders
+
+SMALL = 10
+LARGE = 1000
+ROLES = ('anonymous', 'regular', 'staff')
+
+
+def named_routes(urlconf_module):
+    """(route name, URL kwarg names) of every named pattern in a urls module"""
+    return [
+        (pattern.name, list(pattern.pattern.converters))
+        for pattern in urlconf_module.urlpatterns
+        if isinstance(pattern, URLPattern) and pattern.name
+    ]
+
+
+def admin_changelists(site=None):
+    site = site or admin.site
+    return [f'admin:{model._meta.app_label}_{model._meta.model_name}_changelist' for model in site._registry]
+
+
+def grow(owner, category, rows):
+    """Add `rows` approved bikes (two images each), orders (two items each) and chat threads for owner"""
+    bikes = BikeBuyAndSell.objects.bulk_create(
+        BikeBuyAndSell(name=f'Budget bike {n}', price=100000 + n, description='-', category=category,
+                       user=owner, status='Approved')
+        for n in range(rows)
+    )
+    BikeBuyAndSellImage.objects.bulk_create(
+        BikeBuyAndSellImage(bike_buy_and_sell=bike, image=f'bike_buy_and_sell_images/budget/{bike.id}_{k}.jpg')
+        for bike in bikes for k in range(2)
+    )
+    orders = Orders.objects.bulk_create(
+        Orders(user=owner, email='buyer@example.com', mobile='01700000000', address='Dhaka', total_price='200000')
+        for _ in range(rows)
+    )
+    OrderItem.objects.bulk_create(
+        OrderItem(order=order, bike_buy_and_sell=bikes[(n + k) % rows], price=100000, quantity=1)
+        for n, order in enumerate(orders) for k in range(2)
+    )
+    threads = ChatMessage.objects.bulk_create(
+        ChatMessage(user=owner, message='Is this still available?') for _ in range(rows)
+    )
+    ChatMessage.objects.bulk_create(
+        ChatMessage(user=owner, message='Yes.', is_admin=True, parent=thread) for thread in threads
+    )
+
+
+class QueryBudgetTestCase(TestCase):
+    namespace = 'bike_buy_and_sell'
+    urlconf = None
+    include_admin = True
+    budgets = {}
+    known_growth = {}
+    skip = {}
+    query_strings = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if cls.urlconf is None:
+            return
+        routes = [(f'{cls.namespace}:{name}', params) for name, params in named_routes(cls.urlconf)]
+        if cls.include_admin:
+            routes += [(name, []) for name in admin_changelists()]
+        for route, params in routes:
+            name = 'test_' + route.replace(':', '_').replace('-', '_')
+            setattr(cls, name, cls._budget_test(name, route, params))
+
+    @staticmethod
+    def _budget_test(name, route, params):
+        def test(self):
+            self.check_budget(route, params)
+        test.__name__ = name
+        test.__doc__ = f'Query budget of {route}'
+        return test
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = {
+            'anonymous': None,
+            'regular': User.objects.create_user('budget-user', 'user@example.com', 'pass12345'),
+            'staff': User.objects.create_superuser('budget-staff', 'staff@example.com', 'pass12345'),
+        }
+        cls.category = Category.objects.create(name='Sports')
+        grow(cls.users['regular'], cls.category, SMALL)
+
+    def url_kwargs(self, params):
+        owner = self.users['regular']
+        values = {
+            'product_id': BikeBuyAndSell.objects.filter(user=owner).order_by('id').first().id,
+            'order_id': Orders.objects.filter(user=owner).order_by('id').first().id,
+            'category_id': self.category.id,
+        }
+        values['id'] = values['bike_id'] = values['product_id']
+        return {param: values[param] for param in params}
+
+    def count_queries(self, url, role):
+        for alias in ('default', 'shared'):
+            caches[alias].clear()  # cached pages would hide the query pattern
+        client = Client()
+        if self.users[role] is not None:
+            client.force_login(self.users[role])
+        # Counted with a wrapper: CaptureQueriesContext keeps at most 9000 queries
+        queries = []
+        with connection.execute_wrapper(lambda execute, sql, *args: queries.append(sql) or execute(sql, *args)):
+            response = client.get(url)
+            if response.streaming:
+                b''.join(response.streaming_content)  # streamed pages query while they render
+        return len(queries)
+
+    def check_budget(self, route, params):
+        if route in self.skip:
+            self.skipTest(self.skip[route])
+        budget = self.budgets.get(route)
+        self.assertIsNotNone(budget, f'{route} has no query budget')
+        url = reverse(route, kwargs=self.url_kwargs(params))
+        if route in self.query_strings:
+            url += '?' + urlencode(self.query_strings[route])
+
+        small = {role: self.count_queries(url, role) for role in ROLES}
+        grow(self.users['regular'], self.category, LARGE - SMALL)
+        large = {role: self.count_queries(url, role) for role in ROLES}
+
+        if route in self.known_growth:
+            # Like an expected failure: once the route is fixed this fails until it leaves the list
+            self.assertTrue(any(large[role] > small[role] for role in ROLES),
+                            f'{route} no longer grows with data: remove it from known_growth')
+        for role in ROLES:
+            with self.subTest(role=role):
+                self.assertLessEqual(small[role], budget, f'{route} as {role} ({SMALL} rows)')
+                if route in self.known_growth:
+                    continue
+                self.assertEqual(large[role], small[role], f'{route} as {role}: query count grows with data')
+                self.assertLessEqual(large[role], budget, f'{route} as {role} ({LARGE} rows)')
@@ -0,0 +1,82 @@
+"""
+Category registry.
+
+Categories change about once a month but are listed on most pages, so each
+process keeps them in memory as an immutable snapshot: a tuple in id order
+plus an id -> name mapping. A version counter in the cache, bumped when a
+Category is saved or deleted, tells every process to reload; other
+processes notice within the cache's L1_TIMEOUT.
+
+Views call categories(); templates get the same snapshot as `categories`
+from context_processors.reference_data.
+"""
+import threading
+import time
+from types import MappingProxyType
+
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Category
+
+CATEGORY_VERSION_KEY = 'categories:version'
+
+_lock = threading.Lock()
+_snapshot = None
+
+
+class CategorySnapshot:
+    def __init__(self, version, categories):
+        self.version = version
+        self.all = tuple(categories)
+        self.names = MappingProxyType({category.id: category.name for category in self.all})
+        self._by_id = {category.id: category for category in self.all}
+
+    def __iter__(self):
+        return iter(self.all)
+
+    def __len__(self):
+        return len(self.all)
+
+    def get(self, pk):
+        """The category with this id (int or numeric string), or None"""
+        try:
+            return self._by_id.get(int(pk))
+        except (TypeError, ValueError):
+            return None
+
+
+def category_version():
+    version = cache.get(CATEGORY_VERSION_KEY)
+    if version is None:
+        # Start from the clock so a lost counter never reuses an old version
+        cache.add(CATEGORY_VERSION_KEY, int(time.time() * 1000), None)
+        version = cache.get(CATEGORY_VERSION_KEY)
+    return version
+
+
+def bump_category_version():
+    try:
+        return cache.incr(CATEGORY_VERSION_KEY)
+    except ValueError:
+        return category_version()
+
+
+def categories():
+    """The current CategorySnapshot, reloaded once per version change"""
+    global _snapshot
+    version = category_version()
+    snapshot = _snapshot
+    if snapshot is None or snapshot.version != version:
+        with _lock:
+            snapshot = _snapshot
+            if snapshot is None or snapshot.version != version:
+                snapshot = _snapshot = CategorySnapshot(version, Category.objects.order_by('id'))
+    return snapshot
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def category_changed(sender, **kwargs):
+    bump_category_version()
@@ -0,0 +1,105 @@
+"""
+Reservations.
+
+Every listing is one used bike, so checkout has to claim it before another
+buyer does. The cart's Checkout button (a POST, so prefetchers and
+crawlers never hold anything) reserves its bikes for RESERVATION_MINUTES,
+and placing the order marks them Sold. Both are conditional UPDATEs
+(... WHERE status = 'Approved' OR the hold is the buyer's own or has run
+out): of two buyers racing for a bike, the first UPDATE changes the row
+and the second matches nothing, so the bike is not read first and no lock
+is held in between. Only a bike that leaves Approved or changes hands
+bumps the catalog version; renewing a hold does not.
+
+A buyer holds at most MAX_HOLDS bikes at a time, and checking out again
+renews a hold only up to MAX_HOLD_MINUTES after it was claimed; once it
+runs out, other buyers can claim the bike but the same buyer cannot until
+it is back on sale.
+
+A hold nobody completed can be claimed by the next buyer at once, and
+`manage.py release_reservations` puts expired holds back on sale. Listings
+only show Approved bikes, so Reserved and Sold ones drop out of them
+through the status indexes.
+"""
+from datetime import timedelta
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Count, Min, Q
+from django.utils import timezone
+
+from .catalog import bump_catalog_version
+from .models import BikeBuyAndSell
+
+RESERVATION_MINUTES = 15
+MAX_HOLD_MINUTES = 60  # from the claim, renewals included
+MAX_HOLDS = 5
+
+
+def claimable(user, now):
+    """Bikes user can reserve or buy: for sale, already held by user, or held past expiry"""
+    return (Q(status='Approved')
+            | Q(status='Reserved', reserved_by=user)
+            | Q(status='Reserved', reserved_until__lt=now))
+
+
+def holds(user, now):
+    """Bikes user holds right now"""
+    return BikeBuyAndSell.objects.filter(status='Reserved', reserved_by=user, reserved_until__gte=now)
+
+
+def reserve(user, bike_ids):
+    """
+    Hold the bikes in bike_ids that user can claim; returns the set of ids
+    held. Raises ValidationError if that would make more than MAX_HOLDS.
+    """
+    now = timezone.now()
+    until = now + timedelta(minutes=RESERVATION_MINUTES)
+    with transaction.atomic():
+        holding = set(holds(user, now).values_list('pk', flat=True))
+        if len(holding | set(bike_ids)) > MAX_HOLDS:
+            raise ValidationError(f"You can hold at most {MAX_HOLDS} bikes at a time.")
+        # Checking out again only extends the buyer's own holds: nothing the catalog shows changes
+        BikeBuyAndSell.objects.filter(
+            pk__in=holding.intersection(bike_ids),
+            reserved_at__gte=now - timedelta(minutes=MAX_HOLD_MINUTES - RESERVATION_MINUTES),
+        ).update(reserved_until=until)
+        claimed = BikeBuyAndSell.objects.filter(
+            Q(status='Approved') | (Q(status='Reserved', reserved_until__lt=now) & ~Q(reserved_by=user)),
+            pk__in=set(bike_ids) - holding,
+        ).update(status='Reserved', reserved_by=user, reserved_at=now, reserved_until=until, updated_at=now)
+        held = set(holds(user, now).filter(pk__in=bike_ids).values_list('pk', flat=True)) if claimed \
+            else holding.intersection(bike_ids)
+    if claimed:
+        bump_catalog_version()
+    return held
+
+
+def held_until(user, bike_ids):
+    """When the first of user's holds on bike_ids runs out, or None unless user holds all of them"""
+    summary = holds(user, timezone.now()).filter(pk__in=bike_ids).aggregate(
+        count=Count('id'), until=Min('reserved_until'),
+    )
+    return summary['until'] if summary['count'] == len(set(bike_ids)) else None
+
+
+def sell(user, bike_ids):
+    """
+    Mark the bikes in bike_ids sold to user; returns the number sold. Run it
+    in the order's transaction and roll back unless every bike was sold.
+    """
+    now = timezone.now()
+    return BikeBuyAndSell.objects.filter(claimable(user, now), pk__in=bike_ids).update(
+        status='Sold', reserved_by=user, reserved_at=None, reserved_until=None, updated_at=now,
+    )
+
+
+def release_expired():
+    """Put the bikes whose hold has run out back on sale; returns how many"""
+    now = timezone.now()
+    released = BikeBuyAndSell.objects.filter(status='Reserved', reserved_until__lt=now).update(
+        status='Approved', reserved_by=None, reserved_at=None, reserved_until=None, updated_at=now,
+    )
+    if released:
+        bump_catalog_version()
+    return released
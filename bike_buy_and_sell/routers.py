@@ -0,0 +1,98 @@
+import random
+import threading
+from contextlib import contextmanager
+from functools import wraps
+
+from django.conf import settings
+
+_state = threading.local()
+
+
+def _replicas():
+    return getattr(settings, 'DATABASE_REPLICAS', [])
+
+
+def reset_routing():
+    _state.replica_reads = False
+    _state.pinned = False
+    _state.wrote = False
+
+
+def pin_to_primary():
+    """Send every read for the rest of this request to the primary"""
+    _state.pinned = True
+
+
+def is_pinned():
+    return getattr(_state, 'pinned', False)
+
+
+def has_written():
+    return getattr(_state, 'wrote', False)
+
+
+def reads_from_replica():
+    return getattr(_state, 'replica_reads', False)
+
+
+@contextmanager
+def replica_reads():
+    previous = getattr(_state, 'replica_reads', False)
+    _state.replica_reads = True
+    try:
+        yield
+    finally:
+        _state.replica_reads = previous
+
+
+@contextmanager
+def primary_reads():
+    """pin_to_primary() for the duration of the block"""
+    previous = is_pinned()
+    _state.pinned = True
+    try:
+        yield
+    finally:
+        _state.pinned = previous
+
+
+def use_replica(view_func):
+    """Allow the reads done by a view to be served from a read replica"""
+    @wraps(view_func)
+    def _wrapped_view(request, *args, **kwargs):
+        with replica_reads():
+            return view_func(request, *args, **kwargs)
+    return _wrapped_view
+
+
+class PrimaryReplicaRouter:
+    """
+    Route reads to settings.DATABASE_REPLICAS inside views marked with
+    @use_replica, everything else to 'default'.
+
+    The first write of a request pins the rest of it to the primary, and
+    PrimaryPinningMiddleware keeps the client on the primary for
+    REPLICA_PIN_SECONDS afterwards so it reads its own writes.
+    """
+    # Always read from the primary; writes to them do not pin the request
+    primary_apps = {'sessions', 'admin'}
+
+    def db_for_read(self, model, **hints):
+        replicas = _replicas()
+        if (not replicas or is_pinned() or not getattr(_state, 'replica_reads', False)
+                or model._meta.app_label in self.primary_apps):
+            return 'default'
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        if model._meta.app_label not in self.primary_apps:
+            _state.wrote = True
+            pin_to_primary()
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas are copies of the primary and are never migrated directly
+        return db not in _replicas()
@@ -0,0 +1,187 @@
+"""
+Saved searches.
+
+Buyers save a buy_list filter (category, price range) or a search box
+query and get an alert when a matching bike is approved, rather than
+re-running the search to look for new bikes.
+
+Approvals are queued in ListingApproval: moderation.set_status() queues
+the bikes it approves (admin action, moderation queue) and single saves
+that approve a bike (list_editable, the change form) are caught by
+pre_save/post_save receivers here. `manage.py match_saved_searches` drains
+the queue: it builds a SearchIndex of every saved search once per run and
+looks each new bike up in it instead of running any search, then writes
+the alerts in batches.
+
+The index goes by category (the bike's own and "any"), then a centered
+interval tree over the price ranges of searches without words, then
+postings for searches with words, keyed by their longest word. A search's
+words match as prefixes of the bike's name words, as in
+search.filter_by_name().
+"""
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+
+from django.db.models.signals import post_save, pre_save
+from django.dispatch import receiver
+
+from .models import BikeBuyAndSell, ListingApproval, SavedSearch, SearchAlert
+from .search import words
+
+UNBOUNDED = 1 << 62
+MAX_PREFIX = 20
+ALERT_BATCH_SIZE = 1000
+
+
+def search_terms(query):
+    """A query's words, longest first"""
+    return sorted({word.lower() for word in words(query)}, key=lambda word: (-len(word), word))
+
+
+def name_prefixes(name):
+    """Every prefix of every word of a bike name"""
+    return {word[:end] for word in words(name.lower()) for end in range(1, min(len(word), MAX_PREFIX) + 1)}
+
+
+class IntervalNode:
+    __slots__ = ('center', 'starts', 'ids_by_start', 'ends', 'ids_by_end', 'left', 'right')
+
+
+class IntervalTree:
+    """Static centered interval tree of (low, high, id): the ids of the intervals containing a point"""
+
+    def __init__(self, intervals):
+        self.root = self._build(intervals)
+
+    def _build(self, intervals):
+        if not intervals:
+            return None
+        endpoints = sorted(point for low, high, _ in intervals[::max(1, len(intervals) // 500)] for point in (low, high))
+        node = IntervalNode()
+        node.center = endpoints[len(endpoints) // 2]
+        here, left, right = [], [], []
+        for interval in intervals:
+            if interval[1] < node.center:
+                left.append(interval)
+            elif interval[0] > node.center:
+                right.append(interval)
+            else:
+                here.append(interval)
+        # Every interval here contains the center, so on either side only one end needs checking
+        here.sort()
+        node.starts = array('q', (low for low, _, _ in here))
+        node.ids_by_start = array('q', (pk for _, _, pk in here))
+        here.sort(key=lambda interval: interval[1])
+        node.ends = array('q', (high for _, high, _ in here))
+        node.ids_by_end = array('q', (pk for _, _, pk in here))
+        node.left, node.right = self._build(left), self._build(right)
+        return node
+
+    def stab(self, point):
+        found = []
+        node = self.root
+        while node is not None:
+            if point < node.center:
+                found.extend(node.ids_by_start[:bisect_right(node.starts, point)])
+                node = node.left
+            elif point > node.center:
+                found.extend(node.ids_by_end[bisect_left(node.ends, point):])
+                node = node.right
+            else:
+                found.extend(node.ids_by_start)
+                break
+        return found
+
+
+class SearchIndex:
+    """Every saved search, indexed to find the ones a bike matches"""
+
+    def __init__(self, searches):
+        """searches: (id, category_id, query, min_price, max_price) rows"""
+        intervals = defaultdict(list)
+        self.postings = defaultdict(lambda: defaultdict(list))
+        self.size = 0
+        for pk, category_id, query, low, high in searches:
+            low = -UNBOUNDED if low is None else low
+            high = UNBOUNDED if high is None else high
+            if low > high:
+                continue
+            self.size += 1
+            terms = search_terms(query)
+            if terms:
+                self.postings[category_id][terms[0]].append((low, high, pk, terms[1:]))
+            else:
+                intervals[category_id].append((low, high, pk))
+        self.trees = {category_id: IntervalTree(rows) for category_id, rows in intervals.items()}
+
+    @classmethod
+    def build(cls):
+        rows = SavedSearch.objects.values_list('id', 'category_id', 'query', 'min_price', 'max_price')
+        return cls(rows.iterator(chunk_size=10000))
+
+    def __len__(self):
+        return self.size
+
+    def match(self, category_id, name, price):
+        """Ids of the saved searches a bike with these fields matches"""
+        found = []
+        prefixes = None
+        for key in (category_id, None):
+            tree = self.trees.get(key)
+            if tree is not None:
+                found.extend(tree.stab(price))
+            postings = self.postings.get(key)
+            if postings:
+                prefixes = prefixes if prefixes is not None else name_prefixes(name)
+                for prefix in prefixes:
+                    for low, high, pk, rest in postings.get(prefix, ()):
+                        if low <= price <= high and all(term in prefixes for term in rest):
+                            found.append(pk)
+        return found
+
+
+def queue_approvals(bike_ids):
+    ListingApproval.objects.bulk_create(ListingApproval(bike_buy_and_sell_id=pk) for pk in bike_ids)
+
+
+@receiver(pre_save, sender=BikeBuyAndSell)
+def note_approval(sender, instance, raw=False, **kwargs):
+    if raw or instance.status != 'Approved':
+        return
+    instance._newly_approved = (
+        instance.pk is None or not sender.objects.filter(pk=instance.pk, status='Approved').exists()
+    )
+
+
+@receiver(post_save, sender=BikeBuyAndSell)
+def queue_approval(sender, instance, raw=False, **kwargs):
+    if getattr(instance, '_newly_approved', False):
+        instance._newly_approved = False
+        queue_approvals([instance.pk])
+
+
+def match_approvals(index=None, batch_size=ALERT_BATCH_SIZE):
+    """
+    Match the queued approvals against every saved search and write the
+    alerts; returns (bikes matched, alerts written).
+    """
+    index = index if index is not None else SearchIndex.build()
+    bikes = alerts = 0
+    while True:
+        queued = list(ListingApproval.objects.order_by('id').values_list('id', 'bike_buy_and_sell_id')[:batch_size])
+        if not queued:
+            return bikes, alerts
+        approved = BikeBuyAndSell.objects.filter(pk__in={pk for _, pk in queued}, status='Approved')
+        matches = {}
+        for pk, category_id, name, price in approved.values_list('id', 'category_id', 'name', 'price'):
+            matches[pk] = index.match(category_id, name, price)
+        # A bike approved again (rejected or unlisted in between) keeps the alerts it already has
+        existing = set(SearchAlert.objects.filter(bike_buy_and_sell_id__in=matches)
+                       .values_list('saved_search_id', 'bike_buy_and_sell_id'))
+        pending = [SearchAlert(saved_search_id=search, bike_buy_and_sell_id=pk)
+                   for pk, searches in matches.items() for search in searches if (search, pk) not in existing]
+        SearchAlert.objects.bulk_create(pending, batch_size=batch_size, ignore_conflicts=True)
+        bikes += len(matches)
+        alerts += len(pending)
+        ListingApproval.objects.filter(id__lte=queued[-1][0]).delete()
@@ -0,0 +1,39 @@
+"""
+Bike name search.
+
+On SQLite, migration 0012 keeps an FTS5 index of bike names in sync with
+triggers. filter_by_name() matches every word of the query as a word
+prefix ("yam r1" finds "Yamaha R15") through that index, so the cost no
+longer grows with the table the way name__icontains (a LIKE scan) does.
+Other databases fall back to icontains on each word.
+"""
+import re
+
+from django.db import connections
+from django.db.models.expressions import RawSQL
+
+FTS_TABLE = 'bike_buy_and_sell_bike_fts'
+
+word_re = re.compile(r'\w+')
+
+
+def words(text):
+    return word_re.findall(text or '')
+
+
+def match_expression(text):
+    """An FTS5 query with every word quoted (no operators) and prefix-matched"""
+    return ' '.join(f'"{word}"*' for word in words(text))
+
+
+def filter_by_name(queryset, text):
+    terms = words(text)
+    if not terms:
+        return queryset
+    if connections[queryset.db].vendor == 'sqlite':
+        return queryset.filter(pk__in=RawSQL(
+            f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [match_expression(text)]
+        ))
+    for term in terms:
+        queryset = queryset.filter(name__icontains=term)
+    return queryset
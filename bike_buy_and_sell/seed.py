@@ -0,0 +1,126 @@
+"""
+Deterministic benchmark data.
+
+Everything is generated from one random.Random(seed) and written with
+bulk_create in batches, so the same arguments always produce the same
+catalogue. Image rows only carry a file name; no files are written.
+"""
+import random
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+
+from .models import BikeBuyAndSell, BikeBuyAndSellImage, Category, ChatMessage, OrderItem, Orders
+
+USERNAME_PREFIX = 'loadtest-'
+PASSWORD = 'loadtest-pass'
+
+CATEGORY_NAMES = [
+    'Sports', 'Commuter', 'Cruiser', 'Scooter', 'Off-road', 'Touring', 'Naked', 'Cafe Racer',
+    'Electric', 'Classic', 'Dual Sport', 'Adventure', 'Moped', 'Supermoto', 'Chopper', 'Bobber',
+    'Street Fighter', 'Enduro', 'Trial', 'Pocket Bike',
+]
+BRANDS = ['Yamaha', 'Honda', 'Suzuki', 'Bajaj', 'TVS', 'Hero', 'Kawasaki', 'KTM', 'Royal Enfield', 'Lifan']
+MODELS = ['R15', 'CBR', 'Gixxer', 'Pulsar', 'Apache', 'Splendor', 'Ninja', 'Duke', 'Classic', 'KPR']
+CONDITIONS = ['Well kept', 'Single owner', 'Fresh paper', 'New tyres', 'Minor scratches', 'Engine rebuilt']
+CHAT_LINES = ['Is this still available?', 'Can you lower the price?', 'Where can I see it?',
+              'My order has not arrived yet.', 'How do I change my address?']
+
+
+def _batches(total, size):
+    for start in range(0, total, size):
+        yield start, min(size, total - start)
+
+
+def seed(users=1000, listings=10000, orders=1000, chat_threads=500, seed=42, batch_size=5000, log=None):
+    """Create the benchmark data set and return how many rows of each kind were written"""
+    rng = random.Random(seed)
+    log = log or (lambda message: None)
+    password = make_password(PASSWORD)
+    counts = {}
+
+    categories = [Category.objects.get_or_create(name=name)[0] for name in CATEGORY_NAMES]
+    counts['categories'] = len(categories)
+
+    user_ids = []
+    for start, size in _batches(users, batch_size):
+        created = User.objects.bulk_create(
+            User(username=f'{USERNAME_PREFIX}{n}', email=f'{USERNAME_PREFIX}{n}@example.com',
+                 first_name='Load', last_name=f'Tester {n}', password=password)
+            for n in range(start, start + size)
+        )
+        user_ids.extend(user.id for user in created)
+    counts['users'] = len(user_ids)
+    log(f"users: {len(user_ids)}")
+
+    bike_ids = []
+    bike_prices = {}
+    images = 0
+    for start, size in _batches(listings, batch_size):
+        with transaction.atomic():
+            bikes = BikeBuyAndSell.objects.bulk_create(
+                BikeBuyAndSell(
+                    name=f'{rng.choice(BRANDS)} {rng.choice(MODELS)} {2005 + n % 20}',
+                    price=rng.randrange(20000, 800000, 500),
+                    description=f'{rng.choice(CONDITIONS)}. {rng.choice(CONDITIONS)}.',
+                    category=rng.choice(categories),
+                    user_id=rng.choice(user_ids),
+                    status='Approved' if rng.random() < 0.8 else 'Pending',
+                )
+                for n in range(start, start + size)
+            )
+            image_rows = [
+                BikeBuyAndSellImage(bike_buy_and_sell_id=bike.id,
+                                    image=f'bike_buy_and_sell_images/seed/{bike.id}_{k}.jpg')
+                for bike in bikes for k in range(rng.randint(1, 3))
+            ]
+            BikeBuyAndSellImage.objects.bulk_create(image_rows)
+        images += len(image_rows)
+        for bike in bikes:
+            bike_ids.append(bike.id)
+            bike_prices[bike.id] = bike.price
+        log(f"listings: {len(bike_ids)}/{listings}")
+    counts['listings'] = len(bike_ids)
+    counts['images'] = images
+
+    order_count = item_count = 0
+    statuses = [status for status, _ in Orders.STATUS]
+    for start, size in _batches(orders, batch_size):
+        with transaction.atomic():
+            picks = [rng.sample(bike_ids, rng.randint(1, min(3, len(bike_ids)))) for _ in range(size)]
+            created = Orders.objects.bulk_create(
+                Orders(user_id=rng.choice(user_ids), email='buyer@example.com', mobile='01700000000',
+                       address='House 1, Road 2, Dhaka', status=rng.choice(statuses),
+                       total_price=str(sum(bike_prices[bike_id] for bike_id in bikes)))
+                for bikes in picks
+            )
+            items = [
+                OrderItem(order_id=order.id, bike_buy_and_sell_id=bike_id, price=bike_prices[bike_id], quantity=1)
+                for order, bikes in zip(created, picks) for bike_id in bikes
+            ]
+            OrderItem.objects.bulk_create(items)
+        order_count += len(created)
+        item_count += len(items)
+    counts['orders'] = order_count
+    counts['order_items'] = item_count
+    log(f"orders: {order_count}")
+
+    messages = 0
+    chat_statuses = [status for status, _ in ChatMessage.STATUS_CHOICES]
+    for start, size in _batches(chat_threads, batch_size):
+        with transaction.atomic():
+            roots = ChatMessage.objects.bulk_create(
+                ChatMessage(user_id=rng.choice(user_ids), message=rng.choice(CHAT_LINES),
+                            status=rng.choice(chat_statuses), subject='Support')
+                for _ in range(size)
+            )
+            replies = ChatMessage.objects.bulk_create(
+                ChatMessage(user_id=root.user_id, message='Thanks, we are looking into it.',
+                            is_admin=True, parent_id=root.id, status=root.status)
+                for root in roots for _ in range(rng.randint(0, 3))
+            )
+        messages += len(roots) + len(replies)
+    counts['chat_messages'] = messages
+    log(f"chat messages: {messages}")
+    return counts
@@ -0,0 +1,97 @@
+"""
+Session strategy: authenticated users get a server-side session
+(SESSION_ENGINE, cached_db by default) while anonymous shoppers keep their
+cart in a signed cookie (ANONYMOUS_SESSION_ENGINE), so browsing and
+filling a cart never touches the session table.
+"""
+import time
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.auth.signals import user_logged_in
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.dispatch import receiver
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date
+
+
+def anonymous_session_store():
+    engine = getattr(settings, 'ANONYMOUS_SESSION_ENGINE', None)
+    return import_module(engine).SessionStore if engine else None
+
+
+class HybridSessionMiddleware(SessionMiddleware):
+    """
+    Drop-in replacement for SessionMiddleware. Requests carrying the regular
+    session cookie use SESSION_ENGINE; everything else starts on the
+    anonymous engine and moves to SESSION_ENGINE when the user logs in.
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.AnonymousSessionStore = anonymous_session_store()
+        self.anonymous_cookie_name = settings.ANONYMOUS_SESSION_COOKIE_NAME
+
+    def process_request(self, request):
+        session_key = request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+        if session_key or self.AnonymousSessionStore is None:
+            request.session = self.SessionStore(session_key)
+        else:
+            request.session = self.AnonymousSessionStore(request.COOKIES.get(self.anonymous_cookie_name))
+
+    def process_response(self, request, response):
+        session = getattr(request, 'session', None)
+        if self.AnonymousSessionStore is not None and isinstance(session, self.AnonymousSessionStore):
+            return self.process_anonymous_response(request, response)
+        if self.anonymous_cookie_name in request.COOKIES:
+            # The cart now lives in the server-side session
+            self.delete_anonymous_cookie(response)
+        return super().process_response(request, response)
+
+    def process_anonymous_response(self, request, response):
+        session = request.session
+        if session.is_empty():
+            if self.anonymous_cookie_name in request.COOKIES:
+                self.delete_anonymous_cookie(response)
+                patch_vary_headers(response, ('Cookie',))
+            return response
+        if session.accessed:
+            patch_vary_headers(response, ('Cookie',))
+        if session.modified and response.status_code < 500:
+            if session.get_expire_at_browser_close():
+                max_age = expires = None
+            else:
+                max_age = session.get_expiry_age()
+                expires = http_date(time.time() + max_age)
+            session.save()
+            response.set_cookie(
+                self.anonymous_cookie_name,
+                session.session_key,
+                max_age=max_age,
+                expires=expires,
+                domain=settings.SESSION_COOKIE_DOMAIN,
+                path=settings.SESSION_COOKIE_PATH,
+                secure=settings.SESSION_COOKIE_SECURE or None,
+                httponly=True,
+                samesite=settings.SESSION_COOKIE_SAMESITE,
+            )
+        return response
+
+    def delete_anonymous_cookie(self, response):
+        response.delete_cookie(
+            self.anonymous_cookie_name,
+            path=settings.SESSION_COOKIE_PATH,
+            domain=settings.SESSION_COOKIE_DOMAIN,
+            samesite=settings.SESSION_COOKIE_SAMESITE,
+        )
+
+
+@receiver(user_logged_in)
+def move_session_to_server(sender, request, user, **kwargs):
+    """Copy the anonymous cookie session (cart included) into a server-side session on login"""
+    anonymous_store = anonymous_session_store()
+    if request is None or anonymous_store is None or not isinstance(request.session, anonymous_store):
+        return
+    session = import_module(settings.SESSION_ENGINE).SessionStore()
+    session.update(dict(request.session.items()))
+    request.session = session
@@ -0,0 +1,296 @@
+"""
+Similar bikes.
+
+product_detail lists approved bikes like the one shown. With NumPy
+installed and an index written by `manage.py build_similar_index`, every
+approved bike is a row of a memory-mapped float32 matrix: hashed TF-IDF of
+its name, description and category plus two components for its log price,
+L2-normalized, so a matrix-vector product gives cosine similarities. Rows
+are grouped in clusters and a query only scores the rows of the closest
+few, so on large indexes the results are approximate.
+
+Bikes approved or edited after the build (updated_at past the build time)
+are read back and encoded with the index's IDF weights, once per catalog
+version per process, and override their rows; the index follows the
+catalog between rebuilds. Deleted and unapproved bikes drop out when the
+results are loaded. Without NumPy or an index, similar bikes are the same
+category's nearest prices.
+"""
+import json
+import math
+import os
+import re
+import threading
+import zlib
+from collections import Counter
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import Count, Max, Min, OuterRef, Q, Subquery
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .cache import get_or_compute
+from .catalog import catalog_version
+from .models import BikeBuyAndSell, BikeBuyAndSellImage
+
+try:
+    import numpy as np
+except ImportError:  # optional; same category, nearest price only
+    np = None
+
+TEXT_DIMENSIONS = 510  # hashed terms; two more components hold the price
+DIMENSIONS = TEXT_DIMENSIONS + 2
+NAME_WEIGHT = 2  # a term in the name counts as two in the description
+CATEGORY_WEIGHT = 4
+PRICE_SHARE = 0.3  # of the cosine similarity
+ROWS_PER_CLUSTER = 2000
+MAX_CLUSTERS = 256
+PROBES = 8  # clusters scored per query
+META_FILE = 'meta.json'
+SIMILAR_COUNT = 6
+SIMILAR_TIMEOUT = 300
+FIELDS = ('name', 'description', 'category_id', 'price')
+TOKEN = re.compile(r'[a-z0-9]+')
+
+
+def term_counts(name, description, category_id):
+    counts = Counter()
+    for weight, text in ((NAME_WEIGHT, name), (1, description)):
+        for token in TOKEN.findall((text or '').lower()):
+            counts[token] += weight
+    counts[f'category:{category_id}'] = CATEGORY_WEIGHT
+    return counts
+
+
+class Encoder:
+    """Turns a bike's fields into its unit vector"""
+
+    def __init__(self, idf, default_idf, log_price_range):
+        self.idf = idf
+        self.default_idf = default_idf
+        self.low, self.high = log_price_range
+
+    def weights(self, name, description, category_id):
+        """TF-IDF weight of each term"""
+        return {term: (1 + math.log(count)) * self.idf.get(term, self.default_idf)
+                for term, count in term_counts(name, description, category_id).items()}
+
+    def price_components(self, price):
+        # Log price as an angle: the dot product of two prices is the cosine of their distance
+        span = (self.high - self.low) or 1.0
+        angle = math.pi * min(max((math.log(max(price, 1)) - self.low) / span, 0.0), 1.0)
+        return math.sqrt(PRICE_SHARE) * math.cos(angle), math.sqrt(PRICE_SHARE) * math.sin(angle)
+
+    def vector(self, name, description, category_id, price):
+        row = np.zeros(DIMENSIONS, dtype=np.float32)
+        for term, weight in self.weights(name, description, category_id).items():
+            digest = zlib.crc32(term.encode())
+            sign = 1.0 if digest & 0x80000000 else -1.0  # signed hashing: collisions cancel out on average
+            row[digest % TEXT_DIMENSIONS] += sign * weight
+        norm = np.linalg.norm(row[:TEXT_DIMENSIONS])
+        if norm:
+            row[:TEXT_DIMENSIONS] *= math.sqrt(1 - PRICE_SHARE) / norm
+        row[TEXT_DIMENSIONS:] = self.price_components(price)
+        return row
+
+
+class VectorIndex:
+    """
+    The matrix is stored cluster by cluster (spherical k-means over the
+    rows); a query scores the centroids, then only the rows of the PROBES
+    closest clusters.
+    """
+
+    def __init__(self, directory, meta, stamp):
+        self.stamp = stamp
+        self.built_at = parse_datetime(meta['built_at'])
+        load = lambda name: np.load(os.path.join(directory, meta[name]), mmap_mode='r')
+        self.ids, self.vectors = load('ids'), load('vectors')
+        self.centroids, self.offsets = np.array(load('centroids')), np.array(load('offsets'))
+        self.rows_by_id = np.argsort(self.ids)
+        self.sorted_ids = np.array(self.ids[self.rows_by_id])
+        self.encoder = Encoder(meta['idf'], meta['default_idf'], meta['log_price_range'])
+        self._changes = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.ids)
+
+    def positions(self, ids):
+        """Row numbers of those of ids that are in the index"""
+        ids = np.asarray(ids, dtype=np.int64)
+        if not len(self.sorted_ids):
+            return np.empty(0, dtype=np.int64)
+        found = np.minimum(np.searchsorted(self.sorted_ids, ids), len(self.sorted_ids) - 1)
+        return self.rows_by_id[found[self.sorted_ids[found] == ids]]
+
+    def changes(self):
+        """(rows changed since the build, ids and vectors of the approved ones) for the catalog version"""
+        version = catalog_version()
+        with self._lock:
+            if self._changes and self._changes[0] == version:
+                return self._changes[1]
+            rows = BikeBuyAndSell.objects.filter(updated_at__gt=self.built_at).values_list('id', 'status', *FIELDS)
+            changed, approved, vectors = [], [], []
+            for pk, status, *fields in rows:
+                changed.append(pk)
+                if status == 'Approved':
+                    approved.append(pk)
+                    vectors.append(self.encoder.vector(*fields))
+            result = (
+                self.positions(changed),
+                np.array(approved, dtype=np.int64),
+                np.vstack(vectors) if vectors else np.empty((0, DIMENSIONS), dtype=np.float32),
+            )
+            self._changes = (version, result)
+            return result
+
+    def nearest(self, bike, count):
+        """Ids of the count bikes most similar to bike, best first"""
+        stale, changed_ids, changed_vectors = self.changes()
+        own = self.positions([bike.pk])
+        if len(own) and own[0] not in stale:
+            query = np.array(self.vectors[own[0]])
+        else:
+            query = self.encoder.vector(bike.name, bike.description, bike.category_id, bike.price)
+
+        probed = np.argsort(self.centroids @ query)[-PROBES:]
+        ranges = [(self.offsets[c], self.offsets[c + 1]) for c in probed if self.offsets[c] < self.offsets[c + 1]]
+        candidates = [(float(score), int(pk)) for pk, score in zip(changed_ids, changed_vectors @ query) if pk != bike.pk]
+        if ranges:
+            rows = np.concatenate([np.arange(start, end) for start, end in ranges])
+            scores = np.concatenate([self.vectors[start:end] @ query for start, end in ranges])
+            scores[np.isin(rows, np.concatenate([stale, own]))] = -np.inf
+            top = np.argpartition(scores, -count)[-count:] if len(scores) > count else np.arange(len(scores))
+            candidates += [(float(scores[i]), int(self.ids[rows[i]])) for i in top if scores[i] > -np.inf]
+        return [pk for _, pk in sorted(candidates, reverse=True)[:count]]
+
+
+def cluster(vectors, clusters, seed=0, iterations=10, sample=50000):
+    """Spherical k-means: (centroids, cluster of every row)"""
+    if not len(vectors):
+        return np.zeros((clusters, DIMENSIONS), dtype=np.float32), np.empty(0, dtype=np.int64)
+    rng = np.random.default_rng(seed)
+    training = vectors[rng.choice(len(vectors), min(sample, len(vectors)), replace=False)]
+    centroids = training[rng.choice(len(training), clusters, replace=False)]
+    for _ in range(iterations):
+        assigned = np.argmax(training @ centroids.T, axis=1)
+        for c in range(clusters):
+            members = training[assigned == c]
+            # An empty cluster restarts from a random row
+            centroid = members.sum(axis=0) if len(members) else training[rng.integers(len(training))]
+            centroids[c] = centroid / (np.linalg.norm(centroid) or 1)
+    assigned = np.concatenate([np.argmax(vectors[i:i + 50000] @ centroids.T, axis=1)
+                               for i in range(0, len(vectors), 50000)])
+    return centroids, assigned
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def load_index(directory=None):
+    """The current VectorIndex of directory, or None without NumPy or an index built with DIMENSIONS"""
+    if np is None:
+        return None
+    directory = directory or settings.SIMILAR_INDEX_DIR
+    try:
+        stamp = os.stat(os.path.join(directory, META_FILE)).st_mtime_ns
+    except FileNotFoundError:
+        return None
+    index = _indexes.get(directory)
+    if index is None or index.stamp != stamp:
+        with _indexes_lock:
+            index = _indexes.get(directory)
+            if index is None or index.stamp != stamp:
+                with open(os.path.join(directory, META_FILE)) as f:
+                    meta = json.load(f)
+                if meta.get('dimensions') != DIMENSIONS:
+                    return None  # built by another version; rebuild it
+                index = _indexes[directory] = VectorIndex(directory, meta, stamp)
+    return index
+
+
+def build_index(directory=None, chunk_size=5000):
+    """Write a new index of every approved bike to directory; returns the number of bikes"""
+    if np is None:
+        raise ImproperlyConfigured('The similar bikes index needs NumPy')
+    directory = directory or settings.SIMILAR_INDEX_DIR
+    # Taken first: anything saved while the build runs is picked up as a change
+    built_at = timezone.now()
+    approved = BikeBuyAndSell.objects.filter(status='Approved').order_by('id')
+    summary = approved.aggregate(count=Count('id'), low=Min('price'), high=Max('price'))
+
+    document_frequency = Counter()
+    for fields in approved.values_list('name', 'description', 'category_id').iterator(chunk_size=chunk_size):
+        document_frequency.update(term_counts(*fields).keys())
+    documents = summary['count']
+    idf = {term: math.log((1 + documents) / (1 + df)) + 1 for term, df in document_frequency.items()}
+    log_price_range = [math.log(max(summary['low'] or 1, 1)), math.log(max(summary['high'] or 1, 1))]
+    encoder = Encoder(idf, math.log(1 + documents) + 1, log_price_range)
+
+    ids = np.zeros(documents, dtype=np.int64)
+    vectors = np.zeros((documents, DIMENSIONS), dtype=np.float32)
+    written = 0
+    for pk, *fields in approved.values_list('id', *FIELDS).iterator(chunk_size=chunk_size):
+        if written == documents:
+            break  # approved after the count; read back as a change
+        ids[written] = pk
+        vectors[written] = encoder.vector(*fields)
+        written += 1
+
+    ids, vectors = ids[:written], vectors[:written]
+    centroids, assigned = cluster(vectors, max(1, min(MAX_CLUSTERS, written // ROWS_PER_CLUSTER)))
+    order = np.argsort(assigned, kind='stable')
+    offsets = np.searchsorted(assigned[order], np.arange(len(centroids) + 1))
+
+    stamp = built_at.strftime('%Y%m%d%H%M%S%f')
+    os.makedirs(directory, exist_ok=True)
+    arrays = {'ids': ids[order], 'vectors': vectors[order], 'centroids': centroids, 'offsets': offsets}
+    meta = {name: f'{name}-{stamp}.npy' for name in arrays}
+    meta.update({
+        'built_at': built_at.isoformat(),
+        'dimensions': DIMENSIONS,
+        'idf': idf,
+        'default_idf': encoder.default_idf,
+        'log_price_range': log_price_range,
+    })
+    for name, array in arrays.items():
+        np.save(os.path.join(directory, meta[name]), array)
+    with open(os.path.join(directory, META_FILE + '.tmp'), 'w') as f:
+        json.dump(meta, f)
+    os.replace(os.path.join(directory, META_FILE + '.tmp'), os.path.join(directory, META_FILE))
+    # Processes still mapping an old matrix keep it until they reload
+    for name in os.listdir(directory):
+        if name.endswith('.npy') and name not in meta.values():
+            os.remove(os.path.join(directory, name))
+    return written
+
+
+def with_cover(queryset):
+    cover = BikeBuyAndSellImage.objects.filter(bike_buy_and_sell=OuterRef('pk')).order_by('id').values('image')[:1]
+    return queryset.annotate(cover=Subquery(cover))
+
+
+def nearest_price(bike, count):
+    """The count approved bikes of bike's category closest to it in price, in one query"""
+    same = BikeBuyAndSell.objects.filter(status='Approved', category_id=bike.category_id).exclude(pk=bike.pk)
+    above = same.filter(price__gte=bike.price).order_by('price', 'id').values('id')[:count]
+    below = same.filter(price__lt=bike.price).order_by('-price', '-id').values('id')[:count]
+    nearest = with_cover(BikeBuyAndSell.objects.filter(Q(pk__in=above) | Q(pk__in=below)))
+    return sorted(nearest, key=lambda other: (abs(other.price - bike.price), other.pk))[:count]
+
+
+def similar_bikes(bike, count=SIMILAR_COUNT):
+    """Approved bikes like bike, most similar first, with their cover image path; cached by catalog version"""
+    def compute():
+        index = load_index()
+        if index is None:
+            return nearest_price(bike, count)
+        # Some of the nearest may have been deleted or unapproved since the build
+        ids = index.nearest(bike, count * 2)
+        found = with_cover(BikeBuyAndSell.objects.filter(pk__in=ids, status='Approved')).in_bulk()
+        return [found[pk] for pk in ids if pk in found][:count]
+
+    return get_or_compute(f'similar:{catalog_version()}:{bike.pk}:{count}', compute, SIMILAR_TIMEOUT)
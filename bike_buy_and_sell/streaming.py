@@ -0,0 +1,72 @@
+"""
+Streaming template rendering.
+
+render_streaming() sends a page as it renders: each top-level node of the
+root template (for our pages, base.html) goes out as soon as it is done,
+so the <head> and navbar reach the browser, which starts fetching CSS and
+JS, while the content block is still running its queries.
+
+The body renders after the middleware has returned, so:
+- flash messages are marked as shown before streaming starts;
+- replica routing from @use_replica, and the primary pin of a client
+  that just wrote, are restored around the rendering;
+- templates rendered this way must not use {% csrf_token %}, because the
+  CSRF cookie can no longer be set once rendering starts.
+Pages on their way into the anonymous page cache are rendered in full,
+since the cache stores whole pages, and so is everything when
+STREAMING_RENDER is off.
+"""
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.http import StreamingHttpResponse
+from django.shortcuts import render
+from django.template.context import make_context
+from django.template.loader import get_template
+from django.template.loader_tags import BLOCK_CONTEXT_KEY, BlockContext, BlockNode, ExtendsNode
+
+from .routers import is_pinned, primary_reads, reads_from_replica, replica_reads
+
+
+def render_streaming(request, template_name, context=None, content_type=None, status=None):
+    if not settings.STREAMING_RENDER or getattr(request, 'page_cache_csrf', False):
+        return render(request, template_name, context, content_type, status)
+    list(get_messages(request))
+    template = get_template(template_name)
+    chunks = stream_template(template, context, request, reads_from_replica(), is_pinned())
+    return StreamingHttpResponse(chunks, content_type=content_type, status=status)
+
+
+def stream_template(template, context, request, replica=False, pinned=False):
+    engine_template = template.template
+    context = make_context(context, request, autoescape=template.backend.engine.autoescape)
+    with context.render_context.push_state(engine_template), context.bind_template(engine_template), \
+            ExitStack() as routing:
+        context.template_name = engine_template.name
+        if replica:
+            routing.enter_context(replica_reads())
+        if pinned:
+            # PrimaryPinningMiddleware has already reset the pin: keep reading this client's own writes
+            routing.enter_context(primary_reads())
+        yield from stream_nodes(engine_template, context)
+
+
+def extends_node(template):
+    return next((node for node in template.nodelist if isinstance(node, ExtendsNode)), None)
+
+
+def stream_nodes(template, context):
+    """ExtendsNode.render, yielding the root template's top-level nodes one at a time"""
+    extends = extends_node(template)
+    if extends is None:
+        for node in template.nodelist:
+            yield node.render_annotated(context)
+        return
+    block_context = context.render_context.setdefault(BLOCK_CONTEXT_KEY, BlockContext())
+    block_context.add_blocks(extends.blocks)
+    parent = extends.get_parent(context)
+    if extends_node(parent) is None:
+        block_context.add_blocks({node.name: node for node in parent.nodelist.get_nodes_by_type(BlockNode)})
+    with context.render_context.push_state(parent, isolated_context=False):
+        yield from stream_nodes(parent, context)
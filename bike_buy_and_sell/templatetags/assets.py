@@ -0,0 +1,11 @@
+from django import template
+
+from .. import vendor
+
+register = template.Library()
+
+
+@register.simple_tag
+def vendor_url(name):
+    """URL of a third-party asset listed in vendor.VENDOR_ASSETS"""
+    return vendor.vendor_url(name)
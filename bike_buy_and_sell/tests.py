@@ -1,3 +1,1263 @@
-from django.test import TestCase
+import gzip
+import json
+import os
+import random
+import re
+import shutil
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from io import StringIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth import authenticate
+from django.contrib.auth.models import User
+from django.contrib.sessions.models import Session
+from django.core.cache import cache, caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .cache import get_or_compute
+from .catalog import catalog_version
+from .instrumentation import stats as performance
+from . import (
+    accounts, archive, facets, moderation, profiling, registry, reservations, saved_searches, search, similar, storage,
+    urls, vendor,
+)
+from .management.commands._bench import run_in_scratch_db
+from .middleware import PrimaryPinningMiddleware
+from .models import (
+    ArchivedChatMessage, ArchivedOrder, BikeBuyAndSell, BikeBuyAndSellImage, Category, ChatMessage, ListingApproval,
+    OrderItem, Orders, Profile, SavedSearch, SearchAlert,
+)
+from .query_budget import QueryBudgetTestCase
+from .routers import PrimaryReplicaRouter, replica_reads, reset_routing
+
+
+class CatalogDataMixin:
+    @classmethod
+    def setUpTestData(cls):
+        cls.seller = User.objects.create_user('seller', 'seller@example.com', 'pass12345')
+        cls.buyer = User.objects.create_user('buyer', 'buyer@example.com', 'pass12345')
+        cls.staff = User.objects.create_user('staff', 'staff@example.com', 'pass12345', is_staff=True)
+        cls.category = Category.objects.create(name='Sports')
+        cls.bike = BikeBuyAndSell.objects.create(
+            name='Yamaha R15', price=450000, description='Well kept', category=cls.category,
+            user=cls.seller, status='Approved',
+        )
+
+
+@override_settings(DATABASE_REPLICAS=['replica1'])
+class ReplicaRoutingTests(CatalogDataMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+
+    @contextmanager
+    def record_reads(self):
+        """Record where each read would be routed while still running it on 'default'"""
+        routed = []
+        real_db_for_read = PrimaryReplicaRouter.db_for_read
+
+        def db_for_read(router, model, **hints):
+            routed.append((model._meta.label, real_db_for_read(router, model, **hints)))
+            return 'default'
+
+        with mock.patch.object(PrimaryReplicaRouter, 'db_for_read', db_for_read):
+            yield routed
+
+    def bike_reads(self, routed):
+        return {alias for label, alias in routed if label == 'bike_buy_and_sell.BikeBuyAndSell'}
+
+    def test_catalog_views_read_from_replica(self):
+        urls = [
+            reverse('bike_buy_and_sell:bike_index'),
+            reverse('bike_buy_and_sell:buy_list'),
+            reverse('bike_buy_and_sell:search') + '?query=Yamaha',
+            reverse('bike_buy_and_sell:product_detail', args=[self.bike.id]),
+            reverse('bike_buy_and_sell:category_based_bike', args=[self.category.id]),
+        ]
+        for url in urls:
+            with self.subTest(url=url), self.record_reads() as routed:
+                self.assertEqual(self.client.get(url).status_code, 200)
+                self.assertEqual(self.bike_reads(routed), {'replica1'})
+
+    def test_admin_dashboard_reads_from_replica(self):
+        self.client.force_login(self.staff)
+        with self.record_reads() as routed:
+            self.assertEqual(self.client.get(reverse('admin:admin_dashboard')).status_code, 200)
+        self.assertEqual(self.bike_reads(routed), {'replica1'})
+
+    def test_seller_views_read_from_primary(self):
+        self.client.force_login(self.seller)
+        with self.record_reads() as routed:
+            self.assertEqual(self.client.get(reverse('bike_buy_and_sell:sell_list')).status_code, 200)
+        self.assertEqual(self.bike_reads(routed), {'default'})
+
+    def test_sessions_always_read_from_primary(self):
+        reset_routing()
+        with replica_reads():
+            self.assertEqual(PrimaryReplicaRouter().db_for_read(Session), 'default')
+
+    def test_order_create_pins_client_to_primary(self):
+        self.client.force_login(self.buyer)
+        self.client.post(reverse('bike_buy_and_sell:cart_add', args=[self.bike.id]))
+        response = self.client.post(reverse('bike_buy_and_sell:order_create'), {
+            'email': 'buyer@example.com', 'mobile': '0123456789', 'address': 'Dhaka',
+        })
+        self.assertIn(PrimaryPinningMiddleware.cookie_name, response.cookies)
+
+        with self.record_reads() as routed:
+            self.client.get(reverse('bike_buy_and_sell:buy_list'))
+        self.assertEqual(self.bike_reads(routed), {'default'})
+
+    def test_streamed_page_keeps_the_pin(self):
+        self.client.cookies[PrimaryPinningMiddleware.cookie_name] = '1'
+        with self.record_reads() as routed:
+            response = self.client.get(reverse('bike_buy_and_sell:category_based_bike', args=[self.category.id]))
+            self.assertTrue(response.streaming)
+            b''.join(response.streaming_content)  # the content block reads while streaming
+        self.assertEqual(self.bike_reads(routed), {'default'})
+
+    def test_chat_post_pins_client_to_primary(self):
+        self.client.force_login(self.buyer)
+        response = self.client.post(reverse('bike_buy_and_sell:chat_support'), {'message': 'Hello'})
+        self.assertIn(PrimaryPinningMiddleware.cookie_name, response.cookies)
+
+    def test_write_pins_rest_of_request(self):
+        router = PrimaryReplicaRouter()
+        reset_routing()
+        with replica_reads():
+            self.assertEqual(router.db_for_read(BikeBuyAndSell), 'replica1')
+            self.assertEqual(router.db_for_write(BikeBuyAndSell), 'default')
+            self.assertEqual(router.db_for_read(BikeBuyAndSell), 'default')
+        reset_routing()
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_no_replicas_configured(self):
+        with replica_reads():
+            self.assertEqual(PrimaryReplicaRouter().db_for_read(BikeBuyAndSell), 'default')
+
+
+@override_settings(CACHES={
+    'default': {
+        'BACKEND': 'bike_buy_and_sell.cache.TwoTierCache',
+        'LOCATION': 'shared',
+        'OPTIONS': {'L1_MAX_ENTRIES': 2, 'L1_TIMEOUT': 5},
+    },
+    # Local stand-in for the shared file/Redis cache
+    'shared': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'two-tier-tests'},
+})
+class TwoTierCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        cache.reset_stats()
+
+    def test_l1_is_filled_from_l2(self):
+        caches['shared'].set('greeting', 'hello')
+        self.assertEqual(cache.get('greeting'), 'hello')
+        self.assertEqual(cache.get('greeting'), 'hello')
+        stats = cache.stats()
+        self.assertEqual((stats['l2_hits'], stats['l1_hits']), (1, 1))
+
+    def test_l1_is_bounded(self):
+        for key in ('a', 'b', 'c'):
+            cache.set(key, key)
+        self.assertEqual(cache.stats()['l1_entries'], 2)
+        self.assertEqual(cache.get('a'), 'a')  # still served by L2
+
+    def test_delete_removes_both_tiers(self):
+        cache.set('greeting', 'hello')
+        cache.delete('greeting')
+        self.assertIsNone(cache.get('greeting'))
+        self.assertIsNone(caches['shared'].get('greeting'))
+
+    def test_concurrent_misses_compute_once(self):
+        calls = []
+        barrier = threading.Barrier(20)
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.05)
+            return 'value'
+
+        def reader():
+            barrier.wait()
+            self.assertEqual(get_or_compute('herd', compute, 60), 'value')
+
+        threads = [threading.Thread(target=reader) for _ in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(cache._flights, {})
+
+    def test_flight_locks_are_dropped_after_compute(self):
+        for n in range(100):
+            get_or_compute(f'facets:range:1:{n}:{n + 1}', lambda: n, 60)
+        with mock.patch('bike_buy_and_sell.cache.TwoTierCache._refresh_early', return_value=True):
+            get_or_compute('facets:range:1:0:1', lambda: 'new', 60)
+        self.assertEqual(cache._flights, {})
+
+    def test_early_refresh_serves_current_value_while_refreshing(self):
+        get_or_compute('herd', lambda: 'old', 60)
+        # Close enough to expiry that a refresh is always due
+        with mock.patch('bike_buy_and_sell.cache.TwoTierCache._refresh_early', return_value=True):
+            self.assertEqual(get_or_compute('herd', lambda: 'new', 60), 'new')
+        self.assertEqual(cache.stats()['early_refreshes'], 1)
+
+
+class HybridSessionTests(CatalogDataMixin, TestCase):
+    def test_browsing_sets_no_session_cookie(self):
+        response = self.client.get(reverse('bike_buy_and_sell:bike_index'))
+        self.assertEqual(response.cookies.keys() & {'sessionid', 'anon_session'}, set())
+
+    def test_anonymous_cart_lives_in_signed_cookie(self):
+        self.client.post(reverse('bike_buy_and_sell:cart_add', args=[self.bike.id]))
+        self.assertIn('anon_session', self.client.cookies)
+        self.assertFalse(Session.objects.exists())
+        response = self.client.get(reverse('bike_buy_and_sell:cart_detail'))
+        self.assertContains(response, 'Yamaha R15')
+
+    def test_login_moves_cart_to_server_session(self):
+        self.client.post(reverse('bike_buy_and_sell:cart_add', args=[self.bike.id]))
+        response = self.client.post(reverse('bike_buy_and_sell:login'), {'username': 'buyer', 'password': 'pass12345'})
+        self.assertEqual(response.cookies['anon_session'].value, '')
+        self.assertEqual(Session.objects.count(), 1)
+        response = self.client.get(reverse('bike_buy_and_sell:cart_detail'))
+        self.assertContains(response, 'Yamaha R15')
+
+
+class ProfileWriteTests(CatalogDataMixin, TestCase):
+    @contextmanager
+    def capture_writes(self):
+        writes = []
+
+        def record(execute, sql, *args):
+            if sql.lstrip().split(None, 1)[0].upper() in ('INSERT', 'UPDATE', 'DELETE'):
+                writes.append(sql)
+            return execute(sql, *args)
+
+        with connection.execute_wrapper(record):
+            yield writes
+
+    def test_login_writes_last_login_and_session_only(self):
+        with self.capture_writes() as writes:
+            response = self.client.post(reverse('bike_buy_and_sell:login'), {'username': 'buyer', 'password': 'pass12345'})
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual([re.search(r'(?:INTO|UPDATE) "(\w+)"', sql).group(1) for sql in writes],
+                         ['auth_user', 'django_session'])
+
+    def test_signup_creates_profile_once(self):
+        with self.capture_writes() as writes:
+            user = User.objects.create_user('newbie', 'newbie@example.com', 'pass12345')
+        self.assertEqual(Profile.objects.filter(user=user).count(), 1)
+        self.assertEqual(sum('bike_buy_and_sell_profile' in sql for sql in writes), 1)
+
+    def test_unchanged_profile_form_writes_nothing(self):
+        self.buyer.first_name, self.buyer.last_name = 'Rafi', 'Ahmed'
+        self.buyer.save()
+        self.client.force_login(self.buyer)
+        with self.capture_writes() as writes:
+            response = self.client.post(reverse('bike_buy_and_sell:update_profile'), {
+                'first_name': 'Rafi', 'last_name': 'Ahmed', 'email': 'buyer@example.com',
+            })
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual([sql for sql in writes if 'auth_user' in sql or 'profile' in sql], [])
+
+    def test_profile_page_is_two_queries(self):
+        self.client.force_login(self.buyer)
+        with self.assertNumQueries(2):  # session user, profile
+            self.client.get(reverse('bike_buy_and_sell:profile'))
+
+
+class EmailLookupTests(CatalogDataMixin, TestCase):
+    def test_registration_rejects_email_in_other_case(self):
+        response = self.client.post(reverse('bike_buy_and_sell:registration'), {
+            'username': 'buyer2', 'first_name': 'B', 'last_name': 'Two', 'email': ' Buyer@Example.COM',
+            'password1': 'Str0ng-pass-123', 'password2': 'Str0ng-pass-123',
+        })
+        self.assertContains(response, 'This email is already registered.')
+        self.assertFalse(User.objects.filter(username='buyer2').exists())
+
+    def test_profile_update_rejects_another_accounts_email(self):
+        self.client.force_login(self.buyer)
+        url = reverse('bike_buy_and_sell:update_profile')
+        response = self.client.post(url, {'first_name': 'B', 'last_name': 'One', 'email': 'SELLER@example.com'})
+        self.assertContains(response, 'This email is already registered.')
+        self.buyer.refresh_from_db()
+        self.assertEqual(self.buyer.email, 'buyer@example.com')
+
+        response = self.client.post(url, {'first_name': 'B', 'last_name': 'One', 'email': 'Buyer@example.com'})
+        self.assertEqual(response.status_code, 302)  # the buyer's own address, in another case
+
+    def test_lookup_uses_lower_email_index(self):
+        self.assertIn('auth_user_email_lower_idx', accounts.users_with_email('buyer@example.com').explain())
+
+    def test_login_with_email(self):
+        response = self.client.post(reverse('bike_buy_and_sell:login'), {'username': 'Buyer@example.com', 'password': 'pass12345'})
+        self.assertRedirects(response, reverse('bike_buy_and_sell:bike_index'), fetch_redirect_response=False)
+        self.assertEqual(int(self.client.session['_auth_user_id']), self.buyer.pk)
+
+    def test_shared_email_logs_nobody_in(self):
+        User.objects.create_user('buyer-alt', 'BUYER@example.com', 'pass12345')
+        self.assertIsNone(authenticate(username='buyer@example.com', password='pass12345'))
+        self.assertEqual(authenticate(username='buyer', password='pass12345'), self.buyer)
+
+
+class OrderHistoryTests(CatalogDataMixin, TestCase):
+    def setUp(self):
+        self.client.force_login(self.buyer)
+
+    def add_orders(self, count, items=2):
+        orders = Orders.objects.bulk_create(
+            Orders(user=self.buyer, email='buyer@example.com', mobile='017', address='Dhaka', total_price='900000')
+            for _ in range(count)
+        )
+        OrderItem.objects.bulk_create(
+            OrderItem(order=order, bike_buy_and_sell=self.bike, price=450000, quantity=1)
+            for order in orders for _ in range(items)
+        )
+        return orders
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries), response
+
+    def test_history_is_constant_queries_and_keyset_paginated(self):
+        url = reverse('bike_buy_and_sell:booking_list')
+        self.add_orders(1)
+        few, _ = self.count_queries(url)
+        orders = self.add_orders(60)
+        many, response = self.count_queries(url)
+        self.assertEqual(few, many)
+        self.assertEqual(len(response.context['booking_list']), 25)
+        self.assertEqual(response.context['booking_list'].items[0].item_count, 2)
+        self.assertEqual(response.context['booking_list'].items[0].items_total, 900000)
+
+        _, older = self.count_queries(f'{url}?{response.context["older_query"]}')
+        self.assertEqual(older.context['booking_list'].items[0].pk, orders[-26].pk)
+        self.assertContains(older, 'Newest')
+
+    def test_order_details_is_constant_queries(self):
+        BikeBuyAndSellImage.objects.create(bike_buy_and_sell=self.bike, image='bike_buy_and_sell_images/cover.jpg')
+        small, large = self.add_orders(1, items=1)[0], self.add_orders(1, items=10)[0]
+        few, _ = self.count_queries(reverse('bike_buy_and_sell:order_details', args=[small.id]))
+        many, response = self.count_queries(reverse('bike_buy_and_sell:order_details', args=[large.id]))
+        self.assertEqual(few, many)
+        self.assertContains(response, 'bike_buy_and_sell_images/cover.jpg', count=10)
+
+
+class SellerDashboardTests(CatalogDataMixin, TestCase):
+    def setUp(self):
+        self.client.force_login(self.seller)
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def listing(self, **data):
+        return {'name': 'Suzuki Gixxer', 'price': 250000, 'description': 'New', 'category': self.category.id, **data}
+
+    def image(self):
+        return SimpleUploadedFile('bike.gif', b'GIF89a\x01\x00\x01\x00\x00\xff\x00,\x00\x00\x00\x00\x01\x00\x01\x00\x00\x02\x00;',
+                                  content_type='image/gif')
+
+    def test_both_sell_forms_create_through_the_service(self):
+        for url in (reverse('bike_buy_and_sell:sell'), reverse('bike_buy_and_sell:sell_list')):
+            with self.subTest(url=url):
+                response = self.client.post(url, self.listing(image=self.image()))
+                self.assertRedirects(response, reverse('bike_buy_and_sell:sell_list'), fetch_redirect_response=False)
+                response = self.client.post(url, self.listing(name='No photos'), follow=True)
+                self.assertContains(response, 'At least one image is required.')
+        self.assertEqual(BikeBuyAndSell.objects.filter(name='Suzuki Gixxer', status='Pending').count(), 2)
+        self.assertFalse(BikeBuyAndSell.objects.filter(name='No photos').exists())
+
+    def test_search_uses_name_index_and_follows_renames(self):
+        url = reverse('bike_buy_and_sell:sell_list')
+        response = self.client.get(url, {'search': 'yam r1'})
+        self.assertEqual([bike.pk for bike in response.context['bike_buy_and_sell']], [self.bike.pk])
+        self.assertIn('bike_buy_and_sell_bike_fts', str(search.filter_by_name(BikeBuyAndSell.objects.all(), 'yam').query))
+        self.bike.name = 'Honda CBR'
+        self.bike.save()
+        self.assertEqual(len(self.client.get(url, {'search': 'yamaha'}).context['bike_buy_and_sell']), 0)
+        self.assertEqual(len(self.client.get(url, {'search': 'cbr'}).context['bike_buy_and_sell']), 1)
+
+    def test_status_tabs_pages_and_constant_queries(self):
+        url = reverse('bike_buy_and_sell:sell_list')
+        with CaptureQueriesContext(connection) as few:
+            self.client.get(url)
+        bikes = BikeBuyAndSell.objects.bulk_create(
+            BikeBuyAndSell(name=f'Dealer bike {n}', price=1000, description='-', category=self.category, user=self.seller)
+            for n in range(30)
+        )
+        BikeBuyAndSellImage.objects.bulk_create(
+            BikeBuyAndSellImage(bike_buy_and_sell=bike, image=f'bike_buy_and_sell_images/{bike.pk}.jpg') for bike in bikes
+        )
+        with CaptureQueriesContext(connection) as many:
+            response = self.client.get(url)
+        self.assertEqual(len(few), len(many))
+        self.assertEqual(response.context['status_tabs'], [
+            ('Pending', 'Pending', 30), ('Approved', 'Approved', 1), ('Rejected', 'Rejected', 0),
+            ('Reserved', 'Reserved', 0), ('Sold', 'Sold', 0),
+        ])
+        self.assertEqual(len(response.context['bike_buy_and_sell']), 24)
+        self.assertContains(response, f'bike_buy_and_sell_images/{bikes[-1].pk}.jpg')
+        older = self.client.get(f'{url}?{response.context["older_query"]}')
+        self.assertEqual(len(older.context['bike_buy_and_sell']), 7)
+        pending = self.client.get(url, {'status': 'Approved'})
+        self.assertEqual([bike.pk for bike in pending.context['bike_buy_and_sell']], [self.bike.pk])
+
+
+class ModerationQueueTests(CatalogDataMixin, TestCase):
+    def setUp(self):
+        self.client.force_login(self.staff)
+        self.url = reverse('admin:moderation_queue')
+        self.pending = BikeBuyAndSell.objects.bulk_create(
+            BikeBuyAndSell(name=f'Pending bike {n}', price=1000, description='-', category=self.category, user=self.seller)
+            for n in range(60)
+        )
+        BikeBuyAndSellImage.objects.bulk_create(
+            BikeBuyAndSellImage(bike_buy_and_sell=bike, image=f'bike_buy_and_sell_images/{bike.pk}.jpg') for bike in self.pending
+        )
+
+    def test_staff_only(self):
+        self.client.force_login(self.seller)
+        self.assertEqual(self.client.get(self.url).status_code, 302)
+
+    def test_oldest_first_pages_in_constant_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        first = [bike.pk for bike in response.context['listings']]
+        self.assertEqual(first, [bike.pk for bike in self.pending[:moderation.MODERATION_PAGE_SIZE]])
+        self.assertEqual(response.context['pending_count'], 60)
+        self.assertContains(response, f'bike_buy_and_sell_images/{self.pending[0].pk}.jpg')
+        with CaptureQueriesContext(connection) as later:
+            rest = self.client.get(f'{self.url}?{response.context["next_query"]}')
+        self.assertEqual([bike.pk for bike in rest.context['listings']], [bike.pk for bike in self.pending[50:]])
+        self.assertIsNone(rest.context['next_query'])
+        self.assertEqual(len(queries), len(later))
+
+    def test_batch_is_one_update_and_one_version_bump(self):
+        ids = [bike.pk for bike in self.pending[:40]] + [self.bike.pk]
+        with mock.patch('bike_buy_and_sell.moderation.bump_catalog_version') as bump, \
+                CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.url, {'action': 'approve', 'ids': ids})
+        self.assertRedirects(response, self.url, fetch_redirect_response=False)
+        bump.assert_called_once_with()
+        self.assertEqual(sum(query['sql'].startswith('UPDATE "bike_buy_and_sell_bikebuyandsell"') for query in queries), 1)
+        self.assertEqual(BikeBuyAndSell.objects.filter(status='Approved').count(), 41)
+
+        # Already decided listings are skipped
+        self.assertEqual(moderation.moderate(ids[:5] + [self.pending[-1].pk], 'Rejected'), 1)
+        self.assertEqual(BikeBuyAndSell.objects.get(pk=self.pending[-1].pk).status, 'Rejected')
+        self.assertEqual(self.client.get(self.url).context['pending_count'], 19)
+
+    def test_approving_a_sold_bike_leaves_it_sold(self):
+        ListingApproval.objects.all().delete()
+        BikeBuyAndSell.objects.filter(pk=self.bike.pk).update(status='Sold', reserved_by=self.buyer)
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'pass12345'))
+        response = self.client.post(reverse('admin:bike_buy_and_sell_bikebuyandsell_changelist'), {
+            'action': 'approve_listings', '_selected_action': [self.bike.pk, self.pending[0].pk],
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(BikeBuyAndSell.objects.get(pk=self.bike.pk).status, 'Sold')
+        self.assertEqual(BikeBuyAndSell.objects.get(pk=self.pending[0].pk).status, 'Approved')
+        self.assertEqual(list(ListingApproval.objects.values_list('bike_buy_and_sell', flat=True)), [self.pending[0].pk])
+
+
+class FacetTests(CatalogDataMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.touring = Category.objects.create(name='Touring')
+        self.bikes = BikeBuyAndSell.objects.bulk_create(
+            BikeBuyAndSell(name=f'Bike {price}', price=price, description='-', category=category, user=self.seller,
+                           status='Approved')
+            for price, category in [(30000, self.category), (75000, self.category), (75000, self.touring),
+                                    (250000, self.touring), (900000, self.touring)]
+        )
+
+    def expected_grid(self):
+        grid = {}
+        for bike in BikeBuyAndSell.objects.filter(status='Approved'):
+            key = (bike.category_id, facets.price_bucket(bike.price))
+            grid[key] = grid.get(key, 0) + 1
+        return grid
+
+    def test_triggers_follow_saves_updates_and_deletes(self):
+        self.assertEqual(facets.facet_grid(), self.expected_grid())
+        pending = BikeBuyAndSell.objects.create(name='New', price=120000, description='-', category=self.touring,
+                                                user=self.seller)
+        moderation.moderate([pending.pk], 'Approved')
+        self.bikes[0].price = 450000
+        self.bikes[0].save()
+        BikeBuyAndSell.objects.filter(pk=self.bikes[1].pk).update(category=self.touring)
+        moderation.set_status(BikeBuyAndSell.objects.filter(pk=self.bikes[2].pk), 'Pending')
+        self.bikes[3].delete()
+        self.assertEqual(facets.facet_grid(), self.expected_grid())
+        self.assertEqual(facets.count_grid(), self.expected_grid())
+
+    def test_buy_list_counts_follow_the_other_filters(self):
+        url = reverse('bike_buy_and_sell:buy_list')
+        response = self.client.get(url)
+        self.assertEqual([(o.label, o.count) for o in response.context['facets']['categories']],
+                         [('Sports', 3), ('Touring', 3)])
+        self.assertEqual([o.count for o in response.context['facets']['prices']], [1, 2, 0, 1, 2])
+        self.assertContains(response, 'Touring <span class="badge bg-light text-dark">3</span>')
+
+        prices = self.client.get(url, {'category': self.touring.pk}).context['facets']['prices']
+        self.assertEqual([o.count for o in prices], [0, 1, 0, 1, 1])
+        self.assertIn('min_price=50000&max_price=99999', prices[1].query)
+
+        with CaptureQueriesContext(connection) as queries:
+            in_bucket = facets.category_counts(50000, 99999)
+        self.assertEqual(in_bucket, {self.category.pk: 1, self.touring.pk: 1})
+        self.assertFalse([q for q in queries if 'bikebuyandsell' in q['sql']])
+        self.assertEqual(facets.category_counts(60000, 260000), {self.category.pk: 1, self.touring.pk: 2})
+
+
+class SimilarBikesTests(CatalogDataMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        index_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, index_dir)
+        settings_override = override_settings(SIMILAR_INDEX_DIR=index_dir)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.touring = Category.objects.create(name='Touring')
+        listings = [
+            ('Yamaha R15 V4', 'Racing sport bike, fuel injected', self.category, 460000),
+            ('Yamaha R15 V3', 'Racing sport bike, well kept', self.category, 380000),
+            ('Suzuki Gixxer SF', 'Sport bike with fairing', self.category, 300000),
+            ('Honda CB Shine', 'Commuter, great mileage', self.category, 90000),
+            ('Royal Enfield Himalayan', 'Adventure touring bike', self.touring, 450000),
+        ]
+        self.bikes = BikeBuyAndSell.objects.bulk_create(
+            BikeBuyAndSell(name=name, price=price, description=description, category=category, user=self.seller,
+                           status='Approved')
+            for name, description, category, price in listings
+        )
+
+    def test_fallback_is_same_category_nearest_price(self):
+        self.assertIsNone(similar.load_index())  # nothing built yet
+        with self.assertNumQueries(1):
+            bikes = similar.nearest_price(self.bike, 3)
+        self.assertEqual([bike.name for bike in bikes], ['Yamaha R15 V4', 'Yamaha R15 V3', 'Suzuki Gixxer SF'])
+
+    def test_product_detail_lists_similar_bikes(self):
+        BikeBuyAndSellImage.objects.create(bike_buy_and_sell=self.bikes[0], image='bike_buy_and_sell_images/r15v4.jpg')
+        response = self.client.get(reverse('bike_buy_and_sell:product_detail', args=[self.bike.pk]))
+        self.assertEqual(response.context['similar_bikes'][0].pk, self.bikes[0].pk)
+        self.assertNotIn(self.bike.pk, [bike.pk for bike in response.context['similar_bikes']])
+        self.assertContains(response, 'bike_buy_and_sell_images/r15v4.jpg')
+
+    @skipUnless(similar.np, 'NumPy is not installed')
+    def test_vector_index_ranks_by_text_and_follows_edits(self):
+        self.assertEqual(similar.build_index(), 6)
+        index = similar.load_index()
+        self.assertEqual(len(index), 6)
+        self.assertEqual(set(index.nearest(self.bike, 2)), {self.bikes[0].pk, self.bikes[1].pk})
+
+        # Edited and newly approved bikes are read back as changes, without a rebuild
+        self.bikes[3].name, self.bikes[3].description, self.bikes[3].price = 'Yamaha R15 M', 'Racing sport bike', 450000
+        self.bikes[3].save()
+        moderation.set_status(BikeBuyAndSell.objects.filter(pk=self.bikes[0].pk), 'Pending')
+        nearest = index.nearest(self.bike, 2)
+        self.assertIn(self.bikes[3].pk, nearest)
+        self.assertEqual([bike.pk for bike in similar.similar_bikes(self.bike, 2)], nearest)
+        self.assertNotIn(self.bikes[0].pk, [bike.pk for bike in similar.similar_bikes(self.bike)])
+
+    @skipUnless(similar.np, 'NumPy is not installed')
+    def test_index_of_another_width_is_ignored(self):
+        similar.build_index()
+        meta_path = os.path.join(settings.SIMILAR_INDEX_DIR, similar.META_FILE)
+        with open(meta_path) as f:
+            meta = json.load(f)
+        meta['dimensions'] = 64
+        with open(meta_path, 'w') as f:
+            json.dump(meta, f)
+        self.assertIsNone(similar.load_index())
+        self.assertEqual(len(similar.similar_bikes(self.bike, 3)), 3)  # same category, nearest price
+
+
+class SavedSearchTests(CatalogDataMixin, TestCase):
+    def setUp(self):
+        self.touring = Category.objects.create(name='Touring')
+        self.searches = {
+            'sports': SavedSearch.objects.create(user=self.buyer, category=self.category),
+            'cheap': SavedSearch.objects.create(user=self.buyer, max_price=100000),
+            'mid_touring': SavedSearch.objects.create(user=self.buyer, category=self.touring, min_price=100000,
+                                                      max_price=300000),
+            'yamaha': SavedSearch.objects.create(user=self.buyer, query='yam'),
+            'yamaha_r15': SavedSearch.objects.create(user=self.buyer, query='R15 Yamaha', max_price=200000),
+            'honda': SavedSearch.objects.create(user=self.seller, query='Honda'),
+        }
+        ListingApproval.objects.all().delete()  # the fixture bike, created approved
+
+    def pending(self, name, price, category):
+        return BikeBuyAndSell.objects.create(name=name, price=price, description='-', category=category,
+                                             user=self.seller)
+
+    def alerts(self):
+        names = {search.pk: name for name, search in self.searches.items()}
+        return {(names[saved_search], bike) for saved_search, bike in
+                SearchAlert.objects.values_list('saved_search_id', 'bike_buy_and_sell_id')}
+
+    def test_interval_tree_agrees_with_a_scan(self):
+        intervals = [(low, low + width, n) for n, (low, width) in
+                     enumerate((low, width) for low in range(0, 3000, 37) for width in (0, 5, 120, 900))]
+        tree = saved_searches.IntervalTree(intervals)
+        for point in range(-10, 4000, 13):
+            self.assertEqual(sorted(tree.stab(point)), [pk for low, high, pk in intervals if low <= point <= high])
+
+    def test_approvals_are_queued_and_matched_once(self):
+        touring = self.pending('Yamaha FZ', 150000, self.touring)
+        r15 = self.pending('Yamaha R15 V3', 180000, self.category)
+        honda = self.pending('Honda Shine', 90000, self.touring)
+        rejected = self.pending('Honda CBR', 90000, self.category)
+        self.assertFalse(ListingApproval.objects.exists())
+
+        moderation.moderate([touring.pk, r15.pk, rejected.pk], 'Approved')
+        moderation.set_status(BikeBuyAndSell.objects.filter(pk=rejected.pk), 'Pending')
+        honda.status = 'Approved'
+        honda.save()
+        honda.save()  # already approved: not queued again
+        self.assertEqual(ListingApproval.objects.count(), 4)
+
+        self.assertEqual(saved_searches.match_approvals(batch_size=2), (3, 7))
+        self.assertEqual(self.alerts(), {
+            ('mid_touring', touring.pk), ('yamaha', touring.pk),
+            ('sports', r15.pk), ('yamaha', r15.pk), ('yamaha_r15', r15.pk),
+            ('cheap', honda.pk), ('honda', honda.pk),
+        })
+        self.assertFalse(ListingApproval.objects.exists())
+
+        # Approving again only writes the alerts that are missing
+        moderation.moderate([rejected.pk], 'Approved')
+        saved_searches.queue_approvals([r15.pk])
+        self.assertEqual(saved_searches.match_approvals(), (2, 3))
+
+    def test_save_search_and_alert_page(self):
+        self.client.force_login(self.buyer)
+        url = reverse('bike_buy_and_sell:saved_searches')
+        post = {'category': self.touring.pk, 'min_price': '200000', 'max_price': ''}
+        response = self.client.post(reverse('bike_buy_and_sell:save_search'), post)
+        self.assertRedirects(response, url, fetch_redirect_response=False)
+        self.client.post(reverse('bike_buy_and_sell:save_search'), post)
+        saved = SavedSearch.objects.get(user=self.buyer, category=self.touring, min_price=200000)
+        self.assertIsNone(saved.max_price)
+
+        moderation.moderate([self.pending('Royal Enfield Himalayan', 450000, self.touring).pk], 'Approved')
+        saved_searches.match_approvals()
+        response = self.client.get(url)
+        self.assertEqual({search.pk: search.new_alerts for search in response.context['searches']}[saved.pk], 1)
+        self.assertContains(response, 'Royal Enfield Himalayan')
+        self.assertFalse(self.client.get(url).context['alerts'])  # shown once
+
+        self.client.post(url, {'delete': self.searches['honda'].pk})  # not the buyer's
+        self.client.post(url, {'delete': saved.pk})
+        self.assertFalse(SavedSearch.objects.filter(pk=saved.pk).exists())
+        self.assertTrue(SavedSearch.objects.filter(pk=self.searches['honda'].pk).exists())
+
+
+class ReservationTests(CatalogDataMixin, TestCase):
+    def setUp(self):
+        self.checkout = reverse('bike_buy_and_sell:order_create')
+        self.reserve = reverse('bike_buy_and_sell:reserve_cart')
+        self.order = {'email': 'buyer@example.com', 'mobile': '0123456789', 'address': 'Dhaka'}
+        self.rival = Client()
+        self.rival.force_login(self.staff)
+        self.client.force_login(self.buyer)
+        for client in (self.client, self.rival):
+            client.post(reverse('bike_buy_and_sell:cart_add', args=[self.bike.id]))
+
+    def test_checkout_holds_then_sells_the_bike(self):
+        self.assertRedirects(self.client.post(self.reserve), self.checkout)
+        self.assertIsNotNone(self.client.get(self.checkout).context['reserved_until'])
+        self.bike.refresh_from_db()
+        self.assertEqual((self.bike.status, self.bike.reserved_by), ('Reserved', self.buyer))
+        self.assertNotContains(self.client.get(reverse('bike_buy_and_sell:buy_list')), 'Yamaha R15')
+        self.assertNotContains(self.client.get(reverse('bike_buy_and_sell:search'), {'query': 'Yamaha'}), 'Yamaha R15')
+
+        # The rival's checkout drops the held bike from their cart
+        response = self.rival.post(self.reserve, follow=True)
+        self.assertRedirects(response, reverse('bike_buy_and_sell:cart_detail'))
+        self.assertContains(response, 'just sold or reserved by another buyer')
+        self.assertEqual(self.rival.post(self.checkout, self.order).status_code, 302)
+
+        self.client.post(self.checkout, self.order)
+        self.bike.refresh_from_db()
+        self.assertEqual((self.bike.status, self.bike.reserved_until), ('Sold', None))
+        self.assertEqual(list(Orders.objects.values_list('user', flat=True)), [self.buyer.pk])
+        response = self.client.post(reverse('bike_buy_and_sell:cart_add', args=[self.bike.id]), follow=True)
+        self.assertContains(response, 'no longer available')
+
+    def test_only_a_post_reserves(self):
+        version = catalog_version()
+        self.assertIsNone(self.client.get(self.checkout).context['reserved_until'])
+        self.assertEqual(self.client.get(self.reserve).status_code, 405)
+        self.assertEqual(BikeBuyAndSell.objects.get(pk=self.bike.pk).status, 'Approved')
+        self.assertEqual(catalog_version(), version)
+
+    def test_a_sold_bike_fails_the_whole_order(self):
+        other = BikeBuyAndSell.objects.create(name='Honda CBR', price=300000, description='-', category=self.category,
+                                              user=self.seller, status='Approved')
+        self.client.post(reverse('bike_buy_and_sell:cart_add', args=[other.id]))
+        self.client.post(self.reserve)
+        # Hold expired and taken by the rival before the order is placed
+        BikeBuyAndSell.objects.filter(pk=self.bike.pk).update(reserved_until=timezone.now() - timedelta(minutes=1))
+        self.assertEqual(reservations.reserve(self.staff, [self.bike.pk]), {self.bike.pk})
+
+        response = self.client.post(self.checkout, self.order)
+        self.assertRedirects(response, reverse('bike_buy_and_sell:cart_detail'), fetch_redirect_response=False)
+        self.assertFalse(Orders.objects.exists())
+        self.assertEqual(BikeBuyAndSell.objects.get(pk=other.pk).reserved_by, self.buyer)  # still only held
+
+    def test_checking_out_again_keeps_the_catalog_cache(self):
+        self.client.post(self.reserve)
+        version = catalog_version()
+        BikeBuyAndSell.objects.filter(pk=self.bike.pk).update(reserved_until=timezone.now() + timedelta(minutes=1))
+        self.client.post(self.reserve)
+        self.assertEqual(catalog_version(), version)
+        self.bike.refresh_from_db()
+        self.assertGreater(self.bike.reserved_until, timezone.now() + timedelta(minutes=10))  # renewed
+
+    def test_holds_per_buyer_are_capped(self):
+        others = BikeBuyAndSell.objects.bulk_create(
+            BikeBuyAndSell(name=f'Honda CBR {i}', price=300000, description='-', category=self.category,
+                           user=self.seller, status='Approved')
+            for i in range(reservations.MAX_HOLDS)
+        )
+        self.assertEqual(len(reservations.reserve(self.buyer, [bike.pk for bike in others])), reservations.MAX_HOLDS)
+        response = self.client.post(self.reserve, follow=True)
+        self.assertRedirects(response, reverse('bike_buy_and_sell:cart_detail'))
+        self.assertContains(response, f'at most {reservations.MAX_HOLDS} bikes')
+        self.assertEqual(BikeBuyAndSell.objects.get(pk=self.bike.pk).status, 'Approved')
+
+    def test_renewals_stop_after_the_longest_hold(self):
+        reservations.reserve(self.buyer, [self.bike.pk])
+        now = timezone.now()
+        BikeBuyAndSell.objects.filter(pk=self.bike.pk).update(
+            reserved_at=now - timedelta(minutes=reservations.MAX_HOLD_MINUTES - 1),
+            reserved_until=now + timedelta(minutes=1),
+        )
+        self.assertEqual(reservations.reserve(self.buyer, [self.bike.pk]), {self.bike.pk})  # still held, not renewed
+        self.bike.refresh_from_db()
+        self.assertLess(self.bike.reserved_until, timezone.now() + timedelta(minutes=2))
+
+        # Once it runs out the same buyer cannot claim it straight back
+        BikeBuyAndSell.objects.filter(pk=self.bike.pk).update(reserved_until=timezone.now() - timedelta(minutes=1))
+        self.assertEqual(reservations.reserve(self.buyer, [self.bike.pk]), set())
+        self.assertEqual(reservations.reserve(self.staff, [self.bike.pk]), {self.bike.pk})
+
+    def test_expired_holds_are_released(self):
+        reservations.reserve(self.buyer, [self.bike.pk])
+        self.assertEqual(reservations.release_expired(), 0)
+        BikeBuyAndSell.objects.filter(pk=self.bike.pk).update(reserved_until=timezone.now() - timedelta(minutes=1))
+        call_command('release_reservations', stdout=StringIO())
+        self.bike.refresh_from_db()
+        self.assertEqual((self.bike.status, self.bike.reserved_by, self.bike.reserved_until), ('Approved', None, None))
+
+    def test_fifty_buyers_race_for_one_bike(self):
+        # Threads need a database file: the in-memory test database locks instead of waiting
+        results = run_in_scratch_db('bench_reservations', ['--worker', '--threads', '50', '--rounds', '2'],
+                                    env={'DJANGO_DB_PROFILE': 'production'})
+        self.assertEqual(results['conditional_update']['winners_per_round'], [1, 1])
+        self.assertEqual(results['conditional_update']['errors'], [])
+
+
+class ArchiveTests(CatalogDataMixin, TestCase):
+    def setUp(self):
+        old = timezone.now() - timedelta(days=400)
+        self.orders = {}
+        for name, status in [('old_delivered', 'Delivered'), ('old_pending', 'Pending'), ('new_delivered', 'Delivered')]:
+            order = Orders.objects.create(user=self.buyer, email='buyer@example.com', status=status, total_price='450000')
+            OrderItem.objects.create(order=order, bike_buy_and_sell=self.bike, price=450000, quantity=1)
+            self.orders[name] = order
+        Orders.objects.filter(pk__in=[self.orders['old_delivered'].pk, self.orders['old_pending'].pk]).update(created_at=old)
+
+        self.threads = {}
+        for name, status in [('old_resolved', 'resolved'), ('old_open', 'open'), ('revived', 'closed')]:
+            thread = ChatMessage.objects.create(user=self.buyer, message=f'{name} question', status=status)
+            ChatMessage.objects.create(user=self.buyer, message=f'{name} answer', is_admin=True, parent=thread,
+                                       status=status)
+            self.threads[name] = thread
+        ChatMessage.objects.exclude(message='revived answer').update(timestamp=old)
+
+    def test_only_finished_old_records_move(self):
+        call_command('archive_records', stdout=StringIO())
+        self.assertEqual(list(ArchivedOrder.objects.values_list('pk', flat=True)), [self.orders['old_delivered'].pk])
+        self.assertEqual(ArchivedOrder.objects.get().items.get().price, 450000)
+        self.assertEqual(set(Orders.objects.values_list('pk', flat=True)),
+                         {self.orders['old_pending'].pk, self.orders['new_delivered'].pk})
+        self.assertFalse(OrderItem.objects.filter(order=self.orders['old_delivered']).exists())
+
+        archived = ArchivedChatMessage.objects.get(parent__isnull=True)
+        self.assertEqual((archived.pk, archived.replies.get().message),
+                         (self.threads['old_resolved'].pk, 'old_resolved answer'))
+        self.assertEqual(ChatMessage.objects.count(), 4)
+        self.assertEqual(archive.archive_orders(archive.months_ago(6)), 0)
+
+    def test_read_paths_reach_the_archive_when_asked(self):
+        archive.archive_orders(archive.months_ago(6))
+        archive.archive_chat_threads(timezone.now() - timedelta(days=90))
+        old = self.orders['old_delivered'].pk
+        self.client.force_login(self.buyer)
+        url = reverse('bike_buy_and_sell:booking_list')
+        response = self.client.get(url)
+        self.assertNotIn(old, [order.pk for order in response.context['booking_list']])
+        self.assertContains(response, '?archived=1')
+        archived = self.client.get(url, {'archived': '1'}).context['booking_list']
+        self.assertEqual([(order.pk, order.item_count) for order in archived], [(old, 1)])
+
+        response = self.client.get(reverse('bike_buy_and_sell:order_details', args=[old]))
+        self.assertContains(response, 'Yamaha R15')
+        self.client.force_login(self.seller)
+        self.assertEqual(self.client.get(reverse('bike_buy_and_sell:order_details', args=[old])).status_code, 404)
+
+        self.client.force_login(self.buyer)
+        chat = reverse('bike_buy_and_sell:chat_support')
+        self.assertNotContains(self.client.get(chat), 'old_resolved question')
+        self.assertContains(self.client.get(chat, {'archived': '1'}), 'old_resolved question')
+
+        self.client.force_login(self.staff)
+        self.assertEqual(self.client.get(reverse('admin:admin_dashboard')).context['total_orders'], 3)
+
+    def test_months_ago_clamps_to_month_end(self):
+        now = timezone.now().replace(year=2026, month=3, day=31)
+        self.assertEqual(archive.months_ago(1, now).date().isoformat(), '2026-02-28')
+        self.assertEqual(archive.months_ago(14, now).date().isoformat(), '2025-01-31')
+
+
+@override_settings(PERFORMANCE_SAMPLE_RATE=1.0)
+class PerformanceMiddlewareTests(CatalogDataMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        performance.reset()
+
+    def test_server_timing_header(self):
+        response = self.client.get(reverse('bike_buy_and_sell:buy_list'))
+        timing = response['Server-Timing']
+        for metric in ('db;dur=', 'tpl;dur=', 'cache;desc=', 'total;dur='):
+            self.assertIn(metric, timing)
+
+    def test_stats_are_aggregated_per_url_name(self):
+        self.client.get(reverse('bike_buy_and_sell:bike_index'))
+        self.client.get(reverse('bike_buy_and_sell:bike_index'))
+        self.client.force_login(self.staff)
+        views = self.client.get(reverse('bike_buy_and_sell:performance_stats')).json()['views']
+        self.assertEqual(views['bike_buy_and_sell:bike_index']['count'], 2)
+        self.assertEqual(sum(views['bike_buy_and_sell:bike_index']['histogram'].values()), 2)
+
+    def test_stats_are_staff_only(self):
+        self.client.force_login(self.buyer)
+        self.assertEqual(self.client.get(reverse('bike_buy_and_sell:performance_stats')).status_code, 302)
+
+    @override_settings(PERFORMANCE_SAMPLE_RATE=0.0)
+    def test_sampling_off(self):
+        response = self.client.get(reverse('bike_buy_and_sell:bike_index'))
+        self.assertNotIn('Server-Timing', response)
+
+
+class SQLProfilerTests(CatalogDataMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        profiling.reset_all()
+
+    def test_fingerprint_strips_literals(self):
+        self.assertEqual(
+            profiling.fingerprint("SELECT * FROM t WHERE id = 12 AND name = 'x''y' AND v IN (%s, %s, %s)"),
+            'SELECT * FROM t WHERE id = ? AND name = ? AND v IN (...)',
+        )
+
+    def test_reservoir_is_uniform_within_a_request(self):
+        request_profile = profiling.RequestProfile()
+        request_profile.queries = [('SELECT 1', float(n)) for n in range(10000)]
+        with mock.patch('random.randrange', side_effect=random.Random(31).randrange):
+            profiling.profile.add_request('view', request_profile, threshold=10 ** 6)
+        samples = profiling.profile.snapshot()[0]['samples']
+        self.assertEqual(len(samples), profiling.SAMPLES_PER_FINGERPRINT)
+        # A uniform sample of 0..9999 averages about 5000; drawing every slot against the
+        # request's final count keeps too many of the first durations
+        self.assertGreater(sum(samples) / len(samples), 4200)
+
+    @override_settings(SQL_PROFILER_SAMPLE_RATE=1.0)
+    def test_get_first_image_is_flagged_as_n_plus_one(self):
+        for n in range(3):
+            BikeBuyAndSell.objects.create(
+                name=f'Bike {n}', price=1000, description='-', category=self.category,
+                user=self.seller, status='Approved',
+            )
+        self.client.get(reverse('bike_buy_and_sell:buy_list'))
+        profiling.profile.maybe_publish(force=True)
+
+        suspects = [row for row in profiling.collect() if row['n_plus_one']]
+        self.assertTrue(any(
+            row['view'] == 'bike_buy_and_sell:buy_list'
+            and 'bike_buy_and_sell_bikebuyandsellimage' in row['fingerprint']
+            and 'bike_buy_and_sell_id' in row['fingerprint']
+            for row in suspects
+        ))
+
+
+class ProductDetailTests(CatalogDataMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.buyer)  # anonymous visitors are served by the page cache
+        self.url = reverse('bike_buy_and_sell:product_detail', args=[self.bike.id])
+        BikeBuyAndSellImage.objects.create(bike_buy_and_sell=self.bike, image='bike_buy_and_sell_images/r15.jpg')
+
+    def test_cached_fragments_skip_the_gallery_query(self):
+        self.client.get(self.url)
+        with self.assertNumQueries(2):  # the user and the bike
+            response = self.client.get(self.url)
+        self.assertContains(response, 'bike_buy_and_sell_images/r15.jpg')
+        self.assertContains(response, 'Yamaha R15')
+
+    def test_repeat_visit_is_not_modified(self):
+        self.client.get(self.url)  # sets the CSRF cookie
+        response = self.client.get(self.url)
+        self.assertIn('Last-Modified', response)
+        with self.assertNumQueries(2):
+            repeat = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(repeat.status_code, 304)
+
+    def test_cart_changes_etag(self):
+        etag = self.client.get(self.url)['ETag']
+        self.client.post(reverse('bike_buy_and_sell:cart_add', args=[self.bike.id]))
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_new_image_refreshes_gallery(self):
+        etag = self.client.get(self.url)['ETag']
+        BikeBuyAndSellImage.objects.create(bike_buy_and_sell=self.bike, image='bike_buy_and_sell_images/r15-side.jpg')
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'bike_buy_and_sell_images/r15-side.jpg')
+
+    def test_replaced_image_refreshes_gallery(self):
+        etag = self.client.get(self.url)['ETag']
+        image = self.bike.images.get()
+        image.image = 'bike_buy_and_sell_images/r15-new.jpg'
+        image.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'bike_buy_and_sell_images/r15-new.jpg')
+
+
+@override_settings(CACHES={
+    'default': {'BACKEND': 'bike_buy_and_sell.cache.TwoTierCache', 'LOCATION': 'shared'},
+    'shared': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'page-cache-tests'},
+})
+class AnonymousPageCacheTests(CatalogDataMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_repeat_anonymous_visit_runs_no_queries(self):
+        url = reverse('bike_buy_and_sell:buy_list')
+        self.client.get(url, {'min_price': 1000, 'max_price': 500000})
+        with self.assertNumQueries(0):
+            response = self.client.get(url, {'max_price': 500000, 'min_price': 1000})
+        self.assertContains(response, 'Yamaha R15')
+
+    def test_catalog_change_invalidates_pages(self):
+        url = reverse('bike_buy_and_sell:bike_index')
+        self.client.get(url)
+        BikeBuyAndSell.objects.create(
+            name='Honda CBR', price=500000, description='New', category=self.category,
+            user=self.seller, status='Approved',
+        )
+        self.assertContains(self.client.get(url), 'Honda CBR')
+
+    def test_only_seller_details_invalidate_pages(self):
+        version = catalog_version()
+        self.client.force_login(self.seller)
+        response = self.client.post(reverse('bike_buy_and_sell:change_password'), {
+            'old_password': 'pass12345', 'new_password1': 'n3w-Passw0rd!', 'new_password2': 'n3w-Passw0rd!',
+        })
+        self.assertEqual(response.status_code, 302)
+        self.buyer.first_name = 'Rahim'
+        self.buyer.save()  # no listings
+        self.assertEqual(catalog_version(), version)
+
+        self.seller.first_name = 'Karim'
+        self.seller.save(update_fields=['first_name'])
+        self.assertNotEqual(catalog_version(), version)
+
+    def test_cart_and_login_bypass_the_cache(self):
+        url = reverse('bike_buy_and_sell:about')
+        self.assertIsNotNone(self.client.get(url).context)
+        self.assertIsNone(self.client.get(url).context)  # served from the cache
+
+        self.client.post(reverse('bike_buy_and_sell:cart_add', args=[self.bike.id]))
+        response = self.client.get(url)
+        self.assertEqual(len(response.context['cart']), 1)
+
+        self.client.force_login(self.buyer)
+        self.assertContains(self.client.get(url), 'buyer')
+
+    def test_cached_page_carries_the_visitors_csrf_token(self):
+        url = reverse('bike_buy_and_sell:product_detail', args=[self.bike.id])
+        Client(enforce_csrf_checks=True).get(url)
+        visitor = Client(enforce_csrf_checks=True)
+        response = visitor.get(url)
+        self.assertIsNone(response.context)  # served from the cache
+        token = re.search(rb'name="csrfmiddlewaretoken" value="([^"]+)"', response.content).group(1).decode()
+        added = visitor.post(reverse('bike_buy_and_sell:cart_add', args=[self.bike.id]),
+                             {'csrfmiddlewaretoken': token})
+        self.assertEqual(added.status_code, 302)
+
+
+@override_settings(CACHES={
+    'default': {'BACKEND': 'bike_buy_and_sell.cache.TwoTierCache', 'LOCATION': 'shared'},
+    'shared': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'conditional-get-tests'},
+})
+class ConditionalGetTests(CatalogDataMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.buyer)
+
+    def test_listing_pages_answer_304_without_rendering(self):
+        for url in (reverse('bike_buy_and_sell:bike_index'),
+                    reverse('bike_buy_and_sell:buy_list') + '?page=1',
+                    reverse('bike_buy_and_sell:category_based_bike', args=[self.category.id])):
+            with self.subTest(url=url):
+                etag = self.client.get(url)['ETag']
+                with self.assertNumQueries(1):  # the user
+                    response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 304)
+                self.assertIsNone(response.context)
+
+    def test_catalog_change_renders_again(self):
+        url = reverse('bike_buy_and_sell:buy_list')
+        etag = self.client.get(url)['ETag']
+        self.bike.price = 400000
+        self.bike.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, '400000')
+
+    def test_chat_popup_changes_with_new_messages(self):
+        url = reverse('bike_buy_and_sell:chat_support_popup')
+        self.client.get(url)  # the first render sets the CSRF cookie, which is part of the ETag
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        ChatMessage.objects.create(user=self.buyer, message='Any news?')
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_chat_popup_changes_with_ticket_status(self):
+        url = reverse('bike_buy_and_sell:chat_support_popup')
+        ticket = ChatMessage.objects.create(user=self.buyer, message='Any news?')
+        self.client.get(url)
+        etag = self.client.get(url)['ETag']
+        ChatMessage.objects.filter(pk=ticket.pk).update(status='resolved')
+        etag_resolved = self.client.get(url, HTTP_IF_NONE_MATCH=etag)['ETag']
+        self.assertNotEqual(etag_resolved, etag)
+        ChatMessage.objects.filter(pk=ticket.pk).update(assigned_to=self.staff)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag_resolved).status_code, 200)
+
+    def test_cart_changes_etag(self):
+        url = reverse('bike_buy_and_sell:bike_index')
+        etag = self.client.get(url)['ETag']
+        self.client.post(reverse('bike_buy_and_sell:cart_add', args=[self.bike.id]))
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+@override_settings(CACHES={
+    'default': {'BACKEND': 'bike_buy_and_sell.cache.TwoTierCache', 'LOCATION': 'shared'},
+    'shared': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'compression-tests'},
+})
+class CompressionTests(CatalogDataMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.buyer)
+
+    def test_gzips_html_and_weakens_etag(self):
+        response = self.client.get(reverse('bike_buy_and_sell:bike_index'), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertTrue(response['ETag'].startswith('W/"'))
+        self.assertIn(b'Yamaha R15', gzip.decompress(response.content))
+
+    def test_pages_with_csrf_token_are_not_compressed(self):
+        self.client.logout()
+        response = self.client.get(reverse('bike_buy_and_sell:login'), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertContains(response, 'csrfmiddlewaretoken')
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_category_page_streams_head_first(self):
+        url = reverse('bike_buy_and_sell:category_based_bike', args=[self.category.id])
+        response = self.client.get(url)
+        self.assertTrue(response.streaming)
+        chunks = list(response.streaming_content)
+        head_end = next(i for i, chunk in enumerate(chunks) if b'</head>' in chunk)
+        self.assertNotIn(b'Yamaha R15', b''.join(chunks[:head_end + 1]))
+        self.assertIn(b'Yamaha R15', b''.join(chunks))
+
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)), b''.join(chunks))
+
+    def test_anonymous_category_page_is_rendered_whole_for_the_page_cache(self):
+        self.client.logout()
+        url = reverse('bike_buy_and_sell:category_based_bike', args=[self.category.id])
+        self.assertFalse(self.client.get(url).streaming)
+
+
+class StaticAssetTests(SimpleTestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        settings_override = override_settings(STATIC_ROOT=self.root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        call_command('collectstatic', interactive=False, verbosity=0)
+        storage.immutable_names.cache_clear()
+        self.addCleanup(storage.immutable_names.cache_clear)
+        self.hashed = storage.staticfiles_storage.stored_name('css/base.css')
+
+    def test_collectstatic_writes_hashed_and_compressed_copies(self):
+        self.assertRegex(self.hashed, r'^css/base\.[0-9a-f]{12}\.css$')
+        with open(f'{self.root}/{self.hashed}', 'rb') as plain, open(f'{self.root}/{self.hashed}.gz', 'rb') as packed:
+            self.assertEqual(gzip.decompress(packed.read()), plain.read())
+
+    def test_serves_precompressed_variant_with_immutable_caching(self):
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING='gzip, deflate')
+        response = storage.serve_static(request, self.hashed)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertIn('immutable', response['Cache-Control'])
+        response.close()
+
+    def test_vendor_assets_are_committed(self):
+        for path, source in [*vendor.VENDOR_ASSETS.values(), *vendor.VENDOR_FILES]:
+            with self.subTest(path=path):
+                self.assertTrue(vendor.is_vendored(path))
+                self.assertNotEqual(storage.staticfiles_storage.stored_name(path), path)
+
+    def test_plain_file_for_clients_without_gzip(self):
+        response = storage.serve_static(RequestFactory().get('/'), 'css/base.css')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertNotIn('immutable', response['Cache-Control'])
+        response.close()
+
+
+@override_settings(CACHES={
+    'default': {'BACKEND': 'bike_buy_and_sell.cache.TwoTierCache', 'LOCATION': 'shared'},
+    'shared': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'registry-tests'},
+})
+class CategoryRegistryTests(CatalogDataMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.seller)
+
+    def category_queries(self, url):
+        queries = []
+        with connection.execute_wrapper(lambda execute, sql, *args: queries.append(sql) or execute(sql, *args)):
+            response = self.client.get(url)
+        self.assertContains(response, self.category.name)
+        return [sql for sql in queries if re.search(r'FROM "bike_buy_and_sell_category"', sql)]
+
+    def test_pages_list_categories_without_querying_them(self):
+        registry.categories()
+        for url in (reverse('bike_buy_and_sell:bike_index'),
+                    reverse('bike_buy_and_sell:buy_list'),
+                    reverse('bike_buy_and_sell:sell'),
+                    reverse('bike_buy_and_sell:sell_list'),
+                    reverse('bike_buy_and_sell:edit_bike', args=[self.bike.id])):
+            with self.subTest(url=url):
+                self.assertEqual(self.category_queries(url), [])
+
+    def test_category_change_reloads_snapshot(self):
+        self.assertEqual(registry.categories().names[self.category.id], 'Sports')
+        self.category.name = 'Touring'
+        self.category.save()
+        snapshot = registry.categories()
+        self.assertEqual(snapshot.names[self.category.id], 'Touring')
+        with self.assertNumQueries(0):
+            self.assertIs(registry.categories(), snapshot)
+
+    def test_listing_with_unknown_category_is_rejected(self):
+        response = self.client.post(reverse('bike_buy_and_sell:sell_list'), {
+            'name': 'Ghost', 'price': 1000, 'description': 'No such brand', 'category': 999,
+        }, follow=True)
+        self.assertContains(response, 'Invalid category selected.')
+        self.assertFalse(BikeBuyAndSell.objects.filter(name='Ghost').exists())
+
+
+@override_settings(CACHES={
+    'default': {'BACKEND': 'bike_buy_and_sell.cache.TwoTierCache', 'LOCATION': 'shared'},
+    'shared': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'query-budget-tests'},
+}, PERFORMANCE_SAMPLE_RATE=0.0, SQL_PROFILER_SAMPLE_RATE=0.0)
+class QueryBudgetTests(QueryBudgetTestCase):
+    urlconf = urls
+    # Highest query count over the anonymous, regular and staff user
+    budgets = {
+        'bike_buy_and_sell:bike_index': 43,
+        'bike_buy_and_sell:login': 1,
+        'bike_buy_and_sell:registration': 1,
+        'bike_buy_and_sell:change_password': 1,
+        'bike_buy_and_sell:profile': 2,
+        'bike_buy_and_sell:update_profile': 2,
+        'bike_buy_and_sell:logout': 3,
+        'bike_buy_and_sell:about': 1,
+        'bike_buy_and_sell:contact': 1,
+        'bike_buy_and_sell:booking_list': 2,
+        'bike_buy_and_sell:buy_list': 44,
+        'bike_buy_and_sell:sell': 2,
+        'bike_buy_and_sell:sell_list': 4,
+        'bike_buy_and_sell:cart_add': 4,
+        'bike_buy_and_sell:product_detail': 4,
+        'bike_buy_and_sell:cart_detail': 1,
+        'bike_buy_and_sell:cart_remove': 1,
+        'bike_buy_and_sell:order_create': 1,
+        'bike_buy_and_sell:reserve_cart': 1,
+        'bike_buy_and_sell:order_details': 5,
+        'bike_buy_and_sell:admin_order_details': 1,
+        'bike_buy_and_sell:search': 52,
+        'bike_buy_and_sell:saved_searches': 4,
+        'bike_buy_and_sell:save_search': 1,
+        'bike_buy_and_sell:category_based_bike': 52,
+        'bike_buy_and_sell:chat_support': 2,
+        'bike_buy_and_sell:edit_bike': 5,
+        'bike_buy_and_sell:chat_support_redirect': 1,
+        'bike_buy_and_sell:chat_support_popup': 3,
+        'bike_buy_and_sell:performance_stats': 1,
+        'admin:auth_user_changelist': 4,
+        'admin:bike_buy_and_sell_banner_changelist': 4,
+        'admin:bike_buy_and_sell_bikebuyandsell_changelist': 4,
+        'admin:bike_buy_and_sell_bikebuyandsellimage_changelist': 4,
+        'admin:bike_buy_and_sell_category_changelist': 4,
+        'admin:bike_buy_and_sell_chatmessage_changelist': 24,
+        'admin:bike_buy_and_sell_orderitem_changelist': 4,
+        'admin:bike_buy_and_sell_orders_changelist': 4,
+    }
+    known_growth = {
+        'bike_buy_and_sell:bike_index': 'get_first_image runs two queries per card',
+        'bike_buy_and_sell:buy_list': 'get_first_image runs two queries per card',
+        'bike_buy_and_sell:search': 'unpaginated, get_first_image per card',
+        'bike_buy_and_sell:category_based_bike': 'unpaginated, get_first_image per card',
+        'admin:bike_buy_and_sell_chatmessage_changelist': 'get_replies_count runs one COUNT per row',
+    }
+    skip = {
+        'bike_buy_and_sell:cart_update': 'POST only, returns no response to GET',
+        'bike_buy_and_sell:delete_bike': 'deletes the listing on GET',
+        'bike_buy_and_sell:delete_bike_image': 'deletes the image on GET',
+        'bike_buy_and_sell:activate': 'needs a one-off activation token',
+        'bike_buy_and_sell:admin_chat_support': 'template admin_chat_support.html does not exist',
+    }
+    query_strings = {
+        'bike_buy_and_sell:search': {'query': 'Budget'},
+    }
@@ -23,9 +23,12 @@ urlpatterns = [
     path('remove/<int:product_id>/', views.cart_remove, name='cart_remove'),
     path('update/<int:product_id>/', views.cart_update, name='cart_update'),
     path('checkout/', views.order_create, name='order_create'),
+    path('checkout/reserve/', views.reserve_cart, name='reserve_cart'),
     path('my-order-details/<int:order_id>/', views.order_details, name='order_details'),
     path('admin/order-details/<int:order_id>/', views.admin_order_details, name='admin_order_details'),
     path('search/', views.search_view, name='search'),
+    path('saved-searches/', views.saved_searches, name='saved_searches'),
+    path('saved-searches/add/', views.save_search, name='save_search'),
     path('category_based_bike/<int:category_id>/', views.category_based_bike, name='category_based_bike'),
     path('chat-support/', views.user_chat_support, name='chat_support'),
     path('admin-chat-support/', views.admin_chat_support, name='admin_chat_support'),
@@ -35,4 +38,5 @@ urlpatterns = [
     path('chat-support-redirect/', views.chat_support_redirect, name='chat_support_redirect'),
     path('activate/<uidb64>/<token>/', views.activate_account, name='activate'),
     path('chat-support-popup/', views.chat_support_popup, name='chat_support_popup'),
+    path('performance/', views.performance_stats, name='performance_stats'),
 ]
@@ -0,0 +1,43 @@
+"""
+Third-party front-end assets.
+
+Bootstrap and Font Awesome are served from our own static files under
+assets/vendor, committed to the repository, because production cannot
+reach public CDNs. After changing a version here, fetch the new files with
+`manage.py vendor_assets` and commit them: until then vendor_url() falls
+back to the CDN URL, which only works in development, and
+StaticAssetTests fails.
+"""
+from functools import lru_cache
+
+from django.contrib.staticfiles import finders
+from django.templatetags.static import static
+
+CDNJS = 'https://cdnjs.cloudflare.com/ajax/libs'
+
+# name used in templates -> (static path, source URL)
+VENDOR_ASSETS = {
+    'bootstrap.css': ('vendor/bootstrap/5.3.3/css/bootstrap.min.css',
+                      f'{CDNJS}/bootstrap/5.3.3/css/bootstrap.min.css'),
+    'bootstrap.js': ('vendor/bootstrap/5.3.3/js/bootstrap.bundle.min.js',
+                     f'{CDNJS}/bootstrap/5.3.3/js/bootstrap.bundle.min.js'),
+    'fontawesome.css': ('vendor/fontawesome/6.0.0/css/all.min.css',
+                        f'{CDNJS}/font-awesome/6.0.0/css/all.min.css'),
+}
+
+# Files the stylesheets above load by relative URL
+VENDOR_FILES = [
+    (f'vendor/fontawesome/6.0.0/webfonts/{font}.{ext}', f'{CDNJS}/font-awesome/6.0.0/webfonts/{font}.{ext}')
+    for font in ('fa-brands-400', 'fa-regular-400', 'fa-solid-900', 'fa-v4compatibility')
+    for ext in ('woff2', 'ttf')
+]
+
+
+@lru_cache(maxsize=None)
+def is_vendored(path):
+    return finders.find(path) is not None
+
+
+def vendor_url(name):
+    path, source = VENDOR_ASSETS[name]
+    return static(path) if is_vendored(path) else source
@@ -2,7 +2,7 @@ from django.contrib import messages
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth import logout, authenticate, login
 from django.contrib.auth.decorators import login_required
-from django.http import JsonResponse, HttpResponseForbidden, HttpResponse
+from django.http import Http404, JsonResponse, HttpResponseForbidden, HttpResponse
 from django.contrib.sites.shortcuts import get_current_site
 from django.template.loader import render_to_string
 from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
@@ -12,20 +12,43 @@ from django.core.mail import send_mail
 from django.conf import settings
 from django.contrib.auth.models import User
 
+from .archive import archived_chat_messages, get_order, order_history, order_items
+from .cache import get_or_compute
 from .cart import Cart
+from .catalog import bump_catalog_version, catalog_version
+from .conditional import condition_on, not_modified, page_etag, set_validators
+from .facets import browse_facets, parse_int
+from .instrumentation import stats as performance
+from .listings import create_listing
+from .pagecache import cache_anonymous_page
+from .pagination import keyset_page
+from .registry import categories
+from .reservations import held_until, reserve, sell
+from .routers import use_replica
+from .search import filter_by_name
+from .similar import similar_bikes
+from .streaming import render_streaming
 from .forms import *
 from django.contrib.auth.forms import UserCreationForm
 from django.urls import reverse_lazy
+from django.views.decorators.http import require_POST
 from django.views.generic import CreateView
 from django.contrib.auth.forms import PasswordChangeForm
 from django.contrib.auth import update_session_auth_hash
 
 from .models import *
 from django.contrib.admin.views.decorators import staff_member_required
+from django.core.exceptions import ValidationError
 from django.core.paginator import Paginator
-from django.db.models import Q
+from django.db.models import Count, Max, OuterRef, Prefetch, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.db import transaction
 from django.core.cache import cache
 
+ORDER_HISTORY_PAGE_SIZE = 25
+SELLER_PAGE_SIZE = 24
+SAVED_SEARCH_ALERTS = 50
+
 
 @login_required(login_url='/login/')
 def logout_view(request):
@@ -33,33 +56,42 @@ def logout_view(request):
     return render(request, 'logout.html')
 
 
+@cache_anonymous_page
 def about_view(request):
     return render(request, 'about_us.html')
 
 
+@cache_anonymous_page
 def contact_view(request):
     return render(request, 'contact_us.html')
 
 
+def catalog_validator(request, *args, **kwargs):
+    return (catalog_version(),)
+
+
+def chat_validator(request):
+    # Every message with its ticket status and assignee: staff change those without adding a message
+    return tuple(ChatMessage.objects.filter(user=request.user).order_by('id')
+                 .values_list('id', 'status', 'assigned_to_id'))
+
+
+@cache_anonymous_page
+@use_replica
+@condition_on(catalog_validator)
 def index(request):
-    # Add caching for approved bikes
-    bikes = cache.get('index_bikes')
-    if bikes is None:
-        bikes = BikeBuyAndSell.objects.select_related('category', 'user').filter(
+    # Cached with stampede protection: one worker recomputes, the others keep the old value
+    version = catalog_version()
+    bikes = get_or_compute(f'index_bikes:{version}', lambda: list(
+        BikeBuyAndSell.objects.select_related('category', 'user').filter(
             status="Approved"
         ).order_by('-id')[:12]  # Limit to 12 recent bikes
-        cache.set('index_bikes', bikes, 300)
-
-    # Add caching for banners
-    banners = cache.get('index_banners') 
-    if banners is None:
-        banners = Banner.objects.all().order_by('-id')
-        cache.set('index_banners', banners, 600)
+    ), 300)
+    banners = get_or_compute(f'index_banners:{version}', lambda: list(Banner.objects.all().order_by('-id')), 600)
 
     context = {
         'bike_buy_and_sell': bikes,
         'banners': banners,
-        'categories': Category.objects.all(),
     }
     return render(request, 'index.html', context)
 
@@ -101,7 +133,8 @@ def change_password(request):
     if request.method == 'POST':
         form = PasswordChangeForm(request.user, request.POST)
         if form.is_valid():
-            user = form.save()
+            user = form.save(commit=False)
+            user.save(update_fields=['password'])
             update_session_auth_hash(request, user)  # Important to maintain user's session
             messages.success(request, 'Your password was successfully updated!')
             return redirect('bike_buy_and_sell:profile')
@@ -115,7 +148,7 @@ def change_password(request):
 @login_required(login_url='/login')
 def profile(request):
     user = request.user
-    profile = getattr(user, 'profile', None)  # Get the profile if it exists
+    profile = Profile.objects.select_related('user').filter(user=user).first()
     context = {
         'user': user,
         'profile': profile,
@@ -126,23 +159,25 @@ def profile(request):
 @login_required(login_url='/login')
 def update_profile(request):
     user = request.user
-    profile = getattr(user, 'profile', None)
+    profile = Profile.objects.select_related('user').filter(user=user).first()
 
     if request.method == 'POST':
-        form = ProfileUpdateForm(request.POST, request.FILES)
+        form = ProfileUpdateForm(request.POST, request.FILES, user=user)
         if form.is_valid():
-            # Update user fields
-            user.first_name = form.cleaned_data.get('first_name')
-            user.last_name = form.cleaned_data.get('last_name')
-            user.email = form.cleaned_data.get('email')
-            user.save()
-
-            # Update or create the profile
-            if profile:
-                profile.profile_picture = form.cleaned_data.get('profile_picture') or profile.profile_picture
-                profile.save()
-            else:
-                Profile.objects.create(user=user, profile_picture=form.cleaned_data.get('profile_picture'))
+            # Write only the fields that changed
+            changed = [field for field in ('first_name', 'last_name', 'email')
+                       if getattr(user, field) != form.cleaned_data.get(field)]
+            for field in changed:
+                setattr(user, field, form.cleaned_data.get(field))
+            if changed:
+                user.save(update_fields=changed)
+
+            picture = form.cleaned_data.get('profile_picture')
+            if profile is None:
+                Profile.objects.create(user=user, profile_picture=picture)
+            elif picture:
+                profile.profile_picture = picture
+                profile.save(update_fields=['profile_picture'])
 
             messages.success(request, "Profile updated successfully!")
             return redirect('bike_buy_and_sell:profile')  # updated redirect with namespace
@@ -162,34 +197,38 @@ def update_profile(request):
 
 @login_required(login_url='/login')
 def booking_list(request):
-    booking_list = Orders.objects.filter(user=request.user).order_by('-id')
+    # Keyset-paginated; item count and item total come from the same query. The archive
+    # is only read once the buyer asks for it from the last page.
+    archived = request.GET.get('archived') == '1'
+    page = keyset_page(request, order_history(request.user, archived), ORDER_HISTORY_PAGE_SIZE)
     context = {
-        "booking_list": booking_list
+        "booking_list": page,
+        "archived": archived,
+        "older_query": page.next_query(request) if page.has_next else None,
     }
     return render(request, 'booking_list.html', context)
 
 
+@cache_anonymous_page
+@use_replica
+@condition_on(catalog_validator)
 def buy_list(request):
-    # Add caching
-    cache_key = f'buy_list_{request.GET.get("category", "")}_{request.GET.get("min_price", "")}_{request.GET.get("max_price", "")}'
-    queryset = cache.get(cache_key)
-    
-    if queryset is None:
+    category_id = request.GET.get('category')
+    min_price = request.GET.get('min_price')
+    max_price = request.GET.get('max_price')
+
+    def filtered_bikes():
         queryset = BikeBuyAndSell.objects.select_related('category', 'user').filter(status='Approved').order_by('-id')
-        
-        # Filtering logic
-        category_id = request.GET.get('category')
-        min_price = request.GET.get('min_price')
-        max_price = request.GET.get('max_price')
-        
         if category_id:
             queryset = queryset.filter(category_id=category_id)
         if min_price:
             queryset = queryset.filter(price__gte=min_price)
         if max_price:
             queryset = queryset.filter(price__lte=max_price)
-            
-        cache.set(cache_key, queryset, 300)  # Cache for 5 minutes
+        return list(queryset)
+
+    cache_key = f'buy_list_{catalog_version()}_{category_id or ""}_{min_price or ""}_{max_price or ""}'
+    queryset = get_or_compute(cache_key, filtered_bikes, 300)  # Cache for 5 minutes
 
     # Add pagination
     paginator = Paginator(queryset, 12)  # Show 12 bikes per page
@@ -198,112 +237,66 @@ def buy_list(request):
 
     context = {
         'bike_buy_and_sell': bikes,
-        'categories': Category.objects.all(),  # Pass categories for the dropdown
+        'facets': browse_facets(request),
     }
     return render(request, 'buy_list.html', context)
 
 
 @login_required(login_url='/login')
 def sell_views(request):
-    category = Category.objects.all()
-    context = {
-        'category': category
-    }
     if request.method == 'POST':
         try:
-            name = request.POST.get('name')
-            price = request.POST.get('price')
-            description = request.POST.get('description')
-            category_id = request.POST.get('category')
-            image_list = request.FILES.getlist('image')
-
-            # Validate required fields
-            if not (name and price and description and category_id):
-                messages.error(request, "All fields are required.")
-                return render(request, 'sell.html', context)
-
-            # Validate category
-            try:
-                category_obj = Category.objects.get(pk=category_id)
-            except Category.DoesNotExist:
-                messages.error(request, "Invalid category selected.")
-                return render(request, 'sell.html', context)
-
-            # Create the bike listing
-            bike_buy_and_sell_create = BikeBuyAndSell.objects.create(
-                name=name,
-                price=price,
-                description=description,
-                category=category_obj,
-                user=request.user
-            )
-
-            # Handle uploaded images
-            if not image_list:
-                messages.error(request, "At least one image is required.")
-                bike_buy_and_sell_create.delete()
-                return render(request, 'sell.html', context)
-
-            for image in image_list:
-                BikeBuyAndSellImage.objects.create(
-                    bike_buy_and_sell=bike_buy_and_sell_create,
-                    image=image
-                )
-
+            create_listing(request.user, request.POST, request.FILES.getlist('image'))
+        except ValidationError as e:
+            messages.error(request, e.messages[0])
+        else:
             # Updated success message after bike is added
             messages.success(request, "Your bike has been added.")
             return redirect('bike_buy_and_sell:sell_list')
-        except Exception as e:
-            messages.error(request, f"An error occurred: {str(e)}")
-            return render(request, 'sell.html', context)
-    return render(request, 'sell.html', context)
+    return render(request, 'sell.html')
 
 
 @login_required(login_url='/login')
 def sell_list(request):
-    bikes = BikeBuyAndSell.objects.filter(user=request.user)
-
     # Handle form submission for adding a new bike
     if request.method == 'POST':
         try:
-            name = request.POST.get('name')
-            price = request.POST.get('price')
-            description = request.POST.get('description')
-            category_id = request.POST.get('category')
-            image_list = request.FILES.getlist('image')
-
-            # Validate required fields
-            if not (name and price and description and category_id):
-                messages.error(request, "All fields are required.")
-            else:
-                category_obj = Category.objects.get(pk=category_id)
-                bike = BikeBuyAndSell.objects.create(
-                    name=name,
-                    price=price,
-                    description=description,
-                    category=category_obj,
-                    user=request.user
-                )
-                for image in image_list:
-                    BikeBuyAndSellImage.objects.create(bike_buy_and_sell=bike, image=image)
-                messages.success(request, f"Bike added successfully! Status: {bike.status}")
-                return redirect('bike_buy_and_sell:sell_list')  # updated redirect with namespace
-        except Exception as e:
-            messages.error(request, f"An error occurred: {str(e)}")
+            bike = create_listing(request.user, request.POST, request.FILES.getlist('image'))
+        except ValidationError as e:
+            messages.error(request, e.messages[0])
+        else:
+            messages.success(request, f"Bike added successfully! Status: {bike.status}")
+            return redirect('bike_buy_and_sell:sell_list')  # updated redirect with namespace
+
+    inventory = BikeBuyAndSell.objects.filter(user=request.user)
+    # Counts for the status tabs in one grouped query
+    status_counts = dict(inventory.order_by().values_list('status').annotate(Count('id')))
 
     # Search and filter functionality
     search_query = request.GET.get('search', '')
-    selected_categories = request.GET.getlist('category', [])
-    if search_query:
-        bikes = bikes.filter(name__icontains=search_query)
+    selected_categories = [pk for pk in request.GET.getlist('category') if pk.isdigit()]
+    selected_status = request.GET.get('status', '')
+    bikes = filter_by_name(inventory, search_query)
     if selected_categories:
         bikes = bikes.filter(category_id__in=selected_categories)
+    if selected_status:
+        bikes = bikes.filter(status=selected_status)
+    # Correlated subqueries rather than a join + GROUP BY, so only the rows of this page are counted
+    images = BikeBuyAndSellImage.objects.filter(bike_buy_and_sell=OuterRef('pk')).order_by()
+    bikes = bikes.select_related('category').annotate(
+        image_count=Coalesce(Subquery(images.values('bike_buy_and_sell').annotate(n=Count('id')).values('n')), 0),
+        cover=Subquery(images.order_by('id').values('image')[:1]),
+    )
+    page = keyset_page(request, bikes, SELLER_PAGE_SIZE)
 
-    categories = Category.objects.all()
     context = {
-        'bike_buy_and_sell': bikes,
-        'categories': categories,
+        'bike_buy_and_sell': page,
+        'older_query': page.next_query(request) if page.has_next else None,
+        'search_query': search_query,
         'selected_categories': selected_categories,
+        'selected_status': selected_status,
+        'status_tabs': [(value, label, status_counts.get(value, 0)) for value, label in BikeBuyAndSell.STATUS],
+        'total_listings': sum(status_counts.values()),
     }
     return render(request, 'sell_list.html', context)
 
@@ -312,6 +305,9 @@ def sell_list(request):
 def add_to_cart_view(request, product_id):
     cart = Cart(request)
     product = get_object_or_404(BikeBuyAndSell, id=product_id)
+    if product.status != 'Approved':
+        messages.error(request, "Sorry, this bike is no longer available.")
+        return redirect('bike_buy_and_sell:product_detail', product.id)
     form = CartAddProductForm(request.POST)
     if form.is_valid():
         cd = form.cleaned_data
@@ -347,36 +343,79 @@ def cart_remove(request, product_id):
 @login_required(login_url='/login')
 def order_create(request):
     cart = Cart(request)
+    bike_ids = cart.product_ids()
+    if not bike_ids:
+        return redirect('bike_buy_and_sell:cart_detail')
     if request.method == 'POST':
         form = OrderCreateForm(request.POST)
         if form.is_valid():
             cd = form.cleaned_data
             user = User.objects.get(username=request.user)
-            order = Orders.objects.create(
-                user=user,
-                email=cd['email'],
-                mobile=cd['mobile'],
-                address=cd['address'],
-                total_price=cart.get_total_price()
-            )
-            for item in cart:
-                OrderItem.objects.create(
-                    order=order,
-                    bike_buy_and_sell=item['product'],
-                    price=item['price'],
-                    quantity=item['quantity']
-                )
+            # One write transaction for the whole order (BEGIN IMMEDIATE in the production DB profile)
+            with transaction.atomic():
+                # Claim the bikes first: another buyer may have got one since the checkout page
+                if sell(user, bike_ids) != len(bike_ids):
+                    transaction.set_rollback(True)
+                    order = None
+                else:
+                    order = Orders.objects.create(
+                        user=user,
+                        email=cd['email'],
+                        mobile=cd['mobile'],
+                        address=cd['address'],
+                        total_price=cart.get_total_price()
+                    )
+                    for item in cart:
+                        OrderItem.objects.create(
+                            order=order,
+                            bike_buy_and_sell=item['product'],
+                            price=item['price'],
+                            quantity=item['quantity']
+                        )
+            if order is None:
+                # Checking out again reserves what is left and drops the rest from the cart
+                messages.warning(request, "Some bikes in your cart are no longer available. "
+                                          "Check out again to hold the rest.")
+                return redirect('bike_buy_and_sell:cart_detail')
+            bump_catalog_version()
             cart.clear()
             return render(request, 'order_created.html', {'order': order})
     else:
         form = OrderCreateForm()
-    return render(request, 'checkout_create.html', {'form': form})
+    context = {
+        'form': form,
+        'reserved_until': held_until(request.user, bike_ids),
+    }
+    return render(request, 'checkout_create.html', context)
+
 
+@login_required(login_url='/login')
+@require_POST
+def reserve_cart(request):
+    """The cart's Checkout button: hold its bikes for the buyer, then show the checkout page"""
+    cart = Cart(request)
+    bike_ids = cart.product_ids()
+    if not bike_ids:
+        return redirect('bike_buy_and_sell:cart_detail')
+    try:
+        held = reserve(request.user, bike_ids)
+    except ValidationError as e:
+        messages.error(request, e.messages[0])
+        return redirect('bike_buy_and_sell:cart_detail')
+    if len(held) < len(bike_ids):
+        cart.discard(set(bike_ids) - held)
+        messages.warning(request, "Some bikes in your cart were just sold or reserved by another buyer "
+                                  "and have been removed.")
+        if not held:
+            return redirect('bike_buy_and_sell:cart_detail')
+    return redirect('bike_buy_and_sell:order_create')
 
+
+@use_replica
 def search_view(request):
     # whatever user write in search box we get in query
     query = request.GET['query']
-    products = BikeBuyAndSell.objects.all().filter(name__icontains=query)
+    products = BikeBuyAndSell.objects.filter(status='Approved', name__icontains=query)
     # word variable will be shown in html when user click on search button
     word = "Searched Result : {}".format(query)
     context = {
@@ -386,30 +425,111 @@ def search_view(request):
     return render(request, 'index.html', context)
 
 
+@login_required(login_url='/login/')
+def save_search(request):
+    if request.method != 'POST':
+        return redirect('bike_buy_and_sell:saved_searches')
+    category = categories().get(request.POST.get('category'))
+    saved, created = SavedSearch.objects.get_or_create(
+        user=request.user,
+        query=request.POST.get('query', '').strip()[:200],
+        category_id=category.pk if category else None,
+        min_price=parse_int(request.POST.get('min_price')),
+        max_price=parse_int(request.POST.get('max_price')),
+    )
+    if created:
+        messages.success(request, f"Saved {saved}. New bikes that match will show up here.")
+    else:
+        messages.info(request, f"You have already saved {saved}.")
+    return redirect('bike_buy_and_sell:saved_searches')
+
+
+@login_required(login_url='/login/')
+def saved_searches(request):
+    if request.method == 'POST':
+        request.user.saved_searches.filter(pk=parse_int(request.POST.get('delete'))).delete()
+        messages.success(request, "Saved search removed.")
+        return redirect('bike_buy_and_sell:saved_searches')
+
+    searches = list(request.user.saved_searches.select_related('category').annotate(
+        new_alerts=Count('alerts', filter=Q(alerts__seen=False, alerts__bike_buy_and_sell__status='Approved')),
+    ).order_by('-id'))
+    # Newest unseen matches first; each is shown once, then marked seen
+    alerts = list(
+        SearchAlert.objects.filter(saved_search__user=request.user, seen=False,
+                                   bike_buy_and_sell__status='Approved')
+        .select_related('bike_buy_and_sell', 'saved_search__category')
+        .annotate(cover=Subquery(
+            BikeBuyAndSellImage.objects.filter(bike_buy_and_sell=OuterRef('bike_buy_and_sell'))
+            .order_by('id').values('image')[:1]
+        ))
+        .order_by('-id')[:SAVED_SEARCH_ALERTS]
+    )
+    if alerts:
+        SearchAlert.objects.filter(pk__in=[alert.pk for alert in alerts]).update(seen=True)
+    context = {
+        'searches': searches,
+        'alerts': alerts,
+    }
+    return render(request, 'saved_searches.html', context)
+
+
+@login_required(login_url='/login/')
 def order_details(request, order_id):
-    order = get_object_or_404(Orders, user=request.user, id=order_id)  # Use get_object_or_404 for safety
-    products = OrderItem.objects.filter(order__id=order_id)
+    order = get_order(user=request.user, id=order_id)
+    if order is None:
+        raise Http404("No order matches the given query.")
+    # Items with their bikes, then every bike's images (in upload order) in one more query
+    products = order_items(order).select_related('bike_buy_and_sell').prefetch_related(
+        Prefetch('bike_buy_and_sell__images', queryset=BikeBuyAndSellImage.objects.order_by('id'), to_attr='image_list')
+    ).order_by('id')
     return render(request, 'order_details.html', {'order': order, "products": products})
 
 
+@cache_anonymous_page
+@use_replica
 def product_detail(request, id):
-    product = get_object_or_404(BikeBuyAndSell, id=id)
+    # One query: seller and category are joined and the image set is summarized for
+    # the validators and the fragment cache key. The gallery rows are only read when
+    # its cached fragment is missing.
+    product = get_object_or_404(
+        BikeBuyAndSell.objects.select_related('user', 'category').annotate(
+            image_count=Count('images'),
+            last_image_id=Max('images__id'),
+            images_updated=Max('images__updated_at'),
+        ),
+        id=id,
+    )
     seller = product.user  # Get the seller's user object
+    last_modified = max(filter(None, [product.updated_at, product.images_updated, product.category.updated_at]))
+    # The similar bikes come from the rest of the catalog
+    parts = (product.id, product.updated_at, product.image_count, product.last_image_id, product.images_updated,
+             product.category.updated_at, seller.username, seller.first_name, seller.last_name, seller.email, catalog_version())
+    response = not_modified(request, page_etag(request, *parts), last_modified)
+    if response is not None:
+        return response
+
     cart_product_form = CartAddProductForm()
     context = {
         'product': product,
         'seller': seller,  # Pass the seller's information to the template
         'cart_product_form': cart_product_form,
+        'similar_bikes': similar_bikes(product),
     }
-    return render(request, 'detail.html', context)
+    response = render(request, 'detail.html', context)
+    return set_validators(response, page_etag(request, *parts), last_modified)  # after any new CSRF cookie
 
 
+@cache_anonymous_page
+@use_replica
+@condition_on(catalog_validator)
 def category_based_bike(request, category_id):
-    bike_buy_and_sell = BikeBuyAndSell.objects.filter(category__id=category_id)
+    bike_buy_and_sell = BikeBuyAndSell.objects.filter(category__id=category_id, status='Approved')
     context = {
         'bike_buy_and_sell': bike_buy_and_sell,
     }
-    return render(request, 'category_based_bike.html', context)
+    # Unpaginated: send the page head while the cards are still rendering
+    return render_streaming(request, 'category_based_bike.html', context)
 
 
 @login_required
@@ -430,7 +550,7 @@ def chat_support(request):
 
 def chat_support_redirect(request):
     if not request.user.is_authenticated:
-        return redirect('login')
+        return redirect('bike_buy_and_sell:login')
     return redirect('bike_buy_and_sell:chat_support')  # Use namespaced URL
 
 
@@ -449,7 +569,10 @@ def user_chat_support(request):
             return redirect('bike_buy_and_sell:chat_support')  # updated redirect with namespace
     # Pass messages as "chat_messages" instead of "messages"
     messages_list = ChatMessage.objects.filter(user=request.user).order_by('timestamp')
-    return render(request, 'chat_support.html', {'chat_messages': messages_list})
+    archived = request.GET.get('archived') == '1'
+    if archived:
+        messages_list = sorted([*archived_chat_messages(request.user), *messages_list], key=lambda m: m.timestamp)
+    return render(request, 'chat_support.html', {'chat_messages': messages_list, 'archived': archived})
 
 
 @login_required(login_url='/login/')
@@ -460,7 +583,8 @@ def edit_bike(request, bike_id):
         bike.price = request.POST.get('price')
         bike.description = request.POST.get('description')
         bike.category_id = request.POST.get('category')
-        bike.save()
+        # Leave status alone: a buyer may have reserved the bike since it was read
+        bike.save(update_fields=['name', 'price', 'description', 'category', 'updated_at'])
 
         # Handle new image uploads
         images = request.FILES.getlist('images')
@@ -469,16 +593,13 @@ def edit_bike(request, bike_id):
 
         messages.success(request, "Bike listing updated successfully!")
         return redirect('bike_buy_and_sell:sell_list')  # updated redirect with namespace
-    categories = Category.objects.all()
-    return render(request, 'edit_bike.html', {'bike': bike, 'categories': categories})
+    return render(request, 'edit_bike.html', {'bike': bike})
 
 
 @login_required(login_url='/login/')
 def delete_bike(request, bike_id):
     bike = get_object_or_404(BikeBuyAndSell, id=bike_id, user=request.user)
-    bike.delete()
-    from django.core.cache import cache  # ensure cache is imported
-    cache.clear()  # Clear cache to update buy list
+    bike.delete()  # bumps the catalog version, which retires the cached lists and pages
     messages.success(request, "Bike listing deleted successfully!")
     return redirect('bike_buy_and_sell:sell_list')
 
@@ -542,7 +663,7 @@ def activate_account(request, uidb64, token):
 
     if user is not None and default_token_generator.check_token(user, token):
         user.is_active = True
-        user.save()
+        user.save(update_fields=['is_active'])
         messages.success(request, "Your account has been activated successfully!")
         return redirect('bike_buy_and_sell:bike_indexlogin')
     else:
@@ -552,13 +673,25 @@ def activate_account(request, uidb64, token):
 
 @staff_member_required
 def admin_order_details(request, order_id):
-    order = get_object_or_404(Orders, id=order_id)
-    items = OrderItem.objects.filter(order=order)
+    order = get_order(id=order_id)
+    if order is None:
+        raise Http404("No order matches the given query.")
+    items = order_items(order)
     return render(request, 'admin/order_details.html', {'order': order, 'items': items})
 
 
 @login_required
+@condition_on(chat_validator)
 def chat_support_popup(request):
     messages_list = ChatMessage.objects.filter(user=request.user).order_by('timestamp')
     return render(request, 'partials/chat_popup.html', {'chat_messages': messages_list})
 
+
+@staff_member_required
+def performance_stats(request):
+    if request.method == 'POST':
+        performance.reset()
+    return JsonResponse({
+        'sample_rate': settings.PERFORMANCE_SAMPLE_RATE,
+        'views': performance.snapshot(),
+    })
@@ -42,8 +42,13 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'bike_buy_and_sell.middleware.PerformanceMiddleware',
+    'bike_buy_and_sell.middleware.SQLProfilerMiddleware',
+    'bike_buy_and_sell.compression.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
+    'bike_buy_and_sell.middleware.PrimaryPinningMiddleware',
+    'bike_buy_and_sell.pagecache.AnonymousPageCacheMiddleware',
+    'bike_buy_and_sell.sessions.HybridSessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
@@ -55,7 +60,8 @@ ROOT_URLCONF = 'core.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates that also reports render time to PerformanceMiddleware
+        'BACKEND': 'bike_buy_and_sell.instrumentation.InstrumentedDjangoTemplates',
         'DIRS': [os.path.join(BASE_DIR, 'templates')],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -65,6 +71,8 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
                 'bike_buy_and_sell.context_processors.cart',
+                'bike_buy_and_sell.context_processors.page_cache',
+                'bike_buy_and_sell.context_processors.reference_data',
             ],
         },
     },
@@ -79,10 +87,76 @@ WSGI_APPLICATION = 'core.wsgi.application'
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+         'NAME': os.environ.get('DJANGO_DB_NAME', os.path.join(BASE_DIR, 'db.sqlite3')),
     }
 }
 
+# Set DJANGO_DB_PROFILE=production to run SQLite in WAL mode with persistent
+# connections and write transactions started with BEGIN IMMEDIATE.
+DB_PROFILE = os.environ.get('DJANGO_DB_PROFILE', 'development')
+
+if DB_PROFILE == 'production':
+    DATABASES['default'].update({
+        'ENGINE': 'bike_buy_and_sell.backends.sqlite3',
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'TRANSACTION_MODE': 'IMMEDIATE',
+        # Applied on connection_created by bike_buy_and_sell.db
+        'PRAGMAS': {
+            'journal_mode': 'WAL',
+            'synchronous': 'NORMAL',
+            'busy_timeout': 5000,  # milliseconds
+            'mmap_size': 134217728,  # 128 MB
+            'cache_size': -20000,  # 20 MB (negative values are KiB)
+            'temp_store': 'MEMORY',
+        },
+    })
+
+# Read replicas, e.g. DJANGO_DB_REPLICAS=/srv/replica1.sqlite3,/srv/replica2.sqlite3
+# Locally, `python manage.py sync_replicas` copies the primary into each file.
+DATABASE_REPLICAS = []
+for n, replica_name in enumerate(filter(None, os.environ.get('DJANGO_DB_REPLICAS', '').split(',')), start=1):
+    DATABASES[f'replica{n}'] = dict(DATABASES['default'], NAME=replica_name, TEST={'MIRROR': 'default'})
+    DATABASE_REPLICAS.append(f'replica{n}')
+
+DATABASE_ROUTERS = ['bike_buy_and_sell.routers.PrimaryReplicaRouter']
+
+# Seconds a client keeps reading from the primary after a write
+REPLICA_PIN_SECONDS = 10
+
+
+# Cache
+# Each process keeps a small L1 in front of the shared L2 cache, see bike_buy_and_sell.cache.
+# Set REDIS_URL to share L2 through Redis instead of the local file system.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'bike_buy_and_sell.cache.TwoTierCache',
+        'LOCATION': 'shared',
+        'TIMEOUT': 300,
+        'OPTIONS': {
+            'L1_MAX_ENTRIES': 1000,
+            'L1_TIMEOUT': 5,
+        },
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('DJANGO_CACHE_DIR', os.path.join(BASE_DIR, '.cache')),
+        # The default of 300 entries is culled quickly once page fragments are cached
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+}
+
+if os.environ.get('REDIS_URL'):
+    CACHES['shared'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ['REDIS_URL'],
+    }
+
+
+# Log in with the username or the account email (bike_buy_and_sell.accounts)
+AUTHENTICATION_BACKENDS = ['bike_buy_and_sell.accounts.EmailOrUsernameBackend']
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
@@ -119,7 +193,19 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/5.0/howto/static-files/
 
 STATIC_URL = 'static/'
-STATIC_ROOT = os.path.join(BASE_DIR, 'static')
+STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
+# Sources live in assets/ (including vendored Bootstrap and Font Awesome);
+# collectstatic writes hashed, precompressed copies to STATIC_ROOT
+STATICFILES_DIRS = [os.path.join(BASE_DIR, 'assets')]
+
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'bike_buy_and_sell.storage.CompressedManifestStaticFilesStorage',
+    },
+}
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.0/ref/settings/#default-auto-field
@@ -135,3 +221,42 @@ LOGIN_REDIRECT_URL = 'bike_buy_and_sell:profile'
 LOGOUT_REDIRECT_URL = 'bike_buy_and_sell:login'
 
 CART_SESSION_ID = 'cart'
+
+
+# Performance instrumentation (bike_buy_and_sell.middleware.PerformanceMiddleware)
+# Fraction of requests measured; off unless the PERFORMANCE_SAMPLE_RATE env var is set
+# (1.0 measures every request). Per-URL stats: /performance/ (staff only).
+
+PERFORMANCE_SAMPLE_RATE = float(os.environ.get('PERFORMANCE_SAMPLE_RATE', 0.0))
+PERFORMANCE_SLOW_REQUEST_MS = 500
+
+# SQL fingerprint profiler (bike_buy_and_sell.profiling); read it with `manage.py sqlprofile`
+SQL_PROFILER_SAMPLE_RATE = float(os.environ.get('SQL_PROFILER_SAMPLE_RATE', 0.01))
+# Repeats of one fingerprint within a request that mark it as an N+1 suspect
+SQL_PROFILER_N_PLUS_ONE_THRESHOLD = 3
+
+
+# Sessions
+# Logged-in users: database-backed sessions read through the shared cache (L2 only,
+# so every worker sees the latest write). Anonymous visitors: the cart lives in a
+# signed cookie and never touches the database. Set ANONYMOUS_SESSION_ENGINE = None
+# to use SESSION_ENGINE for everyone.
+
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+SESSION_CACHE_ALIAS = 'shared'
+ANONYMOUS_SESSION_ENGINE = 'django.contrib.sessions.backends.signed_cookies'
+ANONYMOUS_SESSION_COOKIE_NAME = 'anon_session'
+
+# Full-page cache for anonymous visitors without a cart (bike_buy_and_sell.pagecache).
+# Pages are dropped on every catalog change; the timeout only bounds other staleness.
+ANONYMOUS_PAGE_CACHE_ALIAS = 'default'
+ANONYMOUS_PAGE_CACHE_TIMEOUT = int(os.environ.get('ANONYMOUS_PAGE_CACHE_TIMEOUT', 60))
+
+# Similar bikes on product_detail (bike_buy_and_sell.similar). `manage.py build_similar_index`
+# writes the vector index here (needs NumPy); without one, similar bikes are the same
+# category's nearest prices.
+SIMILAR_INDEX_DIR = os.environ.get('SIMILAR_INDEX_DIR', os.path.join(BASE_DIR, '.similar'))
+
+# Views using bike_buy_and_sell.streaming.render_streaming send the page head
+# before the body has rendered; False renders them in full like render()
+STREAMING_RENDER = os.environ.get('STREAMING_RENDER', '1') == '1'
@@ -15,11 +15,13 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 from django.conf import settings
 from django.conf.urls.static import static
 from django.views.generic import RedirectView
 
+from bike_buy_and_sell.storage import serve_static
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('', include(('bike_buy_and_sell.urls', 'bike_buy_and_sell'), namespace='bike_buy_and_sell')),
@@ -31,6 +33,8 @@ if settings.DEBUG:
     urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
 else:
+    # Collected, precompressed static files when no front-end server handles them
+    urlpatterns += [re_path(r'^%s(?P<path>.*)$' % settings.STATIC_URL.lstrip('/'), serve_static)]
     admin.site.site_header = 'Bike Buy And Sell Administration'
     admin.site.site_title = 'Bike Buy And Sell Admin'
     admin.site.index_title = 'Administration'